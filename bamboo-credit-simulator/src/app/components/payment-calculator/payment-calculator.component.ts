@@ -297,7 +297,8 @@ export class PaymentCalculatorComponent implements OnInit, OnDestroy {
       session_id: this.generateSessionId()
     };
 
-    this.apiService.simulateCredit(simulationRequest).subscribe({
+    // Le calculateur affiche le tableau complet : on le demande explicitement
+    this.apiService.simulateCredit(simulationRequest, true).subscribe({
       next: (response) => {
         this.results = this.adaptResponseToExistingFormat(response);
         this.isCalculating = false;
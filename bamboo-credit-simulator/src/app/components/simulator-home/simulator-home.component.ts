@@ -12,6 +12,7 @@ import { takeUntil, debounceTime, distinctUntilChanged } from 'rxjs/operators';
 
 import { NotificationService } from '../../services/notification.service';
 import { AnalyticsService } from '../../services/analytics.service';
+import { ApiService } from '../../services/api.service';
 
 interface QuickSimulationResult {
   estimatedCapacity: number;
@@ -360,7 +361,8 @@ partnerLogos: string[] = [
     private route: ActivatedRoute,
     private sanitizer: DomSanitizer,
     private notificationService: NotificationService,
-    private analyticsService: AnalyticsService
+    private analyticsService: AnalyticsService,
+    private apiService: ApiService
   ) {
     this.initializeSafeIcons();
   }
@@ -368,6 +370,25 @@ partnerLogos: string[] = [
   ngOnInit(): void {
     this.initializeForms();
     this.trackPageView();
+    this.loadDailyRates();
+  }
+
+  // Taux du jour : meilleur taux par type, lu dans la table des meilleures offres
+  private loadDailyRates(): void {
+    this.apiService.getBestCreditOffers()
+      .pipe(takeUntil(this.destroy$))
+      .subscribe({
+        next: (response) => {
+          for (const offer of response?.best_offers || []) {
+            if (offer.credit_type in this.dailyRates) {
+              this.dailyRates[offer.credit_type as keyof DailyRates] = offer.best_rate;
+            }
+          }
+        },
+        error: () => {
+          // Valeurs par défaut conservées si l'API est indisponible
+        }
+      });
   }
 
   ngOnDestroy(): void {
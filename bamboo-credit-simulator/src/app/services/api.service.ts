@@ -28,6 +28,8 @@ export interface CreditSimulationResponse {
   total_cost: number;
   debt_ratio: number;
   amortization_schedule: AmortizationEntry[];
+  schedule_months?: number;
+  schedule_url?: string | null;
   recommendations: string[];
   bank_info: {
     name: string;
@@ -42,6 +44,16 @@ export interface AmortizationEntry {
   remaining_balance: number;
 }
 
+export interface AmortizationSchedulePage {
+  simulation_id: string;
+  duration_months: number;
+  monthly_payment: number;
+  from: number;
+  to: number;
+  next_from: number | null;
+  rows: AmortizationEntry[];
+}
+
 export interface Bank {
   id: string;
   name: string;
@@ -324,6 +336,45 @@ export class ApiService {
     };
   }
 
+  // Durée pendant laquelle une même soumission (double clic, nouvel envoi) réutilise sa clé
+  private static readonly SUBMISSION_KEY_TTL_MS = 30000;
+  private readonly submissionKeys = new Map<string, { key: string; expiresAt: number }>();
+
+  // Nouvelle clé Idempotency-Key (par exemple une par formulaire, conservée pour ses renvois)
+  createIdempotencyKey(): string {
+    return typeof crypto !== 'undefined' && 'randomUUID' in crypto
+      ? crypto.randomUUID()
+      : `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`;
+  }
+
+  // Clé d'une soumission : le même POST (URL, paramètres, corps) renvoyé peu après reprend la même clé
+  // (partagée avec les services de demandes, qui n'héritent pas de ces options HTTP)
+  submissionKey(url: string, body: unknown): string {
+    const now = Date.now();
+    this.submissionKeys.forEach((entry, fingerprint) => {
+      if (entry.expiresAt <= now) {
+        this.submissionKeys.delete(fingerprint);
+      }
+    });
+
+    const fingerprint = `${url}|${JSON.stringify(body)}`;
+    const existing = this.submissionKeys.get(fingerprint);
+    if (existing) {
+      return existing.key;
+    }
+    const key = this.createIdempotencyKey();
+    this.submissionKeys.set(fingerprint, { key, expiresAt: now + ApiService.SUBMISSION_KEY_TTL_MS });
+    return key;
+  }
+
+  // Options HTTP d'un POST rejouable sans double écriture côté serveur
+  private getIdempotentHttpOptions(url: string, body: unknown, idempotencyKey?: string) {
+    return {
+      ...this.getHttpOptions(),
+      headers: this.defaultHeaders.set('Idempotency-Key', idempotencyKey || this.submissionKey(url, body))
+    };
+  }
+
   // Gestion d'erreur centralisée
   private handleError = (operation: string) => (error: HttpErrorResponse): Observable<never> => {
     console.error(`${operation} failed:`, error);
@@ -639,6 +690,9 @@ export class ApiService {
     duration: number;
     monthly_income: number;
     current_debts?: number;
+    limit?: number;
+    sort_by?: 'monthly_payment' | 'total_cost' | 'rate' | 'processing_time';
+    eligible_only?: boolean;
   }): Observable<any> {
     // Validation des paramètres côté client
     if (params.amount <= 0) {
@@ -660,6 +714,15 @@ export class ApiService {
     if (params.current_debts !== undefined && params.current_debts >= 0) {
       httpParams = httpParams.set('current_debts', params.current_debts.toString());
     }
+    if (params.limit) {
+      httpParams = httpParams.set('limit', params.limit.toString());
+    }
+    if (params.sort_by) {
+      httpParams = httpParams.set('sort_by', params.sort_by);
+    }
+    if (params.eligible_only) {
+      httpParams = httpParams.set('eligible_only', 'true');
+    }
 
     return this.http.get(`${this.baseUrl}/credits/compare`, {
       ...this.getHttpOptions(),
@@ -670,6 +733,61 @@ export class ApiService {
     );
   }
 
+  // Meilleures offres précalculées par type de crédit (page d'accueil)
+  getBestCreditOffers(params: { credit_type?: string; amount?: number; duration?: number; limit?: number } = {}): Observable<any> {
+    let httpParams = new HttpParams();
+    Object.entries(params).forEach(([key, value]) => {
+      if (value !== undefined && value !== null) {
+        httpParams = httpParams.set(key, value.toString());
+      }
+    });
+
+    return this.http.get(`${this.baseUrl}/credits/best-offers`, {
+      ...this.getHttpOptions(),
+      params: httpParams
+    }).pipe(
+      timeout(10000),
+      catchError(this.handleError('Best Credit Offers'))
+    );
+  }
+
+  // Comparaison crédit / épargne / assurance en une seule requête
+  compareAllOffers(params: {
+    monthly_income: number;
+    current_debts?: number;
+    credit_type?: string;
+    amount?: number;
+    duration?: number;
+    sort_by?: 'monthly_payment' | 'total_cost' | 'rate' | 'processing_time';
+    eligible_only?: boolean;
+    savings_initial?: number;
+    savings_monthly?: number;
+    savings_duration?: number;
+    insurance_type?: string;
+    age?: number;
+    guarantees?: string[];
+    vehicle_value?: number;
+    property_value?: number;
+    coverage_amount?: number;
+    limit?: number;
+  }): Observable<any> {
+    let httpParams = new HttpParams();
+    Object.entries(params).forEach(([key, value]) => {
+      if (value === undefined || value === null || value === '') {
+        return;
+      }
+      httpParams = httpParams.set(key, Array.isArray(value) ? value.join(',') : value.toString());
+    });
+
+    return this.http.get(`${this.baseUrl}/compare/all`, {
+      ...this.getHttpOptions(),
+      params: httpParams
+    }).pipe(
+      timeout(30000),
+      catchError(this.handleError('Compare All Offers'))
+    );
+  }
+
   // Diagnostic complet pour le simulateur de capacité
   runCapacitySimulatorDiagnostic(): Observable<any> {
     console.log('Lancement du diagnostic complet du simulateur de capacité...');
@@ -792,17 +910,42 @@ export class ApiService {
   }
 
   // Simulations de crédit
-  simulateCredit(request: CreditSimulationRequest): Observable<CreditSimulationResponse> {
+  // Par défaut la réponse ne contient qu'un aperçu du tableau d'amortissement
+  // idempotencyKey : clé du formulaire, à réutiliser pour chaque renvoi de la même soumission
+  simulateCredit(
+    request: CreditSimulationRequest,
+    includeSchedule: boolean = false,
+    idempotencyKey?: string
+  ): Observable<CreditSimulationResponse> {
     console.log('Simulating credit with request:', request);
+    const url = `${this.baseUrl}/credits/simulate`;
     return this.http.post<CreditSimulationResponse>(
-      `${this.baseUrl}/credits/simulate`, 
+      url, 
       request, 
-      this.getHttpOptions()
+      {
+        ...this.getIdempotentHttpOptions(`${url}?include_schedule=${includeSchedule}`, request, idempotencyKey),
+        params: new HttpParams().set('include_schedule', includeSchedule.toString())
+      }
     ).pipe(
       catchError(this.handleError('Simulate Credit'))
     );
   }
 
+  // Page du tableau d'amortissement régénéré côté serveur
+  getCreditSimulationSchedule(simulationId: string, from: number = 1, to?: number): Observable<AmortizationSchedulePage> {
+    let httpParams = new HttpParams().set('from', from.toString());
+    if (to !== undefined) {
+      httpParams = httpParams.set('to', to.toString());
+    }
+
+    return this.http.get<AmortizationSchedulePage>(
+      `${this.baseUrl}/simulations/credit/${simulationId}/schedule`,
+      { ...this.getHttpOptions(), params: httpParams }
+    ).pipe(
+      catchError(this.handleError('Get Credit Simulation Schedule'))
+    );
+  }
+
   // === NOUVELLES MÉTHODES POUR L'ÉPARGNE ===
 
   // Produits d'épargne avec gestion d'erreurs robuste
@@ -889,7 +1032,12 @@ export class ApiService {
   }
 
   // Simulation d'épargne avec validation et gestion d'erreurs complète
-  simulateSavings(request: SavingsSimulationRequest): Observable<SavingsSimulationResponse> {
+  // Par défaut la réponse ne contient pas le détail mois par mois (includeBreakdown pour l'obtenir)
+  simulateSavings(
+    request: SavingsSimulationRequest,
+    includeBreakdown: boolean = false,
+    idempotencyKey?: string
+  ): Observable<SavingsSimulationResponse> {
   console.log('Début simulation épargne:', request);
   
   // Validation côté client
@@ -917,8 +1065,10 @@ export class ApiService {
   return this.http.post<any>(url, request, {
     headers: {
       'Content-Type': 'application/json',
-      'Accept': 'application/json'
-    }
+      'Accept': 'application/json',
+      'Idempotency-Key': idempotencyKey || this.submissionKey(`${url}?include_breakdown=${includeBreakdown}`, request)
+    },
+    params: new HttpParams().set('include_breakdown', includeBreakdown.toString())
   }).pipe(
     timeout(30000), // CORRIGÉ: timeout ici dans pipe()
     tap(response => {
@@ -932,6 +1082,38 @@ export class ApiService {
   );
 }
 
+  // Comparaison de tous les produits d'épargne côté serveur (aucune simulation enregistrée)
+  compareSavingsProducts(initial: number, monthly: number, duration: number, limit?: number): Observable<any> {
+    let httpParams = new HttpParams()
+      .set('initial', initial.toString())
+      .set('monthly', monthly.toString())
+      .set('duration', duration.toString());
+    if (limit) {
+      httpParams = httpParams.set('limit', limit.toString());
+    }
+
+    return this.http.get(`${this.baseUrl}/savings/compare`, {
+      ...this.getHttpOptions(),
+      params: httpParams
+    }).pipe(
+      timeout(15000),
+      catchError(this.handleError('Compare Savings Products'))
+    );
+  }
+
+  // Objectif d'épargne : versement ou durée requis pour chaque produit, en un seul appel
+  solveSavingsGoal(request: {
+    target_amount: number;
+    initial_amount?: number;
+    duration_months?: number;
+    monthly_budget?: number;
+  }): Observable<any> {
+    return this.http.post(`${this.baseUrl}/savings/goal`, request, this.getHttpOptions()).pipe(
+      timeout(15000),
+      catchError(this.handleError('Savings Goal'))
+    );
+  }
+
   // Mapper la réponse de simulation
   private mapSimulationResponse(apiResponse: any): SavingsSimulationResponse {
     console.log('Mapping de la réponse simulation:', apiResponse);
@@ -977,7 +1159,7 @@ export class ApiService {
         };
         
         console.log('Requête de test:', testRequest);
-        return this.simulateSavings(testRequest);
+        return this.simulateSavings(testRequest, true);
       }),
       tap(result => console.log('Test de simulation réussi:', result)),
       catchError(error => {
@@ -87,6 +87,78 @@ export interface AmortizationEntry {
   remaining_balance: number;
 }
 
+export interface CreditSimulationBatchRequest {
+  simulations: CreditSimulationRequest[];
+  persist?: boolean;
+}
+
+export interface CreditSimulationBatchItem {
+  index: number;
+  success: boolean;
+  error?: string;
+  simulation_id?: string;
+  credit_product_id?: string;
+  applied_rate?: number;
+  monthly_payment?: number;
+  total_interest?: number;
+  total_cost?: number;
+  debt_ratio?: number;
+  eligible?: boolean;
+  recommendations?: string[];
+  bank_info?: {
+    name: string;
+    logo?: string;
+  };
+}
+
+export interface CreditSimulationBatchResponse {
+  results: CreditSimulationBatchItem[];
+  statistics: {
+    total: number;
+    succeeded: number;
+    failed: number;
+    eligible: number;
+  };
+  persisted: boolean;
+}
+
+export interface SensitivityGridRequest {
+  credit_product_id?: string;
+  amount_min?: number;
+  amount_max?: number;
+  amount_steps?: number;
+  duration_min?: number;
+  duration_max?: number;
+  duration_steps?: number;
+  rate_min?: number;
+  rate_max?: number;
+  rate_steps?: number;
+  monthly_income?: number;
+  current_debts?: number;
+}
+
+// Matrices indexées [montant][durée][taux]
+export interface SensitivityGridResponse {
+  axes: {
+    amounts: number[];
+    durations: number[];
+    rates: number[];
+  };
+  shape: number[];
+  layout: string;
+  grid: {
+    monthly_payment: number[][][];
+    total_cost: number[][][];
+    total_interest: number[][][];
+    debt_ratio: number[][][] | null;
+  };
+  parameters: {
+    credit_product_id?: string;
+    monthly_income?: number;
+    current_debts: number;
+  };
+}
+
 export interface CreditComparisonRequest {
   credit_type: string;
   amount: number;
@@ -147,6 +219,17 @@ export interface BorrowingCapacityRequest {
   down_payment?: number;
   include_insurance?: boolean;
   insurance_rate?: number;
+  include_curve?: boolean;
+  curve_step?: number;
+}
+
+// Courbe capacité / durée (colonnes alignées sur durations)
+export interface BorrowingCapacityCurve {
+  durations: number[];
+  borrowing_capacity: number[];
+  monthly_payment: number[];
+  monthly_insurance: number[];
+  total_interest: number[];
 }
 
 export interface BorrowingCapacityResponse {
@@ -170,6 +253,7 @@ export interface BorrowingCapacityResponse {
     insurance_rate: number;
     max_debt_ratio: number;
   };
+  capacity_curve?: BorrowingCapacityCurve;
 }
 
 @Injectable({
@@ -249,6 +333,35 @@ export class CreditService {
       );
   }
 
+  /**
+   * Simule plusieurs crédits en un seul appel (résultats dans l'ordre de la requête)
+   * Utilise l'endpoint POST /simulate-batch
+   */
+  simulateCreditBatch(request: CreditSimulationBatchRequest): Observable<CreditSimulationBatchResponse> {
+    return this.http.post<CreditSimulationBatchResponse>(`${this.API_URL}/simulate-batch`, request)
+      .pipe(
+        catchError(this.handleError)
+      );
+  }
+
+  /**
+   * Récupère la grille de sensibilité montant × durée × taux (interpolation locale)
+   * Utilise l'endpoint GET /sensitivity-grid
+   */
+  getSensitivityGrid(request: SensitivityGridRequest): Observable<SensitivityGridResponse> {
+    let params = new HttpParams();
+    Object.entries(request).forEach(([key, value]) => {
+      if (value !== undefined && value !== null) {
+        params = params.set(key, value.toString());
+      }
+    });
+
+    return this.http.get<SensitivityGridResponse>(`${this.API_URL}/sensitivity-grid`, { params })
+      .pipe(
+        catchError(this.handleError)
+      );
+  }
+
   /**
    * Compare les offres de crédit de différentes banques
    * Utilise l'endpoint GET /compare
@@ -296,6 +409,12 @@ export class CreditService {
     if (request.insurance_rate !== undefined) {
       params = params.set('insurance_rate', request.insurance_rate.toString());
     }
+    if (request.include_curve !== undefined) {
+      params = params.set('include_curve', request.include_curve.toString());
+    }
+    if (request.curve_step !== undefined) {
+      params = params.set('curve_step', request.curve_step.toString());
+    }
 
     return this.http.get<BorrowingCapacityResponse>(`${this.API_URL}/borrowing-capacity`, { params })
       .pipe(
@@ -1,8 +1,9 @@
 import { Injectable } from '@angular/core';
-import { HttpClient, HttpErrorResponse } from '@angular/common/http';
+import { HttpClient, HttpErrorResponse, HttpHeaders } from '@angular/common/http';
 import { Observable, of, throwError } from 'rxjs';
 import { catchError, retry, tap } from 'rxjs/operators';
 import { environment } from '../environments/environment';
+import { ApiService } from './api.service';
 
 export interface SavingsApplicationRequest {
   savings_product_id: string;
@@ -64,11 +65,14 @@ export interface SavingsApplicationStatus {
 export class SavingsApplicationService {
   private baseUrl = `${environment.apiUrl}/applications`;
 
-  constructor(private http: HttpClient) {}
+  constructor(private http: HttpClient, private apiService: ApiService) {}
 
   // APPLICATIONS D'ÉPARGNE
   
- submitSavingsApplication(application: SavingsApplicationRequest): Observable<SavingsApplicationNotification> {
+ submitSavingsApplication(
+  application: SavingsApplicationRequest,
+  idempotencyKey?: string
+): Observable<SavingsApplicationNotification> {
   const processedApplication = {
     ...application,
     initial_deposit: Number(application.initial_deposit),
@@ -87,7 +91,13 @@ export class SavingsApplicationService {
 
   console.log('Envoi demande épargne:', processedApplication);
   
-  return this.http.post<SavingsApplicationNotification>(`${this.baseUrl}/savings`, processedApplication)
+  // Même clé pour la nouvelle tentative (retry) et pour un nouvel envoi du même formulaire :
+  // l'empreinte porte sur la demande saisie, pas sur les métadonnées horodatées
+  const url = `${this.baseUrl}/savings`;
+  const headers = new HttpHeaders({
+    'Idempotency-Key': idempotencyKey || this.apiService.submissionKey(url, application)
+  });
+  return this.http.post<SavingsApplicationNotification>(url, processedApplication, { headers })
     .pipe(
       tap(response => {
         console.log('✅ Réponse API reçue:', response);
@@ -4,6 +4,7 @@ import { HttpClient, HttpHeaders, HttpErrorResponse } from '@angular/common/http
 import { BehaviorSubject, Observable, throwError, timer } from 'rxjs';
 import { map, catchError, switchMap, tap } from 'rxjs/operators';
 import { Router } from '@angular/router';
+import { ApiService } from './api.service';
 
 // ==================== INTERFACES ====================
 
@@ -202,7 +203,8 @@ export class AuthService {
 
   constructor(
     private http: HttpClient,
-    private router: Router
+    private router: Router,
+    private apiService: ApiService
   ) {
     this.initializeAuth();
   }
@@ -521,24 +523,34 @@ export class AuthService {
   }
 
   // ==================== APPLICATIONS ====================
+  // idempotencyKey : clé du formulaire ; à défaut, un même envoi répété peu après reprend sa clé
 
-  createCreditApplication(applicationData: any): Observable<any> {
-    const headers = this.getAuthHeaders();
-    return this.http.post(`${this.apiUrl}/applications/credit`, applicationData, { headers })
+  createCreditApplication(applicationData: any, idempotencyKey?: string): Observable<any> {
+    const url = `${this.apiUrl}/applications/credit`;
+    const headers = this.getAuthHeaders().set(
+      'Idempotency-Key', idempotencyKey || this.apiService.submissionKey(url, applicationData)
+    );
+    return this.http.post(url, applicationData, { headers })
       .pipe(catchError(this.handleError));
   }
 
   submitCreditApplication = this.createCreditApplication;
 
-  createSavingsApplication(applicationData: any): Observable<any> {
-    const headers = this.getAuthHeaders();
-    return this.http.post(`${this.apiUrl}/applications/savings`, applicationData, { headers })
+  createSavingsApplication(applicationData: any, idempotencyKey?: string): Observable<any> {
+    const url = `${this.apiUrl}/applications/savings`;
+    const headers = this.getAuthHeaders().set(
+      'Idempotency-Key', idempotencyKey || this.apiService.submissionKey(url, applicationData)
+    );
+    return this.http.post(url, applicationData, { headers })
       .pipe(catchError(this.handleError));
   }
 
-  createInsuranceApplication(applicationData: any): Observable<any> {
-    const headers = this.getAuthHeaders();
-    return this.http.post(`${this.apiUrl}/applications/insurance`, applicationData, { headers })
+  createInsuranceApplication(applicationData: any, idempotencyKey?: string): Observable<any> {
+    const url = `${this.apiUrl}/applications/insurance`;
+    const headers = this.getAuthHeaders().set(
+      'Idempotency-Key', idempotencyKey || this.apiService.submissionKey(url, applicationData)
+    );
+    return this.http.post(url, applicationData, { headers })
       .pipe(catchError(this.handleError));
   }
 
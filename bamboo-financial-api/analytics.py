@@ -1,4 +1,4 @@
-# routers/analytics.py - Version corrigée
+# analytics.py - Statistiques de marché et tendances (router /api/analytics)
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from sqlalchemy import func, desc, and_
@@ -6,10 +6,15 @@ from typing import Dict, Any, List
 from datetime import datetime, timedelta
 import models
 from database import get_db
+from response_cache import cached_response, uncached
 
 router = APIRouter()
 
+# Agrégats recalculés au plus une fois par minute et par jeu de paramètres
+ANALYTICS_CACHE_TTL = 60
+
 @router.get("/market-statistics")
+@cached_response(ttl=ANALYTICS_CACHE_TTL)
 async def get_market_statistics(db: Session = Depends(get_db)):
     """Récupère les statistiques du marché financier"""
     try:
@@ -65,8 +70,8 @@ async def get_market_statistics(db: Session = Depends(get_db)):
         
     except Exception as e:
         print(f"Erreur dans get_market_statistics: {str(e)}")
-        # Retour de données par défaut en cas d'erreur
-        return {
+        # Retour de données par défaut en cas d'erreur (non mises en cache)
+        return uncached({
             "average_rate": 8.5,
             "trend": 0.0,
             "best_rate": 6.5,
@@ -79,9 +84,10 @@ async def get_market_statistics(db: Session = Depends(get_db)):
             "last_updated": datetime.now().isoformat(),
             "market_health": "stable",
             "recommendations": ["Données par défaut - Erreur API"]
-        }
+        })
 
 @router.get("/banks-comparison")
+@cached_response(ttl=ANALYTICS_CACHE_TTL)
 async def get_banks_comparison(db: Session = Depends(get_db)):
     """Compare les performances des banques"""
     try:
@@ -142,6 +148,7 @@ async def get_banks_comparison(db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=f"Erreur lors de la comparaison des banques: {str(e)}")
 
 @router.get("/products-performance")
+@cached_response(ttl=ANALYTICS_CACHE_TTL)
 async def get_products_performance(product_type: str = None, db: Session = Depends(get_db)):
     """Analyse des performances des produits"""
     try:
@@ -221,6 +228,7 @@ async def get_products_performance(product_type: str = None, db: Session = Depen
         raise HTTPException(status_code=500, detail=f"Erreur lors de l'analyse des performances: {str(e)}")
 
 @router.get("/trends")
+@cached_response(ttl=ANALYTICS_CACHE_TTL)
 async def get_trends(period_days: int = 30, db: Session = Depends(get_db)):
     """Analyse des tendances sur une période donnée"""
     try:
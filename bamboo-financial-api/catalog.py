@@ -0,0 +1,393 @@
+# catalog.py - Instantané en mémoire du catalogue (banques, produits) invalidé par les écritures
+import hashlib
+import os
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import event, inspect as sa_inspect
+from sqlalchemy.orm import Session
+
+import finance
+import models
+import rating
+from database import SessionLocal
+
+# Durée de vie maximale d'un instantané : les autres workers convergent même
+# sans avoir vu l'écriture (l'invalidation est locale au processus)
+CATALOG_MAX_AGE_SECONDS = int(os.getenv("CATALOG_MAX_AGE_SECONDS", "300"))
+
+# Durée pendant laquelle navigateurs et proxy réutilisent une réponse sans revalider
+CATALOG_HTTP_MAX_AGE = int(os.getenv("CATALOG_HTTP_MAX_AGE", "60"))
+
+# Modèles dont la modification invalide l'instantané
+CATALOG_MODELS = (
+    models.Bank,
+    models.CreditProduct,
+    models.SavingsProduct,
+    models.InsuranceCompany,
+    models.InsuranceProduct,
+)
+
+# Colonnes volumineuses inutiles aux endpoints publics
+EXCLUDED_COLUMNS = {"logo_data"}
+
+
+def _record_type(model, name: str, relation: Optional[str] = None):
+    """Tuple nommé immuable reprenant les colonnes du modèle (plus la relation parente)"""
+    fields = [attr.key for attr in sa_inspect(model).column_attrs if attr.key not in EXCLUDED_COLUMNS]
+    if relation:
+        fields.append(relation)
+    return namedtuple(name, fields)
+
+
+BankRecord = _record_type(models.Bank, "BankRecord")
+CreditProductRecord = _record_type(models.CreditProduct, "CreditProductRecord", "bank")
+SavingsProductRecord = _record_type(models.SavingsProduct, "SavingsProductRecord", "bank")
+InsuranceCompanyRecord = _record_type(models.InsuranceCompany, "InsuranceCompanyRecord")
+InsuranceProductRecord = _record_type(models.InsuranceProduct, "InsuranceProductRecord", "insurance_company")
+
+
+# ==================== INDEX D'ÉLIGIBILITÉ DES PRODUITS DE CRÉDIT ====================
+
+class IntervalIndex:
+    """
+    Index de recouvrement sur des intervalles fermés [bas, haut].
+
+    Les bornes distinctes découpent l'axe en points et en segments ouverts ;
+    chacun porte le masque (entier utilisé comme ensemble de bits) des
+    intervalles qui le recouvrent. Une requête est une recherche dichotomique.
+    """
+
+    __slots__ = ("bounds", "point_masks", "gap_masks")
+
+    def __init__(self, intervals: Sequence[Tuple[int, int]]):
+        self.bounds = sorted({value for interval in intervals for value in interval})
+        self.point_masks = [0] * len(self.bounds)
+        # gap_masks[i] : valeurs strictement entre bounds[i-1] et bounds[i]
+        self.gap_masks = [0] * (len(self.bounds) + 1)
+
+        for position, (low, high) in enumerate(intervals):
+            bit = 1 << position
+            first = bisect_left(self.bounds, low)
+            last = bisect_left(self.bounds, high)
+            for i in range(first, last + 1):
+                self.point_masks[i] |= bit
+            for i in range(first + 1, last + 1):
+                self.gap_masks[i] |= bit
+
+    def stab(self, value) -> int:
+        """Masque des intervalles contenant value"""
+        i = bisect_left(self.bounds, value)
+        if i < len(self.bounds) and self.bounds[i] == value:
+            return self.point_masks[i]
+        return self.gap_masks[i]
+
+
+class CreditProductIndex:
+    """Produits de crédit actifs par type normalisé, avec index montant et durée"""
+
+    def __init__(self, products: Iterable):
+        grouped: Dict[str, List] = {}
+        for product in products:
+            grouped.setdefault(normalize_credit_type(product.type), []).append(product)
+
+        self.by_type = {}
+        for credit_type, members in grouped.items():
+            amounts = IntervalIndex([
+                (finance.to_minor(p.min_amount), finance.to_minor(p.max_amount)) for p in members
+            ])
+            durations = IntervalIndex([
+                (int(p.min_duration_months), int(p.max_duration_months)) for p in members
+            ])
+            self.by_type[credit_type] = (tuple(members), amounts, durations)
+
+    def types_matching(self, credit_type: str) -> List[str]:
+        """Types indexés contenant la recherche (sous-chaîne, comme l'ancien ILIKE '%type%')"""
+        key = normalize_credit_type(credit_type)
+        return [indexed for indexed in self.by_type if key in indexed]
+
+    def match(self, credit_type: str, amount: float, duration: int) -> List:
+        """Produits du type acceptant le montant et la durée demandés"""
+        amount_minor = finance.to_minor(amount)
+        matches = []
+        for key in self.types_matching(credit_type):
+            members, amounts, durations = self.by_type[key]
+            mask = amounts.stab(amount_minor) & durations.stab(duration)
+            while mask:
+                low_bit = mask & -mask
+                matches.append(members[low_bit.bit_length() - 1])
+                mask ^= low_bit
+        return matches
+
+
+# ==================== TABLE MATÉRIALISÉE DES MEILLEURES OFFRES ====================
+
+# Bornes des tranches de montant (FCFA) et de durée (mois) : chaque tranche est
+# calculée en son point représentatif (borne basse), qui correspond aux
+# montants et durées proposés par les formulaires.
+BEST_OFFER_AMOUNTS = (
+    500_000, 1_000_000, 2_000_000, 3_000_000, 5_000_000, 7_500_000, 10_000_000,
+    15_000_000, 20_000_000, 30_000_000, 50_000_000, 75_000_000, 100_000_000
+)
+BEST_OFFER_DURATIONS = (12, 24, 36, 48, 60, 84, 120, 180, 240, 300)
+
+
+class BestOffersEntry(NamedTuple):
+    """
+    Offres d'une tranche : produits (ordre de l'index), facteurs d'annuité,
+    taux d'endettement max, mensualités en centimes, classement
+    """
+    amount: int
+    duration: int
+    products: Tuple
+    tables: Tuple
+    factors: np.ndarray
+    max_ratios: np.ndarray
+    payments: np.ndarray
+    ranking: Tuple[int, ...]
+
+
+class BestOffersTable:
+    """
+    Offres précalculées par (type de crédit, tranche de montant, tranche de durée).
+    Reconstruite par type : seuls les types dont un produit a changé sont recalculés.
+    """
+
+    def __init__(self, credit_index: CreditProductIndex, previous: Optional["BestOffersTable"] = None):
+        self.entries: Dict[Tuple[str, int, int], BestOffersEntry] = {}
+        self.signatures: Dict[str, Tuple] = {}
+        self.rebuilt_types: List[str] = []
+
+        for credit_type, (members, _, _) in credit_index.by_type.items():
+            # Enregistrements comparés par valeur : conditions, banque, libellés...
+            signature = members
+            self.signatures[credit_type] = signature
+            if previous is not None and previous.signatures.get(credit_type) == signature:
+                self.entries.update(previous.type_entries(credit_type))
+                continue
+
+            self.rebuilt_types.append(credit_type)
+            for amount in BEST_OFFER_AMOUNTS:
+                for duration in BEST_OFFER_DURATIONS:
+                    products = credit_index.match(credit_type, amount, duration)
+                    if products:
+                        self.entries[(credit_type, finance.to_minor(amount), duration)] = self._entry(
+                            products, amount, duration
+                        )
+
+    @staticmethod
+    def _entry(products: List, amount: int, duration: int) -> BestOffersEntry:
+        tables = tuple(finance.product_table(product) for product in products)
+        factors = np.array([table.factor(duration) for table in tables])
+        max_ratios = np.array([max_debt_ratio(product) for product in products], dtype=np.float64)
+        payments = finance.round_minor(finance.to_minor(amount) * factors)
+        ranking = tuple(sorted(range(len(products)), key=lambda position: (payments[position], position)))
+        return BestOffersEntry(amount, duration, tuple(products), tables, factors, max_ratios, payments, ranking)
+
+    def type_entries(self, credit_type: str) -> Dict[Tuple[str, int, int], BestOffersEntry]:
+        return {key: entry for key, entry in self.entries.items() if key[0] == credit_type}
+
+    def lookup(self, credit_type: str, amount: float, duration: int) -> Optional[BestOffersEntry]:
+        """Entrée précalculée si la recherche tombe exactement sur un point représentatif"""
+        return self.entries.get((normalize_credit_type(credit_type), finance.to_minor(amount), duration))
+
+    def bucket(self, credit_type: str, amount: float, duration: int) -> Optional[BestOffersEntry]:
+        """Entrée de la tranche contenant le montant et la durée (affichage indicatif)"""
+        amount_position = bisect_right(BEST_OFFER_AMOUNTS, amount) - 1
+        duration_position = bisect_right(BEST_OFFER_DURATIONS, duration) - 1
+        if amount_position < 0 or duration_position < 0:
+            return None
+        return self.lookup(credit_type, BEST_OFFER_AMOUNTS[amount_position], BEST_OFFER_DURATIONS[duration_position])
+
+
+def normalize_credit_type(credit_type: Optional[str]) -> str:
+    """Clé de type de crédit : minuscules, sans espaces superflus"""
+    return (credit_type or "").strip().lower()
+
+
+def max_debt_ratio(credit_product) -> float:
+    """Taux d'endettement maximum accepté par le produit (33% par défaut)"""
+    if credit_product.eligibility_criteria and isinstance(credit_product.eligibility_criteria, dict):
+        return credit_product.eligibility_criteria.get("max_debt_ratio", 33)
+    return 33
+
+
+class CatalogSnapshot(NamedTuple):
+    """Catalogue complet à une version donnée (ne jamais modifier en place)"""
+    version: int
+    loaded_at: float
+    # Empreinte du contenu : identique d'un worker à l'autre pour un même catalogue
+    fingerprint: str
+    banks: Dict[str, BankRecord]
+    credit_products: Dict[str, CreditProductRecord]
+    savings_products: Dict[str, SavingsProductRecord]
+    insurance_companies: Dict[str, InsuranceCompanyRecord]
+    insurance_products: Dict[str, InsuranceProductRecord]
+    # Produits actifs d'établissements actifs, dans l'ordre de chargement
+    active_credit_products: Tuple[CreditProductRecord, ...]
+    active_savings_products: Tuple[SavingsProductRecord, ...]
+    active_insurance_products: Tuple[InsuranceProductRecord, ...]
+    credit_index: CreditProductIndex
+    # Construite après les tables de facteurs d'annuité (voir get_snapshot)
+    best_offers: Optional[BestOffersTable] = None
+    # Règles de tarification assurance compilées (voir get_snapshot)
+    insurance_rating: Optional[rating.RatingEngine] = None
+
+
+_version = 0
+_snapshot: Optional[CatalogSnapshot] = None
+_lock = threading.Lock()
+
+
+def _to_record(record_type, obj, **relations):
+    values = {field: getattr(obj, field, None) for field in record_type._fields if field not in relations}
+    return record_type(**values, **relations)
+
+
+def _load(version: int) -> CatalogSnapshot:
+    db = SessionLocal()
+    try:
+        banks = {
+            bank.id: _to_record(BankRecord, bank)
+            for bank in db.query(models.Bank).all()
+        }
+        companies = {
+            company.id: _to_record(InsuranceCompanyRecord, company)
+            for company in db.query(models.InsuranceCompany).all()
+        }
+        credit_products = {
+            product.id: _to_record(CreditProductRecord, product, bank=banks.get(product.bank_id))
+            for product in db.query(models.CreditProduct).all()
+        }
+        savings_products = {
+            product.id: _to_record(SavingsProductRecord, product, bank=banks.get(product.bank_id))
+            for product in db.query(models.SavingsProduct).all()
+        }
+        insurance_products = {
+            product.id: _to_record(
+                InsuranceProductRecord, product,
+                insurance_company=companies.get(product.insurance_company_id)
+            )
+            for product in db.query(models.InsuranceProduct).all()
+        }
+    finally:
+        db.close()
+
+    def is_listed(product, parent) -> bool:
+        return bool(product.is_active) and parent is not None and bool(parent.is_active)
+
+    active_credit_products = tuple(p for p in credit_products.values() if is_listed(p, p.bank))
+
+    digest = hashlib.sha1()
+    for records in (banks, companies, credit_products, savings_products, insurance_products):
+        for key in sorted(records):
+            digest.update(repr(records[key]).encode())
+
+    return CatalogSnapshot(
+        version=version,
+        loaded_at=time.monotonic(),
+        fingerprint=digest.hexdigest()[:20],
+        banks=banks,
+        credit_products=credit_products,
+        savings_products=savings_products,
+        insurance_companies=companies,
+        insurance_products=insurance_products,
+        active_credit_products=active_credit_products,
+        active_savings_products=tuple(p for p in savings_products.values() if is_listed(p, p.bank)),
+        active_insurance_products=tuple(
+            p for p in insurance_products.values() if is_listed(p, p.insurance_company)
+        ),
+        credit_index=CreditProductIndex(active_credit_products),
+    )
+
+
+def _is_fresh(snapshot: Optional[CatalogSnapshot]) -> bool:
+    return (
+        snapshot is not None
+        and snapshot.version == _version
+        and time.monotonic() - snapshot.loaded_at < CATALOG_MAX_AGE_SECONDS
+    )
+
+
+def get_snapshot() -> CatalogSnapshot:
+    """Instantané courant ; reconstruit (une seule fois par worker) après invalidation"""
+    global _snapshot
+    snapshot = _snapshot
+    if _is_fresh(snapshot):
+        return snapshot
+
+    with _lock:
+        if _is_fresh(_snapshot):
+            return _snapshot
+        snapshot = _load(_version)
+        # Tables de facteurs d'annuité : seules celles des produits modifiés sont reconstruites
+        finance.build_product_tables(snapshot.active_credit_products)
+        # Meilleures offres : seuls les types modifiés depuis l'instantané précédent sont recalculés
+        previous = _snapshot.best_offers if _snapshot is not None else None
+        snapshot = snapshot._replace(best_offers=BestOffersTable(snapshot.credit_index, previous))
+        # Tarification assurance : seuls les produits modifiés sont recompilés
+        previous_rating = _snapshot.insurance_rating if _snapshot is not None else None
+        snapshot = snapshot._replace(
+            insurance_rating=rating.RatingEngine(snapshot.active_insurance_products, previous_rating)
+        )
+        # Remplacement atomique : les requêtes en cours gardent l'ancienne référence
+        _snapshot = snapshot
+        return snapshot
+
+
+def catalog_version() -> int:
+    """Version courante du catalogue (incrémentée à chaque écriture)"""
+    return _version
+
+
+def catalog_etag(path: str, query: str = "") -> str:
+    """
+    ETag fort d'une représentation du catalogue : empreinte de l'instantané
+    courant (reconstruit à chaque changement de version) et URL demandée.
+    """
+    representation = hashlib.sha1(f"{path}?{query}".encode()).hexdigest()[:12]
+    return f'"{get_snapshot().fingerprint}-{representation}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Évalue un en-tête If-None-Match (liste, « * », préfixe W/ ignoré)"""
+    if not if_none_match:
+        return False
+    candidates = {candidate.strip().removeprefix("W/") for candidate in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+def invalidate() -> int:
+    """Incrémente la version : l'instantané sera reconstruit à la prochaine lecture"""
+    global _version
+    with _lock:
+        _version += 1
+        return _version
+
+
+# ==================== INVALIDATION PAR LES ÉCRITURES ====================
+
+def _track_catalog_writes(session, flush_context):
+    """Repère les écritures sur le catalogue pendant le flush"""
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, CATALOG_MODELS):
+            session.info["catalog_changed"] = True
+            return
+
+
+def _invalidate_after_commit(session):
+    if session.info.pop("catalog_changed", False):
+        invalidate()
+
+
+def _forget_after_rollback(session, previous_transaction):
+    session.info.pop("catalog_changed", None)
+
+
+event.listen(Session, "after_flush", _track_catalog_writes)
+event.listen(Session, "after_commit", _invalidate_after_commit)
+event.listen(Session, "after_soft_rollback", _forget_after_rollback)
@@ -0,0 +1,122 @@
+# finance/__init__.py - Noyau de calcul financier partagé par les routers
+from finance.annuity import (
+    ANNUITY_CACHE_SIZE,
+    annuity_factor,
+    annuity_factors,
+    monthly_payment,
+    monthly_payments,
+    present_value,
+    borrowing_capacity,
+    borrowing_capacities,
+    annuity_cache_info,
+)
+from finance.amortization import (
+    amortization_columns,
+    schedule_rows,
+    amortization_schedule,
+    iter_schedule_chunks,
+)
+from finance.savings import (
+    COMPOUNDING_PERIODS,
+    periods_per_year,
+    effective_annual_rate,
+    balance_coefficients,
+    required_monthly_contributions,
+    months_to_target,
+    savings_projection,
+    breakdown_columns,
+    breakdown_rows,
+)
+from finance.money import (
+    MINOR_UNITS,
+    BASIS_POINTS,
+    to_minor,
+    to_bp,
+    to_minor_array,
+    from_minor,
+    bp_to_percent,
+    round_minor,
+    payment_minor,
+    payments_minor,
+    ratio_percent,
+)
+from finance.product_tables import (
+    RATE_KINDS,
+    ProductAnnuityTable,
+    rebuild_product_table,
+    drop_product_table,
+    build_product_tables,
+    product_table,
+    product_monthly_payment,
+    product_tables_info,
+)
+from finance.storage import (
+    SCHEDULE_FORMAT_INLINE,
+    SCHEDULE_FORMAT_PARAMETERS,
+    SCHEDULE_FORMAT_VERSION,
+    credit_schedule_terms,
+    credit_schedule_parameters,
+    stored_credit_schedule,
+    credit_schedule,
+    iter_credit_schedule_chunks,
+    savings_schedule_parameters,
+    savings_breakdown,
+    credit_schedule_reproducible,
+    savings_breakdown_reproducible,
+)
+
+__all__ = [
+    "ANNUITY_CACHE_SIZE",
+    "annuity_factor",
+    "annuity_factors",
+    "monthly_payment",
+    "monthly_payments",
+    "present_value",
+    "borrowing_capacity",
+    "borrowing_capacities",
+    "annuity_cache_info",
+    "amortization_columns",
+    "schedule_rows",
+    "amortization_schedule",
+    "iter_schedule_chunks",
+    "COMPOUNDING_PERIODS",
+    "periods_per_year",
+    "effective_annual_rate",
+    "balance_coefficients",
+    "required_monthly_contributions",
+    "months_to_target",
+    "savings_projection",
+    "breakdown_columns",
+    "breakdown_rows",
+    "MINOR_UNITS",
+    "BASIS_POINTS",
+    "to_minor",
+    "to_bp",
+    "to_minor_array",
+    "from_minor",
+    "bp_to_percent",
+    "round_minor",
+    "payment_minor",
+    "payments_minor",
+    "ratio_percent",
+    "RATE_KINDS",
+    "ProductAnnuityTable",
+    "rebuild_product_table",
+    "drop_product_table",
+    "build_product_tables",
+    "product_table",
+    "product_monthly_payment",
+    "product_tables_info",
+    "SCHEDULE_FORMAT_INLINE",
+    "SCHEDULE_FORMAT_PARAMETERS",
+    "SCHEDULE_FORMAT_VERSION",
+    "credit_schedule_terms",
+    "credit_schedule_parameters",
+    "stored_credit_schedule",
+    "credit_schedule",
+    "iter_credit_schedule_chunks",
+    "savings_schedule_parameters",
+    "savings_breakdown",
+    "credit_schedule_reproducible",
+    "savings_breakdown_reproducible",
+]
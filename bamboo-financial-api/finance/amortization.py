@@ -0,0 +1,116 @@
+# finance/amortization.py - Noyau vectorisé des tableaux d'amortissement
+import numpy as np
+from typing import Any, Dict, Iterator, List, Optional
+
+from finance.annuity import monthly_payment
+
+
+def amortization_columns(
+    principal: float,
+    annual_rate: float,
+    months: int,
+    payment: Optional[float] = None,
+    first_month: int = 1,
+    last_month: Optional[int] = None
+) -> Dict[str, np.ndarray]:
+    """
+    Calcule les colonnes du tableau d'amortissement sous forme de tableaux NumPy.
+
+    Le capital restant dû après k échéances est obtenu en forme fermée :
+    B_k = P(1+r)^k - M((1+r)^k - 1)/r, ce qui évite toute boucle mois par mois.
+    Seuls les mois first_month..last_month (inclus, base 1) sont calculés.
+    La dernière échéance absorbe l'écart d'arrondi de la mensualité : le
+    capital restant dû termine exactement à 0.
+    """
+    if payment is None:
+        payment = monthly_payment(principal, annual_rate, months)
+
+    if last_month is None or last_month > months:
+        last_month = months
+    first_month = max(1, first_month)
+
+    month = np.arange(first_month, last_month + 1, dtype=np.int64)
+    elapsed = month - 1
+    monthly_rate = annual_rate / 100 / 12
+
+    if monthly_rate == 0:
+        previous_balance = principal - payment * elapsed
+    else:
+        growth = np.power(1 + monthly_rate, elapsed)
+        previous_balance = principal * growth - payment * (growth - 1) / monthly_rate
+
+    interest = previous_balance * monthly_rate
+    payments = np.full(month.shape, payment, dtype=np.float64)
+    principal_part = payments - interest
+    balance = previous_balance - principal_part
+
+    if month.size and last_month == months:
+        principal_part[-1] = previous_balance[-1]
+        payments[-1] = previous_balance[-1] + interest[-1]
+        balance[-1] = 0.0
+
+    return {
+        "month": month,
+        "payment": payments,
+        "principal": principal_part,
+        "interest": interest,
+        "remaining_balance": balance
+    }
+
+
+def schedule_rows(
+    columns: Dict[str, np.ndarray],
+    payment_key: Optional[str] = "payment"
+) -> List[Dict[str, Any]]:
+    """Convertit les colonnes en lignes JSON (arrondi unique par colonne)"""
+    months = columns["month"].tolist()
+    principal = np.round(columns["principal"], 2).tolist()
+    interest = np.round(columns["interest"], 2).tolist()
+    balance = np.round(columns["remaining_balance"], 2).tolist()
+
+    if payment_key is None:
+        return [
+            {"month": m, "principal": p, "interest": i, "remaining_balance": b}
+            for m, p, i, b in zip(months, principal, interest, balance)
+        ]
+
+    payment = np.round(columns["payment"], 2).tolist()
+    return [
+        {"month": m, payment_key: pay, "principal": p, "interest": i, "remaining_balance": b}
+        for m, pay, p, i, b in zip(months, payment, principal, interest, balance)
+    ]
+
+
+def amortization_schedule(
+    principal: float,
+    annual_rate: float,
+    months: int,
+    payment: Optional[float] = None,
+    first_month: int = 1,
+    last_month: Optional[int] = None,
+    payment_key: Optional[str] = "payment"
+) -> List[Dict[str, Any]]:
+    """Génère le tableau d'amortissement sérialisable (mois first_month..last_month)"""
+    columns = amortization_columns(principal, annual_rate, months, payment, first_month, last_month)
+    return schedule_rows(columns, payment_key)
+
+
+def iter_schedule_chunks(
+    principal: float,
+    annual_rate: float,
+    months: int,
+    payment: Optional[float] = None,
+    first_month: int = 1,
+    last_month: Optional[int] = None,
+    chunk_size: int = 120,
+    payment_key: Optional[str] = "payment"
+) -> Iterator[List[Dict[str, Any]]]:
+    """Génère le tableau par blocs de chunk_size mois (mémoire constante par requête)"""
+    if payment is None:
+        payment = monthly_payment(principal, annual_rate, months)
+    if last_month is None or last_month > months:
+        last_month = months
+
+    for start in range(max(1, first_month), last_month + 1, chunk_size):
+        end = min(start + chunk_size - 1, last_month)
+        yield amortization_schedule(principal, annual_rate, months, payment, start, end, payment_key)
@@ -0,0 +1,88 @@
+# finance/annuity.py - Facteurs d'annuité mémorisés (mensualité, valeur actuelle, capacité)
+import numpy as np
+from functools import lru_cache
+
+# Le catalogue ne compte que quelques centaines de couples (taux, durée) distincts
+ANNUITY_CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=ANNUITY_CACHE_SIZE)
+def _annuity_factor(annual_rate: float, months: int) -> float:
+    monthly_rate = annual_rate / 100 / 12
+    if monthly_rate == 0:
+        return 1 / months
+
+    # (1+r)^n n'est calculé qu'une seule fois
+    growth = (1 + monthly_rate) ** months
+    return monthly_rate * growth / (growth - 1)
+
+
+def annuity_factor(annual_rate: float, months: int) -> float:
+    """
+    Facteur d'annuité r(1+r)^n/((1+r)^n-1) : mensualité pour 1 FCFA emprunté.
+
+    Le taux est normalisé (float arrondi) pour que Decimal et float
+    partagent la même entrée du cache LRU.
+    """
+    return _annuity_factor(round(float(annual_rate), 6), int(months))
+
+
+def annuity_factors(annual_rate, months) -> np.ndarray:
+    """Facteurs d'annuité vectorisés (arguments diffusables NumPy)"""
+    monthly_rate = np.asarray(annual_rate, dtype=np.float64) / 100 / 12
+    months = np.asarray(months, dtype=np.float64)
+
+    growth = np.power(1 + monthly_rate, months)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(
+            monthly_rate == 0,
+            1 / months,
+            monthly_rate * growth / (growth - 1)
+        )
+
+
+def monthly_payments(principal, annual_rate, months) -> np.ndarray:
+    """Mensualités de plusieurs prêts en une passe (arguments diffusables NumPy)"""
+    return np.asarray(principal, dtype=np.float64) * annuity_factors(annual_rate, months)
+
+
+def monthly_payment(principal: float, annual_rate: float, months: int) -> float:
+    """Calcule la mensualité constante d'un prêt amortissable"""
+    if months <= 0:
+        return 0.0
+    return principal * annuity_factor(annual_rate, months)
+
+
+def present_value(payment: float, annual_rate: float, months: int) -> float:
+    """Capital remboursable par une mensualité donnée (valeur actuelle)"""
+    if months <= 0:
+        return 0.0
+    return payment / annuity_factor(annual_rate, months)
+
+
+def borrowing_capacity(
+    monthly_budget: float,
+    annual_rate: float,
+    months: int,
+    insurance_rate: float = 0
+) -> float:
+    """
+    Capital maximum finançable avec un budget mensuel, assurance comprise.
+
+    Mensualité et assurance (insurance_rate % du capital par an) sont toutes
+    deux linéaires en capital : budget = C * (a + t/1200), d'où C en forme fermée.
+    """
+    if months <= 0 or monthly_budget <= 0:
+        return 0.0
+    return monthly_budget / (annuity_factor(annual_rate, months) + insurance_rate / 100 / 12)
+
+
+def borrowing_capacities(monthly_budget, annual_rate, months, insurance_rate=0) -> np.ndarray:
+    """Capacités d'emprunt vectorisées (par exemple pour toutes les durées d'une courbe)"""
+    budget = np.maximum(np.asarray(monthly_budget, dtype=np.float64), 0.0)
+    return budget / (annuity_factors(annual_rate, months) + np.asarray(insurance_rate, dtype=np.float64) / 100 / 12)
+
+
+def annuity_cache_info():
+    """Statistiques du cache des facteurs d'annuité (hits, misses, taille)"""
+    return _annuity_factor.cache_info()
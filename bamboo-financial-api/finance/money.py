@@ -0,0 +1,79 @@
+# finance/money.py - Couche monétaire en virgule fixe (centimes FCFA entiers, taux en points de base)
+import numpy as np
+from decimal import Decimal, ROUND_HALF_EVEN
+from typing import Union
+
+from finance.annuity import annuity_factor, annuity_factors
+
+# Unités mineures par FCFA (les colonnes monétaires sont en DECIMAL(x, 2))
+MINOR_UNITS = 100
+# Points de base par point de pourcentage (7,50 % -> 750 pb)
+BASIS_POINTS = 100
+
+Number = Union[int, float, Decimal, str]
+
+
+def _to_scaled_int(value: Number, scale: int) -> int:
+    # Passage par Decimal : 0.1 + 0.2 ou un DECIMAL(12, 2) donnent le même entier partout
+    if value is None:
+        return 0
+    if isinstance(value, int):
+        return value * scale
+    if isinstance(value, float):
+        value = repr(value)
+    return int((Decimal(value) * scale).to_integral_value(rounding=ROUND_HALF_EVEN))
+
+
+def to_minor(amount: Number) -> int:
+    """Montant FCFA -> centimes entiers"""
+    return _to_scaled_int(amount, MINOR_UNITS)
+
+
+def to_bp(rate: Number) -> int:
+    """Taux en % -> points de base entiers"""
+    return _to_scaled_int(rate, BASIS_POINTS)
+
+
+def to_minor_array(amounts) -> np.ndarray:
+    """Montants FCFA (float) -> centimes int64, arrondi demi-pair déterministe"""
+    return np.rint(np.asarray(amounts, dtype=np.float64) * MINOR_UNITS).astype(np.int64)
+
+
+def from_minor(minor):
+    """Centimes -> FCFA pour la sortie JSON (scalaire ou tableau)"""
+    if isinstance(minor, np.ndarray):
+        return minor / MINOR_UNITS
+    return int(minor) / MINOR_UNITS
+
+
+def bp_to_percent(bp):
+    """Points de base -> taux en %"""
+    if isinstance(bp, np.ndarray):
+        return bp / BASIS_POINTS
+    return int(bp) / BASIS_POINTS
+
+
+def round_minor(values):
+    """Arrondi unique d'un résultat flottant vers les centimes (demi-pair)"""
+    rounded = np.rint(values)
+    if isinstance(rounded, np.ndarray):
+        return rounded.astype(np.int64)
+    return int(rounded)
+
+
+def payment_minor(principal_minor: int, rate_bp: int, months: int) -> int:
+    """Mensualité en centimes : capital entier x facteur d'annuité, arrondi une fois"""
+    if months <= 0:
+        return 0
+    return round_minor(principal_minor * annuity_factor(bp_to_percent(rate_bp), months))
+
+
+def payments_minor(principal_minor, rate_bp, months) -> np.ndarray:
+    """Mensualités en centimes (arguments diffusables NumPy)"""
+    factors = annuity_factors(np.asarray(rate_bp, dtype=np.int64) / BASIS_POINTS, months)
+    return round_minor(np.asarray(principal_minor, dtype=np.int64) * factors)
+
+
+def ratio_percent(numerator_minor, denominator_minor):
+    """Rapport en % de deux montants entiers (taux d'endettement)"""
+    return np.asarray(numerator_minor, dtype=np.float64) * 100 / denominator_minor
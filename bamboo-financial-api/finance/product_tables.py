@@ -0,0 +1,152 @@
+# finance/product_tables.py - Tables de facteurs d'annuité précalculées par produit de crédit
+import threading
+import numpy as np
+from typing import Dict, Iterable, Tuple
+
+from finance.annuity import annuity_factor, annuity_factors
+from finance.money import bp_to_percent, round_minor, to_bp, to_minor
+
+# Taux tabulés pour chaque produit (ligne de la table)
+RATE_KINDS = ("average", "min", "max")
+
+
+class ProductAnnuityTable:
+    """
+    Conditions d'un produit en virgule fixe (montants en centimes, taux en pb)
+    et facteurs d'annuité pour chaque durée autorisée, aux taux moyen/min/max.
+    """
+
+    __slots__ = (
+        "product_id", "signature", "min_amount", "max_amount",
+        "min_duration", "max_duration", "rate_bp", "rates", "factors"
+    )
+
+    def __init__(
+        self,
+        product_id: str,
+        min_amount: int,
+        max_amount: int,
+        min_duration: int,
+        max_duration: int,
+        rate_bp: Dict[str, int],
+        signature: Tuple = ()
+    ):
+        self.product_id = product_id
+        self.min_amount = min_amount
+        self.max_amount = max_amount
+        self.min_duration = min_duration
+        self.max_duration = max_duration
+        self.rate_bp = rate_bp
+        self.rates = {kind: bp_to_percent(bp) for kind, bp in rate_bp.items()}
+        self.signature = signature
+
+        durations = np.arange(min_duration, max_duration + 1, dtype=np.float64)
+        rate_column = np.array([[self.rates[kind]] for kind in RATE_KINDS], dtype=np.float64)
+        # Matrice (3, nombre de durées) : une ligne par taux tabulé
+        self.factors = annuity_factors(rate_column, durations)
+
+    def factor(self, months: int, rate_kind: str = "average") -> float:
+        """Facteur pour une durée autorisée (repli sur le calcul mémorisé hors bornes)"""
+        if self.min_duration <= months <= self.max_duration:
+            return float(self.factors[RATE_KINDS.index(rate_kind), months - self.min_duration])
+        return annuity_factor(self.rates[rate_kind], months)
+
+    def factor_column(self, months, rate_kind: str = "average") -> np.ndarray:
+        """Facteurs pour plusieurs durées autorisées (lecture vectorisée)"""
+        return self.factors[RATE_KINDS.index(rate_kind), np.asarray(months) - self.min_duration]
+
+    def payment_minor(self, principal_minor: int, months: int, rate_kind: str = "average") -> int:
+        """Mensualité en centimes, arrondie une seule fois"""
+        if months <= 0:
+            return 0
+        return round_minor(principal_minor * self.factor(months, rate_kind))
+
+
+_tables: Dict[str, ProductAnnuityTable] = {}
+_lock = threading.Lock()
+
+
+def _signature_from(product) -> Tuple:
+    # Valeurs brutes des colonnes : comparaison sans conversion à chaque lecture
+    return (
+        product.min_amount, product.max_amount,
+        product.min_duration_months, product.max_duration_months,
+        product.average_rate, product.min_rate, product.max_rate
+    )
+
+
+def _product_terms(product) -> Tuple[int, int, int, int, Dict[str, int]]:
+    # Conversion DECIMAL -> entiers une seule fois par produit (et non à chaque accès)
+    average = to_bp(product.average_rate)
+    rate_bp = {
+        "average": average,
+        "min": to_bp(product.min_rate) if product.min_rate is not None else average,
+        "max": to_bp(product.max_rate) if product.max_rate is not None else average,
+    }
+    min_duration = max(1, int(product.min_duration_months or 1))
+    max_duration = max(min_duration, int(product.max_duration_months or min_duration))
+    return to_minor(product.min_amount), to_minor(product.max_amount), min_duration, max_duration, rate_bp
+
+
+def rebuild_product_table(product) -> ProductAnnuityTable:
+    """(Re)construit la table d'un produit, par exemple après modification par l'admin"""
+    table = ProductAnnuityTable(product.id, *_product_terms(product), _signature_from(product))
+    with _lock:
+        _tables[product.id] = table
+    return table
+
+
+def drop_product_table(product_id: str) -> None:
+    """Retire la table d'un produit supprimé ou désactivé"""
+    with _lock:
+        _tables.pop(product_id, None)
+
+
+def build_product_tables(products: Iterable) -> int:
+    """
+    Aligne les tables sur les produits actifs (chargement du catalogue) : seules
+    celles des produits nouveaux ou dont les conditions ont changé sont
+    reconstruites, celles des produits retirés supprimées. Renvoie le nombre de
+    tables reconstruites.
+    """
+    active = set()
+    rebuilt = 0
+    for product in products:
+        active.add(product.id)
+        table = _tables.get(product.id)
+        if table is None or table.signature != _signature_from(product):
+            rebuild_product_table(product)
+            rebuilt += 1
+
+    with _lock:
+        for product_id in [product_id for product_id in _tables if product_id not in active]:
+            del _tables[product_id]
+    return rebuilt
+
+
+def product_table(product) -> ProductAnnuityTable:
+    """
+    Table du produit ; reconstruite si absente ou si ses bornes/taux ne
+    correspondent plus (modification hors des routes d'administration).
+    """
+    table = _tables.get(product.id)
+    if table is not None and table.signature == _signature_from(product):
+        return table
+    return rebuild_product_table(product)
+
+
+def product_monthly_payment(product, principal: float, months: int, rate_kind: str = "average") -> float:
+    """Mensualité d'un produit : une lecture dans la table et une multiplication"""
+    if months <= 0:
+        return 0.0
+    return principal * product_table(product).factor(months, rate_kind)
+
+
+def product_tables_info() -> Dict[str, int]:
+    """Nombre de tables chargées et de facteurs précalculés"""
+    with _lock:
+        tables = list(_tables.values())
+    return {
+        "products": len(tables),
+        "factors": int(sum(table.factors.size for table in tables))
+    }
@@ -0,0 +1,210 @@
+# finance/savings.py - Projection d'épargne en forme fermée (versements mensuels)
+import numpy as np
+from typing import Any, Dict, List, Optional
+
+# Nombre de capitalisations par an selon la fréquence du produit
+COMPOUNDING_PERIODS = {
+    "daily": 365,
+    "weekly": 52,
+    "monthly": 12,
+    "quarterly": 4,
+    "semi_annually": 2,
+    "annually": 1,
+}
+
+
+def periods_per_year(compounding_frequency: Optional[str]) -> int:
+    """Retourne le nombre de capitalisations annuelles (mensuel par défaut)"""
+    return COMPOUNDING_PERIODS.get((compounding_frequency or "monthly").lower(), 12)
+
+
+def effective_annual_rate(annual_rate: float, compounding_frequency: Optional[str] = "monthly") -> float:
+    """Taux actuariel annuel (%) correspondant au taux nominal et à la fréquence"""
+    n = periods_per_year(compounding_frequency)
+    return ((1 + annual_rate / 100 / n) ** n - 1) * 100
+
+
+def _balance_after(
+    months,
+    initial_amount: float,
+    monthly_contribution: float,
+    annual_rate: float,
+    compounding_frequency: Optional[str]
+):
+    """
+    Solde après `months` mois (scalaire ou tableau NumPy).
+
+    Les versements sont effectués en fin de mois. Pour une capitalisation au
+    moins mensuelle, on utilise le facteur mensuel équivalent g = (1+r/n)^(n/12).
+    Pour une capitalisation trimestrielle/annuelle, les intérêts ne sont crédités
+    qu'en fin de période ; les versements de la période y portent un intérêt
+    simple au prorata, et rien n'est crédité sur une période incomplète.
+    """
+    months = np.asarray(months)
+    rate = annual_rate / 100
+
+    if rate == 0:
+        return initial_amount + monthly_contribution * months
+
+    n = periods_per_year(compounding_frequency)
+
+    if n >= 12:
+        growth = (1 + rate / n) ** (n / 12)
+        factor = np.power(growth, months)
+        return initial_amount * factor + monthly_contribution * (factor - 1) / (growth - 1)
+
+    months_per_period = 12 // n
+    period_rate = rate / n
+    full_periods = months // months_per_period
+    remaining_months = months % months_per_period
+
+    contribution_per_period = monthly_contribution * (
+        months_per_period + rate / 12 * months_per_period * (months_per_period - 1) / 2
+    )
+    factor = np.power(1 + period_rate, full_periods)
+    credited = initial_amount * factor + contribution_per_period * (factor - 1) / period_rate
+    return credited + monthly_contribution * remaining_months
+
+
+def balance_coefficients(months, annual_rates, periods):
+    """
+    Coefficients (A, B) du solde de plusieurs produits à la fois :
+    solde = dépôt initial x A + versement mensuel x B.
+
+    Tableaux NumPy diffusables entre eux (ex. taux (p, 1) et mois (m,)) ; mêmes
+    conventions que _balance_after, y compris la capitalisation trimestrielle.
+    """
+    months = np.asarray(months)
+    rate = np.asarray(annual_rates, dtype=np.float64) / 100
+    n = np.asarray(periods)
+    zero_rate = rate == 0
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Capitalisation au moins mensuelle : facteur mensuel équivalent
+        growth = (1 + rate / n) ** (n / 12)
+        monthly_a = np.power(growth, months)
+        monthly_b = (monthly_a - 1) / (growth - 1)
+
+        # Capitalisation par période : intérêt simple au prorata des versements de la période
+        months_per_period = np.maximum(12 // n, 1)
+        period_rate = rate / n
+        period_a = np.power(1 + period_rate, months // months_per_period)
+        period_b = (
+            (months_per_period + rate / 12 * months_per_period * (months_per_period - 1) / 2)
+            * (period_a - 1) / period_rate
+            + months % months_per_period
+        )
+
+    a = np.where(n >= 12, monthly_a, period_a)
+    b = np.where(n >= 12, monthly_b, period_b)
+    return np.where(zero_rate, 1.0, a), np.where(zero_rate, months, b)
+
+
+def required_monthly_contributions(target_amount: float, initial_amount: float, duration_months: int, annual_rates, periods):
+    """Versement mensuel minimal atteignant l'objectif en duration_months, par produit (forme fermée)"""
+    a, b = balance_coefficients(duration_months, annual_rates, periods)
+    return np.maximum((target_amount - initial_amount * a) / b, 0.0)
+
+
+def months_to_target(target_amount: float, initial_amount: float, monthly_contribution: float, annual_rates, periods, max_months: int):
+    """
+    Premier mois où le solde atteint l'objectif, par produit (-1 si hors horizon).
+    Le solde croît avec la durée (par paliers en capitalisation trimestrielle) :
+    recherche dichotomique vectorisée, O(log max_months) évaluations par produit.
+    """
+    rates = np.asarray(annual_rates, dtype=np.float64)
+    periods = np.asarray(periods)
+
+    def reached(months):
+        a, b = balance_coefficients(months, rates, periods)
+        return initial_amount * a + monthly_contribution * b >= target_amount
+
+    # Le premier mois atteint reste dans [low, high]
+    low = np.zeros(rates.shape, dtype=np.int64)
+    high = np.full(rates.shape, max_months, dtype=np.int64)
+    reachable = reached(high)
+    while np.any(low < high):
+        middle = (low + high) // 2
+        done = reached(middle)
+        high = np.where(done, middle, high)
+        low = np.where(done, low, middle + 1)
+    return np.where(reachable, low, -1)
+
+
+def savings_projection(
+    initial_amount: float,
+    monthly_contribution: float,
+    annual_rate: float,
+    duration_months: int,
+    compounding_frequency: Optional[str] = "monthly",
+    include_breakdown: bool = False
+) -> Dict[str, Any]:
+    """
+    Calcule la projection d'épargne en O(1) ; le détail mensuel n'est
+    produit (vectorisé) que si include_breakdown est demandé.
+    """
+    final_amount = float(_balance_after(
+        duration_months, initial_amount, monthly_contribution, annual_rate, compounding_frequency
+    ))
+    total_contributions = initial_amount + monthly_contribution * duration_months
+    total_interest = final_amount - total_contributions
+
+    # Rendement annualisé de l'épargne (même définition que le simulateur historique)
+    if duration_months > 0 and total_contributions > 0:
+        years = duration_months / 12
+        effective_rate = ((final_amount / total_contributions) ** (1 / years) - 1) * 100
+    else:
+        effective_rate = 0
+
+    result = {
+        "final_amount": final_amount,
+        "total_contributions": total_contributions,
+        "total_interest": total_interest,
+        "effective_rate": effective_rate,
+        "monthly_breakdown": None
+    }
+
+    if include_breakdown:
+        result["monthly_breakdown"] = breakdown_columns(
+            initial_amount, monthly_contribution, annual_rate, duration_months, compounding_frequency
+        )
+
+    return result
+
+
+def breakdown_columns(
+    initial_amount: float,
+    monthly_contribution: float,
+    annual_rate: float,
+    duration_months: int,
+    compounding_frequency: Optional[str] = "monthly"
+) -> Dict[str, np.ndarray]:
+    """Colonnes mois / versement / intérêts / solde du détail mensuel"""
+    month = np.arange(0, duration_months + 1, dtype=np.int64)
+    balance = _balance_after(
+        month, initial_amount, monthly_contribution, annual_rate, compounding_frequency
+    ).astype(np.float64)
+    interest = np.diff(balance) - monthly_contribution
+
+    return {
+        "month": month[1:],
+        "contribution": np.full(duration_months, monthly_contribution, dtype=np.float64),
+        "interest": interest,
+        "balance": balance[1:]
+    }
+
+
+def breakdown_rows(
+    columns: Dict[str, np.ndarray],
+    balance_key: str = "balance"
+) -> List[Dict[str, Any]]:
+    """Convertit les colonnes du détail mensuel en lignes JSON"""
+    months = columns["month"].tolist()
+    contribution = columns["contribution"].tolist()
+    interest = np.round(columns["interest"], 2).tolist()
+    balance = np.round(columns["balance"], 2).tolist()
+
+    return [
+        {"month": m, "contribution": c, "interest": i, balance_key: b}
+        for m, c, i, b in zip(months, contribution, interest, balance)
+    ]
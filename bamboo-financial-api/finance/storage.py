@@ -0,0 +1,164 @@
+# finance/storage.py - Stockage des simulations par paramètres et régénération à la lecture
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from finance.amortization import amortization_schedule, iter_schedule_chunks
+from finance.money import bp_to_percent, from_minor, to_bp, to_minor
+from finance.savings import breakdown_rows, savings_projection
+
+# Versions du format de stockage des tableaux (colonne schedule_format)
+SCHEDULE_FORMAT_INLINE = 0      # tableau JSON complet stocké dans la ligne (historique)
+SCHEDULE_FORMAT_PARAMETERS = 1  # seuls les paramètres sont stockés, le tableau est recalculé
+SCHEDULE_FORMAT_VERSION = SCHEDULE_FORMAT_PARAMETERS
+
+# Écart maximal (FCFA) toléré entre tableau stocké et recalculé avant compactage
+COMPACTION_TOLERANCE = 1.0
+
+
+def credit_schedule_terms(
+    requested_amount,
+    down_payment,
+    applied_rate,
+    months: int,
+    payment
+) -> Tuple[float, float, int, float]:
+    """
+    Paramètres normalisés du noyau (capital, taux, durée, mensualité).
+
+    Passage par les centimes et points de base : la requête (float) et la ligne
+    stockée (DECIMAL) donnent exactement les mêmes arguments, donc le même tableau.
+    """
+    principal = from_minor(to_minor(requested_amount) - to_minor(down_payment or 0))
+    return principal, bp_to_percent(to_bp(applied_rate)), int(months), from_minor(to_minor(payment))
+
+
+def credit_schedule_parameters(simulation) -> Tuple[float, float, int, float]:
+    """Paramètres du tableau d'une simulation, avec la mensualité enregistrée"""
+    return credit_schedule_terms(
+        simulation.requested_amount,
+        simulation.down_payment,
+        simulation.applied_rate,
+        simulation.duration_months,
+        simulation.monthly_payment
+    )
+
+
+def stored_credit_schedule(simulation) -> Optional[List[Dict[str, Any]]]:
+    """
+    Tableau complet stocké dans la ligne (format historique), sinon None. Il est
+    servi tel quel, même s'il n'est pas reproductible (ligne non compactée).
+    """
+    if simulation.schedule_format != SCHEDULE_FORMAT_INLINE:
+        return None
+    stored = simulation.amortization_schedule
+    if not stored or len(stored) < simulation.duration_months:
+        return None
+    return stored
+
+
+def credit_schedule(
+    simulation,
+    first_month: int = 1,
+    last_month: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """Tableau d'amortissement d'une simulation : stocké (format historique) ou recalculé"""
+    stored = stored_credit_schedule(simulation)
+    if stored is not None:
+        end = simulation.duration_months if last_month is None else min(last_month, simulation.duration_months)
+        return stored[first_month - 1:end]
+
+    principal, annual_rate, months, payment = credit_schedule_parameters(simulation)
+    return amortization_schedule(principal, annual_rate, months, payment, first_month, last_month)
+
+
+def iter_credit_schedule_chunks(
+    simulation,
+    first_month: int,
+    last_month: int,
+    chunk_size: int
+) -> Iterator[List[Dict[str, Any]]]:
+    """Tableau d'une simulation par blocs (mois first_month..last_month), stocké ou recalculé"""
+    stored = stored_credit_schedule(simulation)
+    if stored is not None:
+        for start in range(first_month, last_month + 1, chunk_size):
+            yield stored[start - 1:min(start + chunk_size - 1, last_month)]
+        return
+
+    principal, annual_rate, months, payment = credit_schedule_parameters(simulation)
+    yield from iter_schedule_chunks(principal, annual_rate, months, payment, first_month, last_month, chunk_size)
+
+
+def savings_schedule_parameters(simulation) -> Tuple[float, float, float, int, str]:
+    """
+    Paramètres (versement initial, mensualité, taux, durée, capitalisation) d'une épargne.
+
+    Les lignes antérieures au stockage par paramètres n'ont ni taux ni fréquence :
+    on retombe alors sur ceux du produit associé.
+    """
+    rate = simulation.interest_rate
+    frequency = simulation.compounding_frequency
+    product = simulation.savings_product if rate is None or frequency is None else None
+
+    if rate is None:
+        rate = product.interest_rate if product else 0
+    if frequency is None:
+        frequency = (product.compounding_frequency if product else None) or "monthly"
+
+    return (
+        float(simulation.initial_amount),
+        float(simulation.monthly_contribution or 0),
+        float(rate),
+        simulation.duration_months,
+        frequency
+    )
+
+
+def savings_breakdown(simulation) -> List[Dict[str, Any]]:
+    """Détail mensuel d'une simulation d'épargne : stocké (format historique) ou recalculé"""
+    stored = simulation.monthly_breakdown
+    if stored:
+        return stored
+
+    initial, contribution, rate, months, frequency = savings_schedule_parameters(simulation)
+    projection = savings_projection(initial, contribution, rate, months, frequency, include_breakdown=True)
+    return breakdown_rows(projection["monthly_breakdown"])
+
+
+def _rows_match(stored: List[Dict[str, Any]], regenerated: List[Dict[str, Any]], keys: Tuple[str, ...]) -> bool:
+    if len(stored) != len(regenerated):
+        return False
+    for old, new in zip(stored, regenerated):
+        for key in keys:
+            if abs(float(old.get(key) or 0) - float(new[key])) > COMPACTION_TOLERANCE:
+                return False
+    return True
+
+
+def credit_schedule_reproducible(simulation) -> bool:
+    """Vérifie que le tableau stocké est reproduit par le noyau (condition de compactage)"""
+    stored = simulation.amortization_schedule
+    if not stored:
+        return True
+    principal, annual_rate, months, payment = credit_schedule_parameters(simulation)
+    if len(stored) > months:
+        return False
+
+    # Certains endpoints ne stockaient qu'un aperçu : on compare le préfixe correspondant
+    regenerated = amortization_schedule(principal, annual_rate, months, payment, last_month=len(stored))
+    return _rows_match(stored, regenerated, ("month", "principal", "interest", "remaining_balance"))
+
+
+def savings_breakdown_reproducible(simulation) -> bool:
+    """Vérifie que le détail mensuel stocké est reproduit par le noyau"""
+    stored = simulation.monthly_breakdown
+    if not stored:
+        return True
+    initial, contribution, rate, months, frequency = savings_schedule_parameters(simulation)
+    projection = savings_projection(initial, contribution, rate, months, frequency, include_breakdown=True)
+    regenerated = breakdown_rows(projection["monthly_breakdown"])
+
+    # Les anciennes lignes nomment le solde 'balance' ou 'cumulative_amount'
+    normalized = [
+        {**row, "balance": row.get("balance", row.get("cumulative_amount"))}
+        for row in stored
+    ]
+    return _rows_match(normalized, regenerated, ("month", "interest", "balance"))
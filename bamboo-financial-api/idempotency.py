@@ -0,0 +1,179 @@
+# idempotency.py - Rejeu des POST de simulation / demande portant un en-tête Idempotency-Key
+import asyncio
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from fastapi import Request, status
+from fastapi.responses import JSONResponse, Response
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+# Durée de conservation d'une réponse et nombre maximal de clés conservées (LRU)
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+IDEMPOTENCY_MAX_KEYS = int(os.getenv("IDEMPOTENCY_MAX_KEYS", "2000"))
+MAX_KEY_LENGTH = 255
+
+# En-têtes recalculés à l'envoi : non mémorisés
+SKIPPED_HEADERS = {"content-length", "date", "server"}
+
+
+# (route, empreinte du client, clé) : une même clé envoyée par deux clients reste distincte
+ScopeKey = Tuple[str, str, str]
+
+
+class StoredResponse(NamedTuple):
+    expires_at: float
+    fingerprint: str
+    status_code: int
+    headers: Tuple[Tuple[str, str], ...]
+    body: bytes
+
+
+class IdempotencyStore:
+    """Réponses par (route, clé), bornées en nombre et en durée ; une exécution par clé"""
+
+    def __init__(self, ttl: float, max_keys: int):
+        self.ttl = ttl
+        self.max_keys = max_keys
+        self.responses: "OrderedDict[ScopeKey, StoredResponse]" = OrderedDict()
+        self.in_flight: Dict[ScopeKey, Tuple[str, asyncio.Future]] = {}
+        self.replayed = 0
+        self.waited = 0
+
+    def get(self, scope_key: ScopeKey) -> Optional[StoredResponse]:
+        stored = self.responses.get(scope_key)
+        if stored is None:
+            return None
+        if stored.expires_at <= time.monotonic():
+            del self.responses[scope_key]
+            return None
+        self.responses.move_to_end(scope_key)
+        return stored
+
+    def put(self, scope_key: ScopeKey, stored: StoredResponse) -> None:
+        self.responses[scope_key] = stored
+        self.responses.move_to_end(scope_key)
+        while len(self.responses) > self.max_keys:
+            self.responses.popitem(last=False)
+
+    def info(self) -> Dict[str, int]:
+        return {
+            "keys": len(self.responses),
+            "max_keys": self.max_keys,
+            "in_flight": len(self.in_flight),
+            "replayed": self.replayed,
+            "waited": self.waited
+        }
+
+
+_store = IdempotencyStore(IDEMPOTENCY_TTL_SECONDS, IDEMPOTENCY_MAX_KEYS)
+
+
+def _replay(stored: StoredResponse) -> Response:
+    response = Response(content=stored.body, status_code=stored.status_code)
+    for name, value in stored.headers:
+        response.headers.append(name, value)
+    response.headers["Idempotent-Replayed"] = "true"
+    return response
+
+
+def _error(detail: str, status_code: int) -> JSONResponse:
+    return JSONResponse(status_code=status_code, content={"detail": detail})
+
+
+def client_identity(request: Request) -> str:
+    """Empreinte du client : jeton Authorization s'il est présent, sinon IP et User-Agent"""
+    authorization = request.headers.get("authorization")
+    if authorization:
+        source = f"auth:{authorization}"
+    else:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            ip = forwarded.split(",")[0].strip()
+        else:
+            ip = request.client.host if request.client else "unknown"
+        source = f"ip:{ip}|{request.headers.get('user-agent', '')}"
+    return hashlib.sha256(source.encode()).hexdigest()
+
+
+async def handle_idempotent_request(request: Request, call_next) -> Response:
+    """
+    Exécute la requête une seule fois par clé : une répétition reçoit la réponse
+    mémorisée, un doublon simultané attend la fin de la première exécution.
+    """
+    key = request.headers.get(IDEMPOTENCY_HEADER, "").strip()
+    if not key or len(key) > MAX_KEY_LENGTH:
+        return _error(f"En-tête {IDEMPOTENCY_HEADER} invalide", status.HTTP_400_BAD_REQUEST)
+
+    body = await request.body()
+    fingerprint = hashlib.sha256(body).hexdigest()
+    scope_key = (request.url.path, client_identity(request), key)
+
+    while True:
+        stored = _store.get(scope_key)
+        if stored is not None:
+            if stored.fingerprint != fingerprint:
+                return _error(
+                    f"{IDEMPOTENCY_HEADER} déjà utilisée avec un contenu différent",
+                    status.HTTP_422_UNPROCESSABLE_ENTITY
+                )
+            _store.replayed += 1
+            return _replay(stored)
+
+        pending = _store.in_flight.get(scope_key)
+        if pending is None:
+            break
+        pending_fingerprint, future = pending
+        if pending_fingerprint != fingerprint:
+            return _error(
+                f"Une requête avec cette {IDEMPOTENCY_HEADER} est en cours de traitement",
+                status.HTTP_409_CONFLICT
+            )
+        _store.waited += 1
+        # Fin de la première exécution (réponse mémorisée ou échec) : nouvel examen
+        await asyncio.shield(future)
+
+    future = asyncio.get_running_loop().create_future()
+    _store.in_flight[scope_key] = (fingerprint, future)
+    try:
+        # Le corps déjà lu est rejoué pour la route, puis le flux d'origine reprend
+        body_sent = False
+
+        async def receive():
+            nonlocal body_sent
+            if body_sent:
+                return await request.receive()
+            body_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        response = await call_next(Request(request.scope, receive))
+        content = b"".join([chunk async for chunk in response.body_iterator])
+
+        # Les erreurs serveur ne sont pas mémorisées : une nouvelle tentative réexécute
+        if response.status_code < status.HTTP_500_INTERNAL_SERVER_ERROR:
+            _store.put(scope_key, StoredResponse(
+                expires_at=time.monotonic() + _store.ttl,
+                fingerprint=fingerprint,
+                status_code=response.status_code,
+                headers=tuple(
+                    (name, value) for name, value in response.headers.items()
+                    if name.lower() not in SKIPPED_HEADERS
+                ),
+                body=content
+            ))
+
+        replayable = Response(content=content, status_code=response.status_code)
+        for name, value in response.headers.items():
+            if name.lower() != "content-length":
+                replayable.headers.append(name, value)
+        return replayable
+    finally:
+        _store.in_flight.pop(scope_key, None)
+        future.set_result(None)
+
+
+def idempotency_info() -> Dict[str, int]:
+    """Statistiques du magasin de clés (supervision)"""
+    return _store.info()
@@ -1,7 +1,7 @@
 # main.py - Version complète corrigée avec tous les routers + routes admin intégrées
 from fastapi import FastAPI, Depends, HTTPException, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from sqlalchemy import text
@@ -22,7 +22,13 @@ load_dotenv()
 # Imports locaux
 import models
 import schemas
+import finance
+import catalog
+import idempotency
+import quote_cache
+import write_behind
 from database import get_db, SessionLocal
+from response_cache import cached_response, response_cache_info
 from models import AdminUser, Bank, InsuranceCompany, CreditProduct, SavingsProduct, InsuranceProduct
 
 from routers.admin_auth_router import router as admin_router
@@ -279,7 +285,7 @@ except ImportError:
     print("Warning: credit_product_admin router not available")
 
 try:
-    from routers import analytics
+    import analytics
     analytics_available = True
 except ImportError:
     analytics_available = False
@@ -299,6 +305,13 @@ except ImportError:
     insurance_available = False
     print("Warning: insurance router not available")
 
+try:
+    from routers import compare
+    compare_available = True
+except ImportError:
+    compare_available = False
+    print("Warning: compare router not available")
+
 try :
     from routers import insurance_application
     insurance_application_available = True
@@ -435,11 +448,13 @@ app.add_middleware(
         "Content-Type",
         "Authorization",
         "X-Requested-With",
-        "X-API-Version"
+        "X-API-Version",
+        "Idempotency-Key"
     ],
     expose_headers=[
         "X-Process-Time",
         "X-API-Version",
+        "Idempotent-Replayed",
         "Access-Control-Allow-Origin"
     ]
 )
@@ -547,6 +562,64 @@ async def validate_admin_token(current_user = Depends(get_current_admin_user)):
     except Exception:
         return TokenValidationResponse(valid=False)
 
+# ==================== REQUÊTES CONDITIONNELLES SUR LE CATALOGUE ====================
+
+# Endpoints de lecture du catalogue servis avec ETag / If-None-Match
+CATALOG_CACHEABLE_PATHS = {
+    "/api/banks",
+    "/api/banks/",
+    "/api/credits/products",
+    "/api/savings/products",
+    "/api/insurance/products",
+    "/api/institution-locator/api/institutions/cities",
+    "/api/enhanced-banks/with-conditions",
+}
+
+@app.middleware("http")
+async def catalog_conditional_get(request: Request, call_next):
+    """ETag dérivé de la version du catalogue ; 304 sans recalcul si le client est à jour"""
+    if request.method not in ("GET", "HEAD") or request.url.path not in CATALOG_CACHEABLE_PATHS:
+        return await call_next(request)
+
+    etag = catalog.catalog_etag(request.url.path, request.url.query)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={catalog.CATALOG_HTTP_MAX_AGE}, must-revalidate",
+        "Vary": "Accept-Encoding, Origin",
+    }
+
+    if catalog.etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    response = await call_next(request)
+    if response.status_code == status.HTTP_200_OK:
+        response.headers.update(headers)
+    return response
+
+# ==================== IDEMPOTENCE DES SIMULATIONS ET DEMANDES ====================
+
+# POST rejoués à l'identique lorsqu'ils portent un en-tête Idempotency-Key
+IDEMPOTENT_PATHS = {
+    "/api/credits/simulate",
+    "/api/simulations/credit",
+    "/api/simulations/savings",
+    "/api/savings/simulate",
+    "/api/applications/credit",
+    "/api/applications/savings",
+    "/api/applications/insurance",
+}
+
+@app.middleware("http")
+async def idempotent_posts(request: Request, call_next):
+    """Une seule exécution par Idempotency-Key (double clic, nouvelle tentative du frontend)"""
+    if (
+        request.method != "POST"
+        or request.url.path not in IDEMPOTENT_PATHS
+        or idempotency.IDEMPOTENCY_HEADER.lower() not in request.headers
+    ):
+        return await call_next(request)
+    return await idempotency.handle_idempotent_request(request, call_next)
+
 # ==================== MIDDLEWARE CORS PERSONNALISÉ ====================
 
 @app.middleware("http")
@@ -573,7 +646,7 @@ async def cors_handler(request: Request, call_next):
         response.headers["Access-Control-Allow-Origin"] = "http://localhost:4200"
     
     response.headers["Access-Control-Allow-Methods"] = "GET, POST, PUT, DELETE, OPTIONS, PATCH"
-    response.headers["Access-Control-Allow-Headers"] = "Accept, Accept-Language, Content-Language, Content-Type, Authorization, X-Requested-With, X-API-Version"
+    response.headers["Access-Control-Allow-Headers"] = "Accept, Accept-Language, Content-Language, Content-Type, Authorization, X-Requested-With, X-API-Version, Idempotency-Key"
     response.headers["Access-Control-Allow-Credentials"] = "true"
     response.headers["Access-Control-Max-Age"] = "86400"
     
@@ -630,6 +703,10 @@ if insurance_available:
     app.include_router(insurance.router, prefix="/api/insurance", tags=["Assurances"])
     logger.info("Insurance router included")
 
+if compare_available:
+    app.include_router(compare.router, prefix="/api/compare", tags=["Comparaison"])
+    logger.info("Compare router included")
+
 if savings_application_available:
     app.include_router(savings_application.router, prefix="/api", tags=["Savings Applications"])
     logger.info("Savings application router included")
@@ -804,7 +881,11 @@ async def health_check():
                 "analytics": analytics_available,
                 "auth": True,  # Maintenant intégré
                 "admin_auth": True
-            }
+            },
+            "response_caches": response_cache_info(),
+            "idempotency": idempotency.idempotency_info(),
+            "simulation_writer": write_behind.writer_info(),
+            "quote_cache": quote_cache.quote_cache_info()
         }
     except Exception as e:
         logger.error(f"Health check failed: {str(e)}")
@@ -935,6 +1016,7 @@ async def debug_verify_password(
         return {"error": str(e)}
 
 @app.get("/api/stats")
+@cached_response(ttl=30, max_entries=1)
 async def get_api_stats(db: Session = Depends(get_db)):
     """Statistiques générales de l'API"""
     try:
@@ -1198,14 +1280,32 @@ async def startup_event():
                 logger.info("Tables vérifiées/créées")
         except Exception as e:
             logger.warning(f"Erreur création tables: {str(e)}")
+        
+        # Chargement de l'instantané du catalogue (et des tables de facteurs d'annuité)
+        try:
+            snapshot = catalog.get_snapshot()
+            logger.info(
+                f"Catalogue chargé (version {snapshot.version}) : "
+                f"{len(snapshot.active_credit_products)} produits de crédit, "
+                f"{len(snapshot.active_savings_products)} produits d'épargne, "
+                f"{finance.product_tables_info()['products']} tables d'annuité"
+            )
+        except Exception as e:
+            logger.warning(f"Erreur chargement du catalogue: {str(e)}")
             
     except Exception as e:
         logger.error(f"Erreur lors de la connexion à la base de données: {str(e)}")
+    
+    # Thread d'écriture différée des simulations et devis
+    write_behind.start()
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Nettoyage à l'arrêt"""
     logger.info("Arrêt de l'API Bamboo Financial")
+    # Les simulations encore en file sont écrites avant l'arrêt
+    write_behind.stop()
+    logger.info(f"File d'écriture vidée : {write_behind.writer_info()}")
 
 # ==================== INFORMATIONS DE VERSION ====================
 
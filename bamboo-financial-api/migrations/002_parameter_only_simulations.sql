@@ -0,0 +1,22 @@
+-- Migration 002 - Stockage des simulations par paramètres
+-- Les tableaux d'amortissement / détails mensuels sont recalculés à la lecture :
+-- seules les lignes historiques (schedule_format = 0) conservent leur JSON
+-- jusqu'au compactage par migrations/compact_simulations.py
+
+ALTER TABLE credit_simulations
+    ADD COLUMN IF NOT EXISTS schedule_format INTEGER NOT NULL DEFAULT 0;
+
+ALTER TABLE savings_simulations
+    ADD COLUMN IF NOT EXISTS schedule_format INTEGER NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS interest_rate DECIMAL(5,2),
+    ADD COLUMN IF NOT EXISTS compounding_frequency VARCHAR(20);
+
+-- Index partiel : le compactage ne parcourt que les lignes encore au format historique
+CREATE INDEX IF NOT EXISTS idx_credit_simulations_inline_schedule
+    ON credit_simulations (id) WHERE schedule_format = 0;
+CREATE INDEX IF NOT EXISTS idx_savings_simulations_inline_breakdown
+    ON savings_simulations (id) WHERE schedule_format = 0;
+
+-- Après compactage, récupérer l'espace TOAST libéré (verrou exclusif, hors heures de pointe) :
+-- VACUUM FULL credit_simulations;
+-- VACUUM FULL savings_simulations;
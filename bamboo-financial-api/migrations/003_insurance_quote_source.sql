@@ -0,0 +1,9 @@
+-- Migration 003 - Devis d'assurance servis depuis le cache
+-- Un devis identique à un devis encore valide (même profil de risque, même catalogue)
+-- référence la ligne d'origine au lieu de recopier couverture et exclusions
+
+ALTER TABLE insurance_quotes
+    ADD COLUMN IF NOT EXISTS source_quote_id VARCHAR(50) REFERENCES insurance_quotes(id);
+
+CREATE INDEX IF NOT EXISTS idx_insurance_quotes_source_quote_id
+    ON insurance_quotes (source_quote_id);
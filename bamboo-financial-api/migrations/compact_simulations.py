@@ -0,0 +1,106 @@
+# Migration script - compact_simulations.py
+# Compacte les simulations historiques : le JSON stocké est supprimé lorsque
+# le noyau finance le reproduit, seuls les paramètres sont conservés.
+import argparse
+
+from sqlalchemy.orm import undefer
+from database import SessionLocal
+import models
+import finance
+
+BATCH_SIZE = 500
+
+
+def _compact_batches(db, model, json_column: str, compact_row, batch_size: int, dry_run: bool) -> dict:
+    """Parcourt les lignes au format historique par lots (pagination par id)"""
+    stats = {"scanned": 0, "compacted": 0, "kept": 0}
+    last_id = ""
+
+    while True:
+        rows = db.query(model).options(
+            undefer(getattr(model, json_column))
+        ).filter(
+            model.schedule_format == finance.SCHEDULE_FORMAT_INLINE,
+            model.id > last_id
+        ).order_by(model.id).limit(batch_size).all()
+
+        if not rows:
+            break
+
+        for row in rows:
+            stats["scanned"] += 1
+            if compact_row(row):
+                stats["compacted"] += 1
+            else:
+                # Tableau non reproductible (taux modifié, ancien calcul...) : on le conserve
+                stats["kept"] += 1
+        last_id = rows[-1].id
+
+        if dry_run:
+            db.rollback()
+        else:
+            db.commit()
+        db.expunge_all()
+
+    return stats
+
+
+def _compact_credit(simulation: models.CreditSimulation) -> bool:
+    if not finance.credit_schedule_reproducible(simulation):
+        return False
+    simulation.amortization_schedule = None
+    simulation.schedule_format = finance.SCHEDULE_FORMAT_PARAMETERS
+    return True
+
+
+def _compact_savings(simulation: models.SavingsSimulation) -> bool:
+    if not finance.savings_breakdown_reproducible(simulation):
+        return False
+    # Figer taux et capitalisation : le produit pourra évoluer sans altérer la simulation
+    _, _, rate, _, frequency = finance.savings_schedule_parameters(simulation)
+    simulation.interest_rate = rate
+    simulation.compounding_frequency = frequency
+    simulation.monthly_breakdown = None
+    simulation.schedule_format = finance.SCHEDULE_FORMAT_PARAMETERS
+    return True
+
+
+def compact_simulations(batch_size: int = BATCH_SIZE, dry_run: bool = False) -> dict:
+    """Compacte les simulations de crédit et d'épargne au format historique ; renvoie les compteurs"""
+    db = SessionLocal()
+    stats = {}
+
+    try:
+        credit_stats = _compact_batches(
+            db, models.CreditSimulation, "amortization_schedule", _compact_credit, batch_size, dry_run
+        )
+        stats["credit"] = credit_stats
+        print(f"✅ Simulations de crédit : {credit_stats}")
+
+        savings_stats = _compact_batches(
+            db, models.SavingsSimulation, "monthly_breakdown", _compact_savings, batch_size, dry_run
+        )
+        stats["savings"] = savings_stats
+        print(f"✅ Simulations d'épargne : {savings_stats}")
+
+        if dry_run:
+            print("ℹ️ Mode simulation : aucune modification enregistrée")
+        else:
+            print("ℹ️ Lancer VACUUM FULL sur les deux tables pour récupérer l'espace TOAST")
+
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Erreur lors du compactage: {e}")
+    finally:
+        db.close()
+
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compactage des tableaux de simulations stockés")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    compact_simulations(args.batch_size, args.dry_run)
@@ -1,6 +1,6 @@
 # models.py - Modèles mis à jour avec InsuranceApplication
 from sqlalchemy import Column, String, Boolean, DateTime, Integer, DECIMAL, Text, ForeignKey, JSON, event, Numeric
-from sqlalchemy.orm import relationship, configure_mappers
+from sqlalchemy.orm import relationship, configure_mappers, deferred
 from sqlalchemy.sql import func
 from database import Base
 from datetime import datetime
@@ -192,9 +192,13 @@ class InsuranceQuote(Base):
     monthly_premium = Column(DECIMAL(10, 2), nullable=False)
     annual_premium = Column(DECIMAL(10, 2), nullable=False)
     deductible = Column(DECIMAL(10, 2))
-    coverage_details = Column(JSON)
-    exclusions = Column(JSON, default=list)
+    # None enregistré en NULL SQL (et non en JSON 'null') pour les devis servis depuis le
+    # cache ; pas de valeur par défaut, qui remplacerait ce None
+    coverage_details = Column(JSON(none_as_null=True))
+    exclusions = Column(JSON(none_as_null=True))
     valid_until = Column(DateTime(timezone=True))
+    # Devis servi depuis le cache : couverture et exclusions portées par la ligne source
+    source_quote_id = Column(String(50), ForeignKey("insurance_quotes.id"), index=True)
     client_ip = Column(String(45))
     user_agent = Column(Text)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -292,7 +296,10 @@ class CreditSimulation(Base):
     eligible = Column(Boolean, nullable=False)
     risk_score = Column(Integer)
     recommendations = Column(JSON, default=list)
-    amortization_schedule = Column(JSON)
+    # Tableau stocké uniquement pour les lignes historiques (schedule_format = 0) ;
+    # chargé à la demande pour ne pas alourdir les parcours de la table
+    amortization_schedule = deferred(Column(JSON))
+    schedule_format = Column(Integer, nullable=False, default=1, server_default="0")
     client_ip = Column(String(45))
     user_agent = Column(Text)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -314,7 +321,11 @@ class SavingsSimulation(Base):
     total_contributions = Column(DECIMAL(12, 2), nullable=False)
     total_interest = Column(DECIMAL(12, 2), nullable=False)
     effective_rate = Column(DECIMAL(5, 2))
-    monthly_breakdown = Column(JSON)
+    # Paramètres de régénération du détail mensuel (taux et capitalisation au moment de la simulation)
+    interest_rate = Column(DECIMAL(5, 2))
+    compounding_frequency = Column(String(20))
+    monthly_breakdown = deferred(Column(JSON))
+    schedule_format = Column(Integer, nullable=False, default=1, server_default="0")
     recommendations = Column(JSON, default=list)
     client_ip = Column(String(45))
     user_agent = Column(Text)
@@ -0,0 +1,143 @@
+# quote_cache.py - Cache des devis d'assurance par profil de risque normalisé
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+
+# Nombre maximal de profils conservés (LRU) ; chaque entrée expire avec la validité du devis
+QUOTE_CACHE_MAX_ENTRIES = int(os.getenv("QUOTE_CACHE_MAX_ENTRIES", "2000"))
+
+
+class CachedQuote(NamedTuple):
+    quote_id: str
+    valid_until: datetime
+    # Lignes InsuranceQuote d'origine (devis principal puis devis produits)
+    rows: List[Dict[str, Any]]
+    # Réponse hors champs propres à la requête (identifiants, garanties saisies...)
+    response: Dict[str, Any]
+
+
+def _canonical(value):
+    """Forme canonique d'un facteur de risque : clés triées, flottants entiers ramenés à int"""
+    if isinstance(value, dict):
+        return {str(key): _canonical(item) for key, item in sorted(value.items(), key=lambda kv: str(kv[0]))}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(item) for item in value]
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def profile_key(
+    insurance_type: str,
+    age: int,
+    guarantees: Iterable[str],
+    risk_factors: dict,
+    selected_insurers: Iterable[str],
+    catalog_fingerprint: str
+) -> str:
+    """
+    Empreinte du profil : deux demandes de même clé reçoivent les mêmes tarifs.
+    L'empreinte du contenu du catalogue (et non son compteur de version, propre
+    à chaque processus) rend la clé identique d'un worker à l'autre.
+    """
+    profile = [
+        insurance_type,
+        age,
+        sorted(guarantees),
+        _canonical(risk_factors or {}),
+        sorted(set(selected_insurers)),
+        catalog_fingerprint
+    ]
+    encoded = json.dumps(profile, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+class QuoteCache:
+    """Devis par empreinte de profil, bornés en nombre ; expiration à valid_until"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[str, CachedQuote]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[CachedQuote]:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry.valid_until <= datetime.now():
+                del self.entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: str, entry: CachedQuote) -> None:
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+
+    def info(self) -> Dict[str, int]:
+        with self.lock:
+            entries = len(self.entries)
+        return {
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+
+_cache = QuoteCache(QUOTE_CACHE_MAX_ENTRIES)
+
+
+def get(key: str) -> Optional[CachedQuote]:
+    """Devis encore valide pour cette empreinte, sinon None"""
+    return _cache.get(key)
+
+
+def put(key: str, entry: CachedQuote) -> None:
+    _cache.put(key, entry)
+
+
+def referencing_rows(entry: CachedQuote, quote_id: str, overrides: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Lignes d'un nouveau devis servi depuis le cache : chacune pointe vers la ligne
+    d'origine (source_quote_id) au lieu de recopier couverture et exclusions,
+    enregistrées à NULL et résolues à la lecture sur la ligne d'origine
+    """
+    rows = []
+    for row in entry.rows:
+        suffix = row["id"][len(entry.quote_id):]
+        rows.append({
+            **row,
+            **overrides,
+            "id": quote_id + suffix,
+            "coverage_details": None,
+            "exclusions": None,
+            "source_quote_id": row["id"]
+        })
+    return rows
+
+
+def clear_quote_cache() -> None:
+    """Vide le cache des devis"""
+    _cache.clear()
+
+
+def quote_cache_info() -> Dict[str, int]:
+    """Taille et taux de réussite du cache des devis (supervision)"""
+    return _cache.info()
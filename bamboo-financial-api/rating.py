@@ -0,0 +1,383 @@
+# rating.py - Moteur de tarification assurance : règles JSON des produits compilées en tables
+import math
+import re
+from bisect import bisect_right
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Âge maximal tabulé (colonnes 0..MAX_AGE des tables d'âge)
+MAX_AGE = 120
+
+# Surcoût relatif de chaque garantie optionnelle
+GUARANTEE_COSTS = {
+    'responsabilite_civile': 0.0,  # Garantie obligatoire incluse
+    'dommages_collision': 0.3,
+    'vol': 0.2,
+    'incendie': 0.15,
+    'bris_glace': 0.1,
+    'assistance': 0.05,
+    'degats_eaux': 0.2,
+    'catastrophes_naturelles': 0.25,
+    'invalidite': 0.25,
+    'maladie_grave': 0.35,
+    'consultations': 0.15,
+    'pharmacie': 0.1,
+    'dentaire': 0.2,
+    'optique': 0.05,
+    'bagages': 0.1,
+    'annulation': 0.15,
+    'retard': 0.05
+}
+
+# Facteur âge des produits sans barème : (âge de début de tranche, facteur)
+DEFAULT_AGE_BANDS = ((0, 1.3), (25, 1.0), (40, 1.1), (60, 1.2))
+
+# Prime type proportionnelle au capital : (facteur de risque, capital par défaut, taux)
+INSURED_VALUES = {
+    'auto': ('vehicle_value', 15000000, 0.003),
+    'habitation': ('property_value', 25000000, 0.002),
+    'vie': ('coverage_amount', 50000000, 0.0015),
+}
+
+# Prime type par unité : (facteur de risque, valeur par défaut, montant, part fixe, diviseur)
+UNIT_PREMIUMS = {
+    'sante': ('family_size', 1, 45000, 0, 1),
+    'voyage': ('duration', 7, 25000, 1, 30),
+}
+
+DEFAULT_BASE_PREMIUM = 50000
+
+DEFAULT_DEDUCTIBLES = {
+    'auto': 100000,
+    'habitation': 50000,
+    'vie': 0,
+    'sante': 25000,
+    'voyage': 0
+}
+DEFAULT_DEDUCTIBLE = 50000
+
+# Majorations par indicateur de risque déclaré (valeur vraie ou positive)
+RISK_FLAG_LOADINGS = {
+    'auto': {'accidents': 1.2, 'violations': 1.1},
+    'sante': {'chronic_conditions': 1.3, 'smoking': 1.4},
+}
+
+# Règles de premium_calculation : "<facteur>_multiplier" (ou _coefficient, _factors)
+# est une table valeur -> multiplicateur lue dans risk_factors ; "age_*" un barème d'âge
+FACTOR_SUFFIXES = ("_multiplier", "_coefficient", "_factors")
+# Noms des facteurs de risque envoyés par le frontend pour une dimension tarifaire
+RISK_FACTOR_ALIASES = {
+    'location': ('location', 'city'),
+    'vehicle_type': ('vehicle_type', 'vehicle_category'),
+    'family': ('family', 'family_type'),
+}
+# Clés de valeur par défaut d'une table de multiplicateurs
+DEFAULT_FACTOR_KEYS = ('autres', 'default', 'other')
+
+AGE_BAND_PATTERN = re.compile(r"^\s*(\d+)\s*(?:-\s*(\d+)|\+)\s*$")
+
+
+# ==================== BARÈMES PAR DÉFAUT ====================
+
+def age_factor(age: int) -> float:
+    """Facteur âge par défaut"""
+    starts = [start for start, _ in DEFAULT_AGE_BANDS]
+    return DEFAULT_AGE_BANDS[max(bisect_right(starts, age) - 1, 0)][1]
+
+
+def guarantee_multiplier(guarantees: Iterable[str]) -> float:
+    """Multiplicateur de prime selon les garanties sélectionnées (barème par défaut)"""
+    return 1.0 + sum(GUARANTEE_COSTS.get(guarantee, 0) for guarantee in guarantees)
+
+
+def default_base_premium(insurance_type: str, risk_factors: dict) -> float:
+    """Prime de base type (hors âge) selon le capital ou le nombre d'unités assurées"""
+    if insurance_type in INSURED_VALUES:
+        key, default_value, rate = INSURED_VALUES[insurance_type]
+        return risk_factors.get(key, default_value) * rate
+    if insurance_type in UNIT_PREMIUMS:
+        key, default_units, amount, fixed, divisor = UNIT_PREMIUMS[insurance_type]
+        return amount * (fixed + int(risk_factors.get(key, default_units)) / divisor)
+    return DEFAULT_BASE_PREMIUM
+
+
+def default_deductible(insurance_type: str) -> float:
+    """Franchise par défaut du type d'assurance"""
+    return DEFAULT_DEDUCTIBLES.get(insurance_type, DEFAULT_DEDUCTIBLE)
+
+
+def risk_flag_multiplier(insurance_type: str, risk_factors: dict) -> float:
+    """Produit des majorations des indicateurs de risque déclarés"""
+    multiplier = 1.0
+    for flag, loading in RISK_FLAG_LOADINGS.get(insurance_type, {}).items():
+        value = risk_factors.get(flag)
+        declared = value > 0 if isinstance(value, (int, float)) else bool(value)
+        if declared:
+            multiplier *= loading
+    return multiplier
+
+
+# ==================== COMPILATION D'UN PRODUIT ====================
+
+def _normalize(value: Any) -> Optional[str]:
+    """Valeur de facteur de risque comparable aux clés des tables (scalaires uniquement)"""
+    if value is None or isinstance(value, (dict, list, tuple)):
+        return None
+    return str(value).strip().lower()
+
+
+def _number(value: Any) -> Optional[float]:
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if math.isfinite(number) else None
+
+
+def _age_table(bands: dict) -> np.ndarray:
+    """Barème {"18-25": 1.5, "51+": 1.1} étendu en un facteur par âge (1.0 hors tranches)"""
+    table = np.ones(MAX_AGE + 1)
+    parsed = []
+    for band, factor in bands.items():
+        match = AGE_BAND_PATTERN.match(str(band))
+        factor = _number(factor)
+        if match and factor is not None:
+            start = int(match.group(1))
+            end = int(match.group(2)) if match.group(2) else MAX_AGE
+            parsed.append((start, min(end, MAX_AGE), factor))
+    for start, end, factor in sorted(parsed):
+        table[start:end + 1] = factor
+    return table
+
+
+def _default_age_table() -> np.ndarray:
+    return np.array([age_factor(age) for age in range(MAX_AGE + 1)])
+
+
+def _deductible(options: Any, insurance_type: str) -> float:
+    """Franchise standard : première option d'une liste, clé standard/default d'un dict, sinon la plus basse"""
+    if isinstance(options, (list, tuple)):
+        values = [number for number in map(_number, options) if number is not None]
+        if values:
+            return values[0]
+    elif isinstance(options, dict) and options:
+        for key in ("standard", "default"):
+            if _number(options.get(key)) is not None:
+                return _number(options[key])
+        values = [number for number in map(_number, options.values()) if number is not None]
+        if values:
+            return min(values)
+    return default_deductible(insurance_type)
+
+
+def age_limits(product) -> Tuple[float, float]:
+    """Âges minimal et maximal acceptés (age_limits.min_age / max_age, ou *_subscriber)"""
+    limits = product.age_limits if isinstance(product.age_limits, dict) else {}
+    min_age = _number(limits.get("min_age", limits.get("min_age_subscriber")))
+    max_age = _number(limits.get("max_age", limits.get("max_age_subscriber")))
+    return (min_age if min_age is not None else 0, max_age if max_age is not None else MAX_AGE)
+
+
+class ProductRating(NamedTuple):
+    """Règles d'un produit compilées : tables d'âge, multiplicateurs par facteur, surcoûts de garanties"""
+    record: Any
+    base_premium: float  # NaN si absente
+    base_rate: float  # taux sur le capital assuré, NaN si absent
+    age_factors: np.ndarray
+    age_accepted: np.ndarray
+    factor_tables: Dict[str, Tuple[Dict[str, float], float]]
+    guarantee_loadings: Dict[str, float]
+    deductible: float
+
+
+def compile_product(product) -> ProductRating:
+    """Compile premium_calculation, age_limits et deductible_options d'un produit"""
+    rules = product.premium_calculation if isinstance(product.premium_calculation, dict) else {}
+
+    age_factors = _default_age_table()
+    factor_tables = {}
+    for key, table in rules.items():
+        if not isinstance(table, dict):
+            continue
+        if key.startswith("age_"):
+            age_factors = _age_table(table)
+        elif key.endswith(FACTOR_SUFFIXES):
+            dimension = key.rsplit("_", 1)[0]
+            values = {_normalize(value): _number(factor) for value, factor in table.items()}
+            values = {value: factor for value, factor in values.items() if factor is not None}
+            default = next((values[name] for name in DEFAULT_FACTOR_KEYS if name in values), 1.0)
+            factor_tables[dimension] = (values, default)
+
+    loadings = dict(GUARANTEE_COSTS)
+    if isinstance(rules.get("guarantee_loadings"), dict):
+        for guarantee, loading in rules["guarantee_loadings"].items():
+            if _number(loading) is not None:
+                loadings[guarantee] = _number(loading)
+
+    min_age, max_age = age_limits(product)
+    ages = np.arange(MAX_AGE + 1)
+    age_accepted = (ages >= min_age) & (ages <= max_age)
+
+    base_premium = _number(product.base_premium)
+    base_rate = _number(rules.get("base_rate"))
+    return ProductRating(
+        record=product,
+        base_premium=base_premium if base_premium else math.nan,
+        base_rate=base_rate if base_rate and product.type in INSURED_VALUES else math.nan,
+        age_factors=age_factors,
+        age_accepted=age_accepted,
+        factor_tables=factor_tables,
+        guarantee_loadings=loadings,
+        deductible=_deductible(product.deductible_options, product.type)
+    )
+
+
+# ==================== TABLES VECTORISÉES PAR TYPE ====================
+
+class RatedProducts(NamedTuple):
+    """Résultat d'une tarification : produits retenus, primes annuelles et franchises alignées"""
+    products: Tuple
+    annual_premiums: np.ndarray
+    deductibles: np.ndarray
+
+
+class TypeRatingTable:
+    """Règles compilées de tous les produits d'un type, empilées en tableaux (une ligne par produit)"""
+
+    def __init__(self, insurance_type: str, ratings: Sequence[ProductRating]):
+        self.insurance_type = insurance_type
+        self.products = tuple(rating.record for rating in ratings)
+        self.company_ids = np.array([product.insurance_company_id for product in self.products], dtype=object)
+        self.base_premiums = np.array([rating.base_premium for rating in ratings], dtype=np.float64)
+        self.base_rates = np.array([rating.base_rate for rating in ratings], dtype=np.float64)
+        self.age_factors = np.stack([rating.age_factors for rating in ratings])
+        self.age_accepted = np.stack([rating.age_accepted for rating in ratings])
+        self.deductibles = np.array([rating.deductible for rating in ratings], dtype=np.float64)
+
+        # Dimension tarifaire -> (valeur -> vecteur de multiplicateurs, vecteur par défaut) ;
+        # 1.0 pour les produits qui ignorent la dimension
+        self.factor_tables: Dict[str, Tuple[Dict[str, np.ndarray], np.ndarray]] = {}
+        dimensions = sorted({dimension for rating in ratings for dimension in rating.factor_tables})
+        for dimension in dimensions:
+            tables = [rating.factor_tables.get(dimension, ({}, 1.0)) for rating in ratings]
+            defaults = np.array([default for _, default in tables])
+            values = sorted({value for table, _ in tables for value in table})
+            self.factor_tables[dimension] = (
+                {value: np.array([table.get(value, default) for table, default in tables]) for value in values},
+                defaults
+            )
+
+        guarantees = sorted({guarantee for rating in ratings for guarantee in rating.guarantee_loadings})
+        self.guarantee_columns = {guarantee: column for column, guarantee in enumerate(guarantees)}
+        self.guarantee_loadings = np.array(
+            [[rating.guarantee_loadings.get(guarantee, 0.0) for guarantee in guarantees] for rating in ratings],
+            dtype=np.float64
+        ).reshape(len(ratings), len(guarantees))
+
+    def eligible_positions(self, age: int, company_ids: Optional[Iterable[str]] = None) -> np.ndarray:
+        """Produits acceptant l'âge, éventuellement restreints à des assureurs"""
+        mask = self.age_accepted[:, min(max(int(age), 0), MAX_AGE)]
+        if company_ids is not None:
+            mask = mask & np.isin(self.company_ids, list(company_ids))
+        return np.flatnonzero(mask)
+
+    def premiums(self, positions: np.ndarray, age: int, risk_factors: dict, guarantees: Sequence[str]) -> np.ndarray:
+        """Primes annuelles des produits aux positions données, en une évaluation vectorisée"""
+        insurance_type = self.insurance_type
+        base_premiums = self.base_premiums[positions]
+        base_rates = self.base_rates[positions]
+
+        # Base : taux x capital déclaré, sinon prime du produit, sinon taux x capital type, sinon prime type
+        type_premium = default_base_premium(insurance_type, risk_factors)
+        if insurance_type in INSURED_VALUES:
+            key, default_value, _ = INSURED_VALUES[insurance_type]
+            declared_value = _number(risk_factors.get(key))
+            fallback = np.where(np.isnan(base_rates), type_premium, base_rates * default_value)
+            base = np.where(np.isnan(base_premiums), fallback, base_premiums)
+            if declared_value is not None:
+                base = np.where(np.isnan(base_rates), base, base_rates * declared_value)
+        else:
+            base = np.where(np.isnan(base_premiums), type_premium, base_premiums)
+
+        premiums = base * self.age_factors[positions, min(max(int(age), 0), MAX_AGE)]
+
+        for dimension, (by_value, defaults) in self.factor_tables.items():
+            value = None
+            for name in RISK_FACTOR_ALIASES.get(dimension, (dimension,)):
+                value = _normalize(risk_factors.get(name))
+                if value is not None:
+                    break
+            premiums = premiums * by_value.get(value, defaults)[positions]
+
+        columns = [self.guarantee_columns[guarantee] for guarantee in guarantees if guarantee in self.guarantee_columns]
+        loadings = self.guarantee_loadings[np.ix_(positions, columns)].sum(axis=1)
+        return premiums * risk_flag_multiplier(insurance_type, risk_factors) * (1.0 + loadings)
+
+    def rate(
+        self, age: int, risk_factors: dict, guarantees: Sequence[str], company_ids: Optional[Iterable[str]] = None
+    ) -> RatedProducts:
+        positions = self.eligible_positions(age, company_ids)
+        return RatedProducts(
+            products=tuple(self.products[position] for position in positions.tolist()),
+            annual_premiums=self.premiums(positions, age, risk_factors, guarantees),
+            deductibles=self.deductibles[positions]
+        )
+
+
+class RatingEngine:
+    """
+    Tarification de tous les produits d'assurance actifs. Un produit n'est recompilé
+    que si son enregistrement a changé ; les tables d'un type ne sont reconstruites
+    que si l'un de ses produits a changé.
+    """
+
+    def __init__(self, products: Iterable, previous: Optional["RatingEngine"] = None):
+        self.ratings: Dict[str, ProductRating] = {}
+        self.recompiled: List[str] = []
+        by_type: Dict[str, List[ProductRating]] = {}
+        for product in products:
+            known = previous.ratings.get(product.id) if previous is not None else None
+            # Enregistrements comparés par valeur (règles JSON, compagnie...)
+            if known is not None and known.record == product:
+                rating = known
+            else:
+                rating = compile_product(product)
+                self.recompiled.append(product.id)
+            self.ratings[product.id] = rating
+            by_type.setdefault(product.type, []).append(rating)
+
+        self.tables: Dict[str, TypeRatingTable] = {}
+        for insurance_type, ratings in by_type.items():
+            table = previous.tables.get(insurance_type) if previous is not None else None
+            if table is None or len(table.products) != len(ratings) or any(
+                known is not rating.record for known, rating in zip(table.products, ratings)
+            ):
+                table = TypeRatingTable(insurance_type, ratings)
+            self.tables[insurance_type] = table
+
+    def rate(
+        self,
+        insurance_type: str,
+        age: int,
+        risk_factors: dict,
+        guarantees: Sequence[str],
+        company_ids: Optional[Iterable[str]] = None
+    ) -> RatedProducts:
+        """Primes de tous les produits du type acceptant l'âge (et des assureurs donnés)"""
+        table = self.tables.get(insurance_type)
+        if table is None:
+            return RatedProducts((), np.zeros(0), np.zeros(0))
+        return table.rate(age, risk_factors, guarantees, company_ids)
+
+
+def product_premium(product, age: int, risk_factors: dict, guarantees: Sequence[str]) -> float:
+    """Prime annuelle d'un seul produit (hors contrôle des limites d'âge)"""
+    table = TypeRatingTable(product.type, [compile_product(product)])
+    return float(table.premiums(np.arange(1), age, risk_factors, guarantees)[0])
+
+
+def accepts_age(product, age: int) -> bool:
+    """Vérifie les limites d'âge du produit"""
+    min_age, max_age = age_limits(product)
+    return min_age <= age <= max_age
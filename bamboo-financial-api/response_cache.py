@@ -0,0 +1,146 @@
+# response_cache.py - Cache TTL/LRU des réponses GET agrégées, avec calcul unique par clé
+import asyncio
+import functools
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, NamedTuple
+
+# Types de paramètres retenus dans la clé (les dépendances Session, Request... sont ignorées)
+KEY_TYPES = (str, int, float, bool, type(None))
+
+_caches: Dict[str, "ResponseCache"] = {}
+
+
+class Uncached(NamedTuple):
+    """Réponse renvoyée telle quelle sans être mise en cache (données de secours)"""
+    value: Any
+
+
+def uncached(value: Any) -> Uncached:
+    """À retourner depuis une route décorée pour ne pas mettre la réponse en cache"""
+    return Uncached(value)
+
+
+class ResponseCache:
+    """
+    Réponses d'une route par jeu de paramètres : expiration après ttl secondes,
+    éviction LRU au-delà de max_entries. Les requêtes simultanées sur une clé
+    absente attendent le calcul en cours au lieu de le relancer.
+    """
+
+    def __init__(self, name: str, ttl: float, max_entries: int):
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.in_flight: Dict[Hashable, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def get(self, key: Hashable):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return entry
+
+    def put(self, key: Hashable, value: Any) -> None:
+        self.entries[key] = (time.monotonic() + self.ttl, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    async def get_or_compute(self, key: Hashable, compute: Callable):
+        while True:
+            entry = self.get(key)
+            if entry is not None:
+                self.hits += 1
+                return entry[1]
+
+            pending = self.in_flight.get(key)
+            if pending is None:
+                break
+            self.coalesced += 1
+            try:
+                # shield : l'annulation d'un client en attente n'interrompt pas le calcul partagé
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                # Calcul partagé annulé (et non cette requête) : nouvelle tentative
+                if not pending.cancelled():
+                    raise
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self.in_flight[key] = future
+        try:
+            value = await compute()
+        except Exception as e:
+            # Erreurs transmises aux requêtes en attente, jamais mises en cache
+            future.set_exception(e)
+            future.exception()  # marque l'exception comme consommée s'il n'y a aucun attendant
+            raise
+        except BaseException:
+            future.cancel()
+            raise
+        else:
+            # Seules les réponses nominales sont conservées
+            if isinstance(value, Uncached):
+                value = value.value
+            else:
+                self.put(key, value)
+            future.set_result(value)
+            return value
+        finally:
+            self.in_flight.pop(key, None)
+
+    def clear(self) -> None:
+        self.entries.clear()
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self.entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "in_flight": len(self.in_flight)
+        }
+
+
+def cached_response(ttl: float = 30, max_entries: int = 128):
+    """
+    Décorateur de route GET async : réponse mise en cache par route et par
+    paramètres de requête. La signature est conservée pour l'injection FastAPI.
+    """
+    def decorator(func):
+        name = f"{func.__module__}.{func.__qualname__}"
+        cache = _caches[name] = ResponseCache(name, ttl, max_entries)
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            key = tuple(sorted(
+                (param, value) for param, value in kwargs.items() if isinstance(value, KEY_TYPES)
+            ))
+            return await cache.get_or_compute(key, lambda: func(*args, **kwargs))
+
+        wrapper.cache = cache
+        return wrapper
+
+    return decorator
+
+
+def response_cache_info() -> Dict[str, Dict[str, Any]]:
+    """Statistiques de chaque cache de réponses (supervision)"""
+    return {name: cache.info() for name, cache in _caches.items()}
+
+
+def clear_response_caches() -> None:
+    """Vide tous les caches de réponses"""
+    for cache in _caches.values():
+        cache.clear()
@@ -7,10 +7,18 @@ from datetime import datetime
 import uuid
 import models
 import schemas
+import finance
 from database import get_db
 
 router = APIRouter()
 
+def _refresh_annuity_table(product: models.CreditProduct):
+    """Reconstruit la table de facteurs d'annuité du produit (retirée s'il est inactif)"""
+    if product.is_active:
+        finance.rebuild_product_table(product)
+    else:
+        finance.drop_product_table(product.id)
+
 @router.get("/admin/credit-products")
 async def get_credit_products_admin(
     skip: int = Query(0, ge=0),
@@ -161,6 +169,7 @@ async def create_credit_product_admin(product: schemas.CreditProductCreate, db:
         db.add(db_product)
         db.commit()
         db.refresh(db_product)
+        _refresh_annuity_table(db_product)
 
         return {
             "message": "Produit créé avec succès",
@@ -195,6 +204,7 @@ async def update_credit_product_admin(product_id: str, product_update: schemas.C
 
         db.commit()
         db.refresh(db_product)
+        _refresh_annuity_table(db_product)
 
         return {"message": "Produit mis à jour avec succès"}
 
@@ -227,6 +237,7 @@ async def delete_credit_product_admin(product_id: str, db: Session = Depends(get
         product_name = db_product.name
         db.delete(db_product)
         db.commit()
+        finance.drop_product_table(product_id)
 
         return {"message": f"Produit '{product_name}' supprimé avec succès"}
 
@@ -4,6 +4,7 @@ from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
 from typing import List, Optional
 from database import get_db
+from response_cache import cached_response, uncached
 import models
 from pydantic import BaseModel
 
@@ -35,6 +36,7 @@ class AuditLogResponse(BaseModel):
     metadata: Optional[dict] = {}
 
 @router.get("/stats", response_model=DashboardStats)
+@cached_response(ttl=15, max_entries=1)
 async def get_dashboard_stats(db: Session = Depends(get_db)):
     """Récupère les statistiques du dashboard"""
     try:
@@ -130,8 +132,8 @@ async def get_dashboard_stats(db: Session = Depends(get_db)):
         
     except Exception as e:
         print(f"Erreur dashboard stats: {e}")
-        # Retourner des données par défaut en cas d'erreur
-        return DashboardStats(
+        # Retourner des données par défaut en cas d'erreur (non mises en cache)
+        return uncached(DashboardStats(
             total_banks=12,
             active_banks=10,
             total_insurance_companies=8,
@@ -144,7 +146,7 @@ async def get_dashboard_stats(db: Session = Depends(get_db)):
             active_insurance_products=12,
             total_simulations_today=45,
             total_applications_pending=8
-        )
+        ))
 
 @router.get("/recent-activity")
 async def get_recent_activity(limit: int = 20, db: Session = Depends(get_db)):
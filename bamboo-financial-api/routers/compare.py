@@ -0,0 +1,205 @@
+# routers/compare.py - Comparaison multi-catégories (crédit, épargne, assurance) pour un profil
+import asyncio
+import time
+from typing import List, Optional
+
+from fastapi import APIRouter, HTTPException, Query
+from starlette.concurrency import run_in_threadpool
+
+import catalog
+from routers.credits import COMPARE_SORT_KEYS, rank_credit_offers
+from routers.savings import rank_savings_offers
+from routers.insurance import format_company_data
+
+router = APIRouter()
+
+
+def rank_insurance_offers(
+    insurance_type: str,
+    age: int,
+    risk_factors: dict,
+    guarantees: List[str],
+    limit: int,
+    snapshot: Optional[catalog.CatalogSnapshot] = None
+) -> dict:
+    """Prime de chaque produit d'assurance du type acceptant l'âge, classée par prime croissante"""
+    if snapshot is None:
+        snapshot = catalog.get_snapshot()
+    rated = snapshot.insurance_rating.rate(insurance_type, age, risk_factors, guarantees)
+    premiums = rated.annual_premiums.tolist()
+    deductibles = rated.deductibles.tolist()
+
+    offers = []
+    for product, annual_premium, deductible in zip(rated.products, premiums, deductibles):
+        offers.append({
+            "company": format_company_data(product.insurance_company),
+            "product": {"id": product.id, "name": product.name, "type": product.type},
+            "monthly_premium": round(annual_premium / 12, 2),
+            "annual_premium": round(annual_premium, 2),
+            "deductible": deductible
+        })
+
+    offers.sort(key=lambda offer: (offer["annual_premium"], offer["product"]["id"]))
+    return {
+        "offers": offers[:limit],
+        "total_offers": len(offers),
+        "lowest_annual_premium": offers[0]["annual_premium"] if offers else None
+    }
+
+
+# Critère de classement de chaque catégorie : (liste d'offres, clé, sens, indicateur)
+RANKING_CRITERIA = {
+    "credit": ("comparisons", "monthly_payment", "lower", lambda offer: offer["bank"]["name"]),
+    "savings": ("offers", "final_amount", "higher", lambda offer: offer["bank"]["name"]),
+    "insurance": ("offers", "annual_premium", "lower", lambda offer: (offer["company"] or {}).get("name")),
+}
+
+
+def merged_ranking(sections: dict) -> List[dict]:
+    """
+    Classement unique des offres des trois catégories. Chaque offre est notée
+    par rapport à la meilleure de sa catégorie (1 = meilleure, mensualité ou
+    prime la plus basse, capital final le plus élevé), puis toutes sont triées
+    par note décroissante.
+    """
+    entries = []
+    for category, (list_key, metric, direction, institution) in RANKING_CRITERIA.items():
+        offers = sections.get(category, {}).get(list_key) or []
+        values = [offer[metric] for offer in offers]
+        if not values:
+            continue
+        best = min(values) if direction == "lower" else max(values)
+        for rank, (offer, value) in enumerate(zip(offers, values), start=1):
+            if value <= 0 or best <= 0:
+                score = 1.0 if value == best else 0.0
+            else:
+                score = best / value if direction == "lower" else value / best
+            entries.append({
+                "category": category,
+                "category_rank": rank,
+                "score": round(score, 4),
+                "product": {"id": offer["product"]["id"], "name": offer["product"]["name"]},
+                "institution": institution(offer),
+                "metric": metric,
+                "value": value
+            })
+
+    order = list(RANKING_CRITERIA)
+    entries.sort(key=lambda entry: (-entry["score"], entry["category_rank"], order.index(entry["category"])))
+    return entries
+
+
+@router.get("/all")
+async def compare_all(
+    # Crédit
+    credit_type: Optional[str] = Query(None, description="Type de crédit (section crédit omise si absent)"),
+    amount: float = Query(0, description="Montant du crédit souhaité", ge=0),
+    duration: int = Query(60, description="Durée du crédit en mois", ge=1, le=480),
+    monthly_income: float = Query(..., description="Revenus mensuels", gt=0),
+    current_debts: float = Query(0, description="Dettes actuelles mensuelles", ge=0),
+    sort_by: str = Query(
+        "monthly_payment",
+        pattern=f"^({'|'.join(COMPARE_SORT_KEYS)})$",
+        description="Critère de tri des offres de crédit"
+    ),
+    eligible_only: bool = Query(False, description="Ne renvoyer que les offres de crédit éligibles"),
+    # Épargne
+    savings_initial: Optional[float] = Query(None, description="Dépôt initial (section épargne omise si absent)", ge=0),
+    savings_monthly: float = Query(0, description="Versement mensuel", ge=0),
+    savings_duration: int = Query(60, description="Durée d'épargne en mois", ge=1, le=600),
+    # Assurance
+    insurance_type: Optional[str] = Query(None, description="Type d'assurance (section assurance omise si absent)"),
+    age: int = Query(35, description="Âge de l'assuré", ge=18, le=80),
+    guarantees: Optional[str] = Query(None, description="Garanties séparées par virgules"),
+    vehicle_value: Optional[float] = Query(None, description="Valeur du véhicule (auto, barème par défaut si absente)", gt=0),
+    property_value: Optional[float] = Query(None, description="Valeur du bien (habitation, barème par défaut si absente)", gt=0),
+    coverage_amount: Optional[float] = Query(None, description="Capital assuré (vie, barème par défaut si absent)", gt=0),
+    limit: int = Query(5, description="Nombre d'offres par catégorie", ge=1, le=50)
+):
+    """
+    Compare en une requête les offres de crédit, d'épargne et d'assurance
+    d'un profil ; les trois calculs s'exécutent en parallèle (pool de threads).
+    """
+    try:
+        start_time = time.perf_counter()
+        guarantee_list = [g.strip() for g in guarantees.split(',') if g.strip()] if guarantees else []
+        # Valeurs assurées déclarées ; sinon le moteur de tarification applique ses valeurs par défaut
+        insured_values = {
+            "vehicle_value": vehicle_value,
+            "property_value": property_value,
+            "coverage_amount": coverage_amount
+        }
+        risk_factors = {key: value for key, value in insured_values.items() if value is not None}
+
+        # Un seul instantané, transmis aux trois calculs : même version du catalogue partout
+        snapshot = catalog.get_snapshot()
+
+        tasks = {}
+        if credit_type:
+            tasks["credit"] = run_in_threadpool(
+                rank_credit_offers, credit_type, amount, duration, monthly_income,
+                current_debts, limit, sort_by, eligible_only, snapshot
+            )
+        if savings_initial is not None:
+            tasks["savings"] = run_in_threadpool(
+                rank_savings_offers, savings_initial, savings_monthly, savings_duration, limit, snapshot
+            )
+        if insurance_type:
+            tasks["insurance"] = run_in_threadpool(
+                rank_insurance_offers, insurance_type, age, risk_factors, guarantee_list, limit, snapshot
+            )
+
+        if not tasks:
+            raise HTTPException(
+                status_code=400,
+                detail="Indiquez au moins credit_type, savings_initial ou insurance_type"
+            )
+
+        # Une catégorie en erreur n'empêche pas de renvoyer les autres
+        outcomes = await asyncio.gather(*tasks.values(), return_exceptions=True)
+        sections = {}
+        for category, outcome in zip(tasks, outcomes):
+            if isinstance(outcome, Exception):
+                print(f"Erreur dans compare_all ({category}): {str(outcome)}")
+                sections[category] = {"error": str(outcome)}
+            else:
+                sections[category] = outcome
+
+        # Meilleure offre de chaque catégorie, en tête de réponse
+        highlights = {}
+        credit = sections.get("credit", {})
+        if credit.get("comparisons"):
+            highlights["credit"] = credit["comparisons"][0]
+        for category in ("savings", "insurance"):
+            offers = sections.get(category, {}).get("offers")
+            if offers:
+                highlights[category] = offers[0]
+
+        return {
+            "highlights": highlights,
+            "ranking": merged_ranking(sections),
+            **sections,
+            "profile": {
+                "monthly_income": monthly_income,
+                "current_debts": current_debts,
+                "credit_type": credit_type,
+                "amount": amount,
+                "duration": duration,
+                "savings_initial": savings_initial,
+                "savings_monthly": savings_monthly,
+                "savings_duration": savings_duration,
+                "insurance_type": insurance_type,
+                "age": age,
+                "guarantees": guarantee_list,
+                "insured_values": risk_factors,
+                "limit": limit
+            },
+            "catalog_version": snapshot.version,
+            "computation_time_ms": round((time.perf_counter() - start_time) * 1000, 2)
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Erreur dans compare_all: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Erreur lors de la comparaison globale: {str(e)}")
@@ -13,10 +13,18 @@ from schemas import (
     Message
 )
 import uuid
+import finance
 from datetime import datetime
 
 router = APIRouter(prefix="/admin/credit-products", tags=["credit_admin"]) 
 
+def _refresh_annuity_table(product: CreditProduct):
+    """Reconstruit la table de facteurs d'annuité du produit (retirée s'il est inactif)"""
+    if product.is_active:
+        finance.rebuild_product_table(product)
+    else:
+        finance.drop_product_table(product.id)
+
 @router.get("/", response_model=dict)
 def get_credit_products(
     db: Session = Depends(get_db),
@@ -181,6 +189,7 @@ def create_credit_product(
         db.add(new_product)
         db.commit()
         db.refresh(new_product)
+        _refresh_annuity_table(new_product)
         
         return {
             "message": "Produit de crédit créé avec succès",
@@ -283,6 +292,7 @@ def update_credit_product(
         
         db.commit()
         db.refresh(product)
+        _refresh_annuity_table(product)
         
         return {
             "message": "Produit de crédit mis à jour avec succès"
@@ -316,6 +326,7 @@ def delete_credit_product(
         
         db.delete(product)
         db.commit()
+        finance.drop_product_table(product_id)
         
         return {
             "message": "Produit de crédit supprimé avec succès"
@@ -1,39 +1,90 @@
 # routers/credits.py - Version corrigée avec gestion JSON
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import JSONResponse
 from decimal import Decimal
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
 from typing import List, Optional
+import numpy as np
+import heapq
 import math
 import uuid
 import json  # Ajouté pour la sérialisation JSON
 from datetime import datetime
 import models
 import schemas
+import finance
+import catalog
+import write_behind
 from database import get_db
 
 router = APIRouter()
 
+def _credit_request_error(request: schemas.CreditSimulationRequest, table: finance.ProductAnnuityTable) -> Optional[str]:
+    """Retourne le message d'erreur si la demande sort des bornes du produit (comparaison en centimes)"""
+    requested = finance.to_minor(request.requested_amount)
+    if requested < table.min_amount:
+        return f"Montant minimum: {finance.from_minor(table.min_amount):,.2f} FCFA"
+    if requested > table.max_amount:
+        return f"Montant maximum: {finance.from_minor(table.max_amount):,.2f} FCFA"
+    if request.duration_months < table.min_duration:
+        return f"Durée minimum: {table.min_duration} mois"
+    if request.duration_months > table.max_duration:
+        return f"Durée maximum: {table.max_duration} mois"
+    return None
+
+def _credit_quote(request: schemas.CreditSimulationRequest, table: finance.ProductAnnuityTable) -> dict:
+    """Mensualité, coûts (centimes entiers) et taux d'endettement d'une demande au taux moyen"""
+    loan = finance.to_minor(request.requested_amount) - finance.to_minor(request.down_payment or 0)
+    payment = table.payment_minor(loan, request.duration_months)
+    total_cost = payment * request.duration_months
+    debt_ratio = float(finance.ratio_percent(
+        payment + finance.to_minor(request.current_debts or 0),
+        finance.to_minor(request.monthly_income)
+    ))
+    return {
+        "loan": loan,
+        "payment": payment,
+        "total_cost": total_cost,
+        "total_interest": total_cost - loan,
+        "debt_ratio": debt_ratio
+    }
+
+def _max_debt_ratio(credit_product: models.CreditProduct) -> float:
+    """Taux d'endettement maximum accepté par le produit (33% par défaut)"""
+    return catalog.max_debt_ratio(credit_product)
+
+def _credit_recommendations(request: schemas.CreditSimulationRequest, debt_ratio: float) -> List[str]:
+    """Recommandations associées à une simulation de crédit"""
+    recommendations = []
+    if debt_ratio > 30:
+        recommendations.append("Votre taux d'endettement est élevé. Considérez réduire vos charges actuelles.")
+    if (request.down_payment or 0) / request.requested_amount < 0.1:
+        recommendations.append("Un apport personnel d'au moins 10% améliorerait vos conditions.")
+    if request.duration_months > 240:
+        recommendations.append("Durée longue : coût total élevé mais mensualités réduites.")
+    if debt_ratio < 25:
+        recommendations.append("Excellent profil ! Vous pourriez négocier de meilleures conditions.")
+    return recommendations
+
 @router.get("/products")
 async def get_credit_products(
     credit_type: Optional[str] = Query(None, description="Type de crédit"),
     min_amount: Optional[float] = Query(None, description="Montant minimum"),
-    max_amount: Optional[float] = Query(None, description="Montant maximum"),
-    db: Session = Depends(get_db)
+    max_amount: Optional[float] = Query(None, description="Montant maximum")
 ):
     """Récupère les produits de crédit avec filtres optionnels"""
     try:
-        query = db.query(models.CreditProduct).options(
-            joinedload(models.CreditProduct.bank)
-        ).filter(models.CreditProduct.is_active == True)
+        # Lecture depuis l'instantané du catalogue (aucun accès base)
+        products = [p for p in catalog.get_snapshot().credit_products.values() if p.is_active]
         
         if credit_type:
-            query = query.filter(models.CreditProduct.type.ilike(f"%{credit_type}%"))
+            credit_type_lower = credit_type.lower()
+            products = [p for p in products if credit_type_lower in (p.type or "").lower()]
         if min_amount is not None:
-            query = query.filter(models.CreditProduct.max_amount >= min_amount)
+            products = [p for p in products if p.max_amount >= min_amount]
         if max_amount is not None:
-            query = query.filter(models.CreditProduct.min_amount <= max_amount)
-        
-        products = query.all()
+            products = [p for p in products if p.min_amount <= max_amount]
         
         # Conversion explicite en dictionnaires
         products_data = []
@@ -90,142 +141,94 @@ async def get_credit_products(
         print(f"Erreur dans get_credit_products: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Erreur lors de la récupération des produits: {str(e)}")
 
+# Nombre de mensualités renvoyées en aperçu dans les réponses de simulation
+SCHEDULE_PREVIEW_MONTHS = 12
+
 @router.post("/simulate")
 async def simulate_credit(
     request: schemas.CreditSimulationRequest,
-    db: Session = Depends(get_db)
+    include_schedule: bool = Query(False, description="Inclure le tableau d'amortissement complet")
 ):
     """Simule un crédit"""
     try:
-        # Récupérer le produit de crédit
-        credit_product = db.query(models.CreditProduct).filter(
-            models.CreditProduct.id == request.credit_product_id
-        ).first()
+        # Récupérer le produit de crédit (instantané du catalogue)
+        credit_product = catalog.get_snapshot().credit_products.get(request.credit_product_id)
         
         if not credit_product:
             raise HTTPException(status_code=404, detail="Produit de crédit non trouvé")
         
-        # Validation des montants
-        if request.requested_amount < credit_product.min_amount:
-            raise HTTPException(
-                status_code=400, 
-                detail=f"Montant minimum: {credit_product.min_amount:,} FCFA"
-            )
-        
-        if request.requested_amount > credit_product.max_amount:
-            raise HTTPException(
-                status_code=400, 
-                detail=f"Montant maximum: {credit_product.max_amount:,} FCFA"
-            )
-        
-        # Validation de la durée
-        if request.duration_months < credit_product.min_duration_months:
-            raise HTTPException(
-                status_code=400, 
-                detail=f"Durée minimum: {credit_product.min_duration_months} mois"
-            )
-        
-        if request.duration_months > credit_product.max_duration_months:
-            raise HTTPException(
-                status_code=400, 
-                detail=f"Durée maximum: {credit_product.max_duration_months} mois"
-            )
-        
-        # Calculs de la simulation
-        loan_amount = request.requested_amount - (request.down_payment or 0)
-        monthly_rate = float(credit_product.average_rate) / 100 / 12
-        
-        # Calcul de la mensualité
-        if monthly_rate == 0:
-            monthly_payment = loan_amount / request.duration_months
-        else:
-            monthly_payment = loan_amount * (monthly_rate * (1 + monthly_rate) ** request.duration_months) / ((1 + monthly_rate) ** request.duration_months - 1)
+        # Validation des montants et de la durée
+        table = finance.product_table(credit_product)
+        validation_error = _credit_request_error(request, table)
+        if validation_error:
+            raise HTTPException(status_code=400, detail=validation_error)
         
-        # Calcul du taux d'endettement
-        total_monthly_payments = monthly_payment + (request.current_debts or 0)
-        debt_ratio = (total_monthly_payments / request.monthly_income) * 100
+        # Calculs en centimes entiers (table de facteurs précalculée, arrondi unique)
+        quote = _credit_quote(request, table)
+        debt_ratio = quote["debt_ratio"]
         
         # Vérification du taux d'endettement
-        max_debt_ratio = 33
-        if credit_product.eligibility_criteria and "max_debt_ratio" in credit_product.eligibility_criteria:
-            max_debt_ratio = credit_product.eligibility_criteria["max_debt_ratio"]
+        max_debt_ratio = _max_debt_ratio(credit_product)
         
         eligible = debt_ratio <= max_debt_ratio
         
-        # Calculs totaux
-        total_cost = monthly_payment * request.duration_months
-        total_interest = total_cost - loan_amount
-        
-        # Génération du tableau d'amortissement
-        amortization_schedule = []
-        remaining_balance = loan_amount
-        
-        for month in range(1, request.duration_months + 1):
-            interest_payment = remaining_balance * monthly_rate
-            principal_payment = monthly_payment - interest_payment
-            remaining_balance -= principal_payment
-            
-            amortization_schedule.append({
-                "month": month,
-                "payment": round(monthly_payment, 2),
-                "principal": round(principal_payment, 2),
-                "interest": round(interest_payment, 2),
-                "remaining_balance": round(max(0, remaining_balance), 2)
-            })
+        monthly_payment = finance.from_minor(quote["payment"])
+        total_cost = finance.from_minor(quote["total_cost"])
+        total_interest = finance.from_minor(quote["total_interest"])
+        applied_rate = table.rates["average"]
+        
+        # Génération du tableau d'amortissement (noyau vectorisé) : mêmes paramètres
+        # que la régénération depuis la ligne stockée (/api/simulations/credit/{id}/schedule)
+        # Sans include_schedule, seuls les mois de l'aperçu sont calculés
+        amortization_schedule = finance.amortization_schedule(
+            *finance.credit_schedule_terms(
+                request.requested_amount,
+                request.down_payment,
+                applied_rate,
+                request.duration_months,
+                monthly_payment
+            ),
+            last_month=None if include_schedule else SCHEDULE_PREVIEW_MONTHS
+        )
         
         # Génération des recommandations
-        recommendations = []
-        if debt_ratio > 30:
-            recommendations.append("Votre taux d'endettement est élevé. Considérez réduire vos charges actuelles.")
-        if (request.down_payment or 0) / request.requested_amount < 0.1:
-            recommendations.append("Un apport personnel d'au moins 10% améliorerait vos conditions.")
-        if request.duration_months > 240:
-            recommendations.append("Durée longue : coût total élevé mais mensualités réduites.")
-        if debt_ratio < 25:
-            recommendations.append("Excellent profil ! Vous pourriez négocier de meilleures conditions.")
-        
-        # CORRECTION: Sauvegarder la simulation avec conversion JSON explicite
-        simulation = models.CreditSimulation(
-            id=str(uuid.uuid4()),
-            credit_product_id=request.credit_product_id,
-            session_id=getattr(request, 'session_id', None),
-            requested_amount=request.requested_amount,
-            duration_months=request.duration_months,
-            monthly_income=request.monthly_income,
-            current_debts=request.current_debts or 0,
-            down_payment=request.down_payment or 0,
-            applied_rate=float(credit_product.average_rate),
-            monthly_payment=monthly_payment,
-            total_interest=total_interest,
-            total_cost=total_cost,
-            debt_ratio=debt_ratio,
-            eligible=eligible,
-            # CORRECTION: Convertir les listes en JSON
-            amortization_schedule=amortization_schedule,  # SQLAlchemy gérera la conversion automatiquement
-            recommendations=recommendations  # SQLAlchemy gérera la conversion automatiquement
-        )
+        recommendations = _credit_recommendations(request, debt_ratio)
+        
+        # Écriture différée (INSERT groupé en tâche de fond) : l'id est attribué ici
+        simulation_id = str(uuid.uuid4())
+        write_behind.enqueue(models.CreditSimulation, {
+            "id": simulation_id,
+            "credit_product_id": request.credit_product_id,
+            "session_id": getattr(request, 'session_id', None),
+            "requested_amount": request.requested_amount,
+            "duration_months": request.duration_months,
+            "monthly_income": request.monthly_income,
+            "current_debts": request.current_debts or 0,
+            "down_payment": request.down_payment or 0,
+            "applied_rate": applied_rate,
+            "monthly_payment": monthly_payment,
+            "total_interest": total_interest,
+            "total_cost": total_cost,
+            "debt_ratio": debt_ratio,
+            "eligible": eligible,
+            # Seuls les paramètres sont stockés : le tableau est recalculé à la lecture
+            "schedule_format": finance.SCHEDULE_FORMAT_VERSION,
+            "recommendations": recommendations
+        })
         
-        try:
-            db.add(simulation)
-            db.commit()
-            db.refresh(simulation)
-        except Exception as db_error:
-            print(f"Erreur base de données: {str(db_error)}")
-            db.rollback()
-            # En cas d'erreur DB, continuer sans sauvegarder
-            pass
-        
-        # Retourner la réponse sous forme de dictionnaire
+        # Réponse résumée : aperçu du tableau, le détail est servi par /api/simulations/credit/{id}/schedule
         response_data = {
-            "simulation_id": simulation.id,
-            "applied_rate": float(credit_product.average_rate),
-            "monthly_payment": round(float(monthly_payment), 2),
-            "total_interest": round(float(total_interest), 2),
-            "total_cost": round(float(total_cost), 2),
-            "debt_ratio": round(float(debt_ratio), 1),
+            "simulation_id": simulation_id,
+            "applied_rate": applied_rate,
+            "monthly_payment": monthly_payment,
+            "total_interest": total_interest,
+            "total_cost": total_cost,
+            "debt_ratio": round(debt_ratio, 1),
             "eligible": eligible,
             "recommendations": recommendations,
             "amortization_schedule": amortization_schedule,
+            "schedule_months": request.duration_months,
+            "schedule_url": f"/api/simulations/credit/{simulation_id}/schedule",
             "bank_info": {
                 "name": credit_product.bank.name,
                 "logo": credit_product.bank.logo_url
@@ -243,68 +246,42 @@ async def simulate_credit(
 # Méthode alternative sans sauvegarde en base
 @router.post("/simulate-light")
 async def simulate_credit_light(
-    request: schemas.CreditSimulationRequest,
-    db: Session = Depends(get_db)
+    request: schemas.CreditSimulationRequest
 ):
     """Simule un crédit sans sauvegarde en base de données"""
     try:
-        # Récupérer le produit de crédit
-        credit_product = db.query(models.CreditProduct).filter(
-            models.CreditProduct.id == request.credit_product_id
-        ).first()
+        # Récupérer le produit de crédit (instantané du catalogue)
+        credit_product = catalog.get_snapshot().credit_products.get(request.credit_product_id)
         
         if not credit_product:
             raise HTTPException(status_code=404, detail="Produit de crédit non trouvé")
         
         # Validation des montants et durée (même logique que simulate)
-        if request.requested_amount < credit_product.min_amount:
-            raise HTTPException(status_code=400, detail=f"Montant minimum: {credit_product.min_amount:,} FCFA")
-        
-        if request.requested_amount > credit_product.max_amount:
-            raise HTTPException(status_code=400, detail=f"Montant maximum: {credit_product.max_amount:,} FCFA")
-        
-        if request.duration_months < credit_product.min_duration_months:
-            raise HTTPException(status_code=400, detail=f"Durée minimum: {credit_product.min_duration_months} mois")
-        
-        if request.duration_months > credit_product.max_duration_months:
-            raise HTTPException(status_code=400, detail=f"Durée maximum: {credit_product.max_duration_months} mois")
+        table = finance.product_table(credit_product)
+        validation_error = _credit_request_error(request, table)
+        if validation_error:
+            raise HTTPException(status_code=400, detail=validation_error)
         
         # Calculs (même logique que simulate)
-        loan_amount = request.requested_amount - (request.down_payment or 0)
-        monthly_rate = float(credit_product.average_rate) / 100 / 12
-        
-        if monthly_rate == 0:
-            monthly_payment = loan_amount / request.duration_months
-        else:
-            monthly_payment = loan_amount * (monthly_rate * (1 + monthly_rate) ** request.duration_months) / ((1 + monthly_rate) ** request.duration_months - 1)
-        
-        total_monthly_payments = monthly_payment + (request.current_debts or 0)
-        debt_ratio = (total_monthly_payments / request.monthly_income) * 100
+        quote = _credit_quote(request, table)
+        debt_ratio = quote["debt_ratio"]
         
-        max_debt_ratio = 33
-        if credit_product.eligibility_criteria and isinstance(credit_product.eligibility_criteria, dict):
-            max_debt_ratio = credit_product.eligibility_criteria.get("max_debt_ratio", 33)
+        max_debt_ratio = _max_debt_ratio(credit_product)
         
         eligible = debt_ratio <= max_debt_ratio
-        total_cost = monthly_payment * request.duration_months
-        total_interest = total_cost - loan_amount
+        monthly_payment = finance.from_minor(quote["payment"])
         
         # Génération du tableau d'amortissement (limité aux 12 premiers mois pour optimiser)
-        amortization_schedule = []
-        remaining_balance = loan_amount
-        
-        for month in range(1, min(13, request.duration_months + 1)):  # Limité à 12 mois
-            interest_payment = remaining_balance * monthly_rate
-            principal_payment = monthly_payment - interest_payment
-            remaining_balance -= principal_payment
-            
-            amortization_schedule.append({
-                "month": month,
-                "payment": round(monthly_payment, 2),
-                "principal": round(principal_payment, 2),
-                "interest": round(interest_payment, 2),
-                "remaining_balance": round(max(0, remaining_balance), 2)
-            })
+        amortization_schedule = finance.amortization_schedule(
+            *finance.credit_schedule_terms(
+                request.requested_amount,
+                request.down_payment,
+                table.rates["average"],
+                request.duration_months,
+                monthly_payment
+            ),
+            last_month=SCHEDULE_PREVIEW_MONTHS
+        )
         
         # Recommandations
         recommendations = []
@@ -318,11 +295,11 @@ async def simulate_credit_light(
         # Retourner directement sans sauvegarde
         return {
             "simulation_id": f"temp_{str(uuid.uuid4())[:8]}",
-            "applied_rate": float(credit_product.average_rate),
-            "monthly_payment": round(float(monthly_payment), 2),
-            "total_interest": round(float(total_interest), 2),
-            "total_cost": round(float(total_cost), 2),
-            "debt_ratio": round(float(debt_ratio), 1),
+            "applied_rate": table.rates["average"],
+            "monthly_payment": monthly_payment,
+            "total_interest": finance.from_minor(quote["total_interest"]),
+            "total_cost": finance.from_minor(quote["total_cost"]),
+            "debt_ratio": round(debt_ratio, 1),
             "eligible": eligible,
             "recommendations": recommendations,
             "amortization_schedule": amortization_schedule,
@@ -338,128 +315,485 @@ async def simulate_credit_light(
         print(f"Erreur dans simulate_credit_light: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Erreur simulation: {str(e)}")
 
-@router.get("/compare")
-async def compare_credit_offers(
-    credit_type: str = Query(..., description="Type de crédit (immobilier, consommation, auto)"),
-    amount: float = Query(..., description="Montant souhaité", ge=0),
-    duration: int = Query(..., description="Durée en mois", ge=1, le=480),
-    monthly_income: float = Query(..., description="Revenus mensuels", gt=0),
-    current_debts: float = Query(0, description="Dettes actuelles mensuelles", ge=0),
+@router.post("/simulate-batch")
+async def simulate_credit_batch(
+    batch: schemas.CreditSimulationBatchRequest,
     db: Session = Depends(get_db)
 ):
-    """Compare les offres de crédit de différentes banques"""
+    """Simule plusieurs crédits en un appel (une requête produits, un calcul vectorisé)"""
     try:
-        # Récupérer les produits compatibles avec jointure sur bank
-        products = db.query(models.CreditProduct).options(
-            joinedload(models.CreditProduct.bank)
-        ).filter(
-            models.CreditProduct.type.ilike(f"%{credit_type}%"),
-            models.CreditProduct.min_amount <= amount,
-            models.CreditProduct.max_amount >= amount,
-            models.CreditProduct.min_duration_months <= duration,
-            models.CreditProduct.max_duration_months >= duration,
-            models.CreditProduct.is_active == True
-        ).join(models.Bank).filter(
-            models.Bank.is_active == True
-        ).all()
-        
-        if not products:
-            return {
-                "comparisons": [],
-                "message": f"Aucun produit trouvé pour {credit_type} - {amount:,.0f} FCFA sur {duration} mois"
-            }
-        
-        comparisons = []
+        # Produits référencés lus dans l'instantané du catalogue
+        products = catalog.get_snapshot().credit_products
+        
+        # Validation individuelle : les erreurs n'interrompent pas le lot
+        results = [None] * len(batch.simulations)
+        valid_indexes = []
+        for index, item in enumerate(batch.simulations):
+            credit_product = products.get(item.credit_product_id)
+            if not credit_product:
+                error = "Produit de crédit non trouvé"
+            else:
+                error = _credit_request_error(item, finance.product_table(credit_product))
+            
+            if error:
+                results[index] = {"index": index, "success": False, "error": error}
+            else:
+                valid_indexes.append(index)
         
-        for product in products:
-            try:
-                monthly_rate = float(product.average_rate) / 100 / 12
-                if monthly_rate == 0:
-                    monthly_payment = amount / duration
-                else:
-                    monthly_payment = amount * (monthly_rate * (1 + monthly_rate) ** duration) / ((1 + monthly_rate) ** duration - 1)
-                
-                total_cost = monthly_payment * duration
-                total_interest = total_cost - amount
-                debt_ratio = ((monthly_payment + current_debts) / monthly_income) * 100
-                
-                # Vérifier l'éligibilité
-                max_debt_ratio = 33
-                if product.eligibility_criteria and isinstance(product.eligibility_criteria, dict):
-                    max_debt_ratio = product.eligibility_criteria.get("max_debt_ratio", 33)
-                
-                eligible = debt_ratio <= max_debt_ratio
+        rows_to_insert = []
+        if valid_indexes:
+            items = [batch.simulations[index] for index in valid_indexes]
+            item_products = [products[item.credit_product_id] for item in items]
+            
+            item_tables = [finance.product_table(product) for product in item_products]
+            
+            # Calcul vectorisé en centimes entiers : une lecture de table par scénario, arrondi unique
+            loan_amounts = (
+                finance.to_minor_array([item.requested_amount for item in items])
+                - finance.to_minor_array([item.down_payment or 0 for item in items])
+            )
+            durations = np.array([item.duration_months for item in items], dtype=np.int64)
+            factors = np.array([table.factor(item.duration_months) for table, item in zip(item_tables, items)])
+            incomes = finance.to_minor_array([item.monthly_income for item in items])
+            debts = finance.to_minor_array([item.current_debts or 0 for item in items])
+            max_ratios = np.array([_max_debt_ratio(product) for product in item_products], dtype=np.float64)
+            
+            payments = finance.round_minor(loan_amounts * factors)
+            total_costs = payments * durations
+            total_interests = total_costs - loan_amounts
+            debt_ratios = finance.ratio_percent(payments + debts, incomes)
+            eligibles = (debt_ratios <= max_ratios).tolist()
+            
+            rates = [table.rates["average"] for table in item_tables]
+            payments_out = finance.from_minor(payments).tolist()
+            costs_out = finance.from_minor(total_costs).tolist()
+            interests_out = finance.from_minor(total_interests).tolist()
+            ratios_out = np.round(debt_ratios, 1).tolist()
+            raw_ratios = debt_ratios.tolist()
+            
+            for position, index in enumerate(valid_indexes):
+                item = items[position]
+                credit_product = item_products[position]
+                simulation_id = str(uuid.uuid4())
+                recommendations = _credit_recommendations(item, raw_ratios[position])
                 
-                comparison_data = {
-                    "bank": {
-                        "id": product.bank.id,
-                        "name": product.bank.name,
-                        "logo": product.bank.logo_url,
-                        "short_name": product.bank.name[:15] + "..." if len(product.bank.name) > 15 else product.bank.name
-                    },
-                    "product": {
-                        "id": product.id,
-                        "name": product.name,
-                        "rate": float(product.average_rate),
-                        "processing_time": product.processing_time_hours,
-                        "features": product.features or []
-                    },
-                    "monthly_payment": round(monthly_payment, 2),
-                    "total_cost": round(total_cost, 2),
-                    "total_interest": round(total_interest, 2),
-                    "debt_ratio": round(debt_ratio, 1),
-                    "eligible": eligible,
-                    "savings_vs_best": 0  # Calculé après tri
+                results[index] = {
+                    "index": index,
+                    "success": True,
+                    "simulation_id": simulation_id,
+                    "credit_product_id": item.credit_product_id,
+                    "applied_rate": rates[position],
+                    "monthly_payment": payments_out[position],
+                    "total_interest": interests_out[position],
+                    "total_cost": costs_out[position],
+                    "debt_ratio": ratios_out[position],
+                    "eligible": eligibles[position],
+                    "recommendations": recommendations,
+                    "bank_info": {
+                        "name": credit_product.bank.name,
+                        "logo": credit_product.bank.logo_url
+                    } if credit_product.bank else None
                 }
-                comparisons.append(comparison_data)
                 
-            except Exception as calc_error:
-                print(f"Erreur calcul pour produit {product.id}: {calc_error}")
-                continue
+                if batch.persist:
+                    rows_to_insert.append({
+                        "id": simulation_id,
+                        "credit_product_id": item.credit_product_id,
+                        "session_id": item.session_id,
+                        "requested_amount": item.requested_amount,
+                        "duration_months": item.duration_months,
+                        "monthly_income": item.monthly_income,
+                        "current_debts": item.current_debts or 0,
+                        "down_payment": item.down_payment or 0,
+                        "applied_rate": rates[position],
+                        "monthly_payment": payments_out[position],
+                        "total_interest": interests_out[position],
+                        "total_cost": costs_out[position],
+                        "debt_ratio": ratios_out[position],
+                        "eligible": eligibles[position],
+                        "recommendations": recommendations,
+                        "schedule_format": finance.SCHEDULE_FORMAT_VERSION
+                    })
+        
+        # Sauvegarde optionnelle en un seul INSERT multi-lignes
+        persisted = False
+        if rows_to_insert:
+            try:
+                db.execute(insert(models.CreditSimulation), rows_to_insert)
+                db.commit()
+                persisted = True
+            except Exception as db_error:
+                print(f"Erreur base de données (lot): {str(db_error)}")
+                db.rollback()
+        
+        succeeded = len(valid_indexes)
+        return {
+            "results": results,
+            "statistics": {
+                "total": len(results),
+                "succeeded": succeeded,
+                "failed": len(results) - succeeded,
+                "eligible": sum(1 for r in results if r.get("eligible"))
+            },
+            "persisted": persisted
+        }
         
-        if not comparisons:
-            return {
-                "comparisons": [],
-                "message": "Erreur dans les calculs de comparaison"
-            }
+    except Exception as e:
+        print(f"Erreur dans simulate_credit_batch: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Erreur lors de la simulation groupée: {str(e)}")
+
+@router.get("/sensitivity-grid")
+async def get_sensitivity_grid(
+    credit_product_id: Optional[str] = Query(None, description="Produit dont les bornes définissent la grille"),
+    amount_min: Optional[float] = Query(None, description="Montant minimum", gt=0),
+    amount_max: Optional[float] = Query(None, description="Montant maximum", gt=0),
+    amount_steps: int = Query(50, description="Nombre de montants", ge=1, le=200),
+    duration_min: Optional[int] = Query(None, description="Durée minimum (mois)", ge=1, le=480),
+    duration_max: Optional[int] = Query(None, description="Durée maximum (mois)", ge=1, le=480),
+    duration_steps: int = Query(40, description="Nombre de durées", ge=1, le=200),
+    rate_min: Optional[float] = Query(None, description="Taux minimum (%)", ge=0, le=50),
+    rate_max: Optional[float] = Query(None, description="Taux maximum (%)", ge=0, le=50),
+    rate_steps: int = Query(10, description="Nombre de taux", ge=1, le=50),
+    monthly_income: Optional[float] = Query(None, description="Revenus mensuels (pour le taux d'endettement)", gt=0),
+    current_debts: float = Query(0, description="Dettes actuelles mensuelles", ge=0)
+):
+    """Matrice mensualité / coût total / endettement sur montant × durée × taux"""
+    try:
+        # Bornes par défaut issues du produit si demandé
+        if credit_product_id:
+            credit_product = catalog.get_snapshot().credit_products.get(credit_product_id)
+            if not credit_product:
+                raise HTTPException(status_code=404, detail="Produit de crédit non trouvé")
+            
+            average_rate = float(credit_product.average_rate)
+            amount_min = amount_min or float(credit_product.min_amount)
+            amount_max = amount_max or float(credit_product.max_amount)
+            duration_min = duration_min or credit_product.min_duration_months
+            duration_max = duration_max or credit_product.max_duration_months
+            rate_min = rate_min if rate_min is not None else float(credit_product.min_rate or average_rate)
+            rate_max = rate_max if rate_max is not None else float(credit_product.max_rate or average_rate)
+        
+        if None in (amount_min, amount_max, duration_min, duration_max, rate_min, rate_max):
+            raise HTTPException(
+                status_code=400,
+                detail="Fournissez un credit_product_id ou les bornes montant, durée et taux"
+            )
         
-        # Trier par mensualité croissante
-        comparisons.sort(key=lambda x: x["monthly_payment"])
+        if amount_min > amount_max or duration_min > duration_max or rate_min > rate_max:
+            raise HTTPException(status_code=400, detail="Chaque minimum doit être inférieur ou égal au maximum")
         
-        # Calculer les économies par rapport à la meilleure offre
-        best_monthly = comparisons[0]["monthly_payment"]
-        for comp in comparisons:
-            comp["savings_vs_best"] = round(comp["monthly_payment"] - best_monthly, 2)
+        # Axes de la grille
+        amounts = np.unique(np.round(np.linspace(amount_min, amount_max, amount_steps)))
+        durations = np.unique(np.round(np.linspace(duration_min, duration_max, duration_steps)).astype(np.int64))
+        rates = np.unique(np.round(np.linspace(rate_min, rate_max, rate_steps), 2))
         
-        # Statistiques
-        eligible_offers = [c for c in comparisons if c["eligible"]]
+        # Formule d'annuité diffusée sur les trois axes [montant][durée][taux]
+        payments = finance.monthly_payments(
+            amounts[:, None, None], rates[None, None, :], durations[None, :, None]
+        )
+        total_costs = payments * durations[None, :, None]
         
-        result = {
-            "comparisons": comparisons,
-            "statistics": {
-                "total_offers": len(comparisons),
-                "eligible_offers": len(eligible_offers),
-                "best_rate": min(comparisons, key=lambda x: x["product"]["rate"])["product"]["rate"] if comparisons else 0,
-                "average_rate": round(sum(c["product"]["rate"] for c in comparisons) / len(comparisons), 2) if comparisons else 0,
-                "lowest_monthly": comparisons[0]["monthly_payment"] if comparisons else 0,
-                "highest_monthly": comparisons[-1]["monthly_payment"] if comparisons else 0,
-                "max_savings": comparisons[-1]["monthly_payment"] - comparisons[0]["monthly_payment"] if len(comparisons) > 1 else 0
+        grid = {
+            "monthly_payment": np.round(payments, 2).tolist(),
+            "total_cost": np.round(total_costs, 2).tolist(),
+            "total_interest": np.round(total_costs - amounts[:, None, None], 2).tolist(),
+            "debt_ratio": None
+        }
+        if monthly_income:
+            grid["debt_ratio"] = np.round((payments + current_debts) / monthly_income * 100, 1).tolist()
+        
+        payload = {
+            "axes": {
+                "amounts": amounts.tolist(),
+                "durations": durations.tolist(),
+                "rates": rates.tolist()
             },
-            "search_params": {
-                "credit_type": credit_type,
-                "amount": amount,
-                "duration": duration,
+            "shape": [len(amounts), len(durations), len(rates)],
+            "layout": "amount, duration, rate",
+            "grid": grid,
+            "parameters": {
+                "credit_product_id": credit_product_id,
                 "monthly_income": monthly_income,
                 "current_debts": current_debts
             }
         }
         
-        return result
+        # Listes de flottants déjà sérialisables : on évite jsonable_encoder.
+        # Résultat déterministe pour des paramètres donnés : cacheable côté navigateur/proxy
+        return JSONResponse(content=payload, headers={"Cache-Control": "public, max-age=300"})
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Erreur dans get_sensitivity_grid: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Erreur lors du calcul de la grille: {str(e)}")
+
+# Critères de tri de /compare (clé croissante)
+COMPARE_SORT_KEYS = ("monthly_payment", "total_cost", "rate", "processing_time")
+
+def rank_credit_offers(
+    credit_type: str,
+    amount: float,
+    duration: int,
+    monthly_income: float,
+    current_debts: float = 0,
+    limit: Optional[int] = None,
+    sort_by: str = "monthly_payment",
+    eligible_only: bool = False,
+    snapshot: Optional[catalog.CatalogSnapshot] = None
+) -> dict:
+    """Classement des offres de crédit pour un profil (calcul pur sur l'instantané du catalogue)"""
+    if snapshot is None:
+        snapshot = catalog.get_snapshot()
+    amount_minor = finance.to_minor(amount)
+    
+    # Chemin rapide : combinaison précalculée dans la table des meilleures offres
+    best_offers = snapshot.best_offers.lookup(credit_type, amount, duration)
+    if best_offers is not None:
+        products, tables, factors = best_offers.products, best_offers.tables, best_offers.factors
+        max_ratios, payments = best_offers.max_ratios, best_offers.payments
+    else:
+        # Produits éligibles via l'index par type / montant / durée de l'instantané du catalogue
+        products = snapshot.credit_index.match(credit_type, amount, duration)
+        
+        if not products:
+            return {
+                "comparisons": [],
+                "message": f"Aucun produit trouvé pour {credit_type} - {amount:,.0f} FCFA sur {duration} mois"
+            }
+        
+        tables = [finance.product_table(product) for product in products]
+        factors = np.array([table.factor(duration) for table in tables])
+        max_ratios = np.array([_max_debt_ratio(product) for product in products], dtype=np.float64)
+        payments = None
+    
+    income_minor = finance.to_minor(monthly_income)
+    debts_minor = finance.to_minor(current_debts)
+    rates_bp = [table.rate_bp["average"] for table in tables]
+    
+    # Pré-filtre d'accessibilité : mensualité maximale supportable par produit
+    # (revenus x taux d'endettement max - charges), comparée à montant x facteur.
+    # Marge d'un centime pour l'arrondi : aucun produit éligible n'est écarté.
+    raw_payments = amount_minor * factors
+    if eligible_only:
+        positions = np.flatnonzero(raw_payments <= income_minor * max_ratios / 100 - debts_minor + 1)
+    else:
+        positions = np.arange(len(products))
+    
+    # Chiffres complets (centimes entiers, arrondi unique) sur les seules offres retenues
+    if payments is not None:
+        survivor_payments = payments[positions]
+    else:
+        survivor_payments = finance.round_minor(raw_payments[positions])
+    debt_ratios = finance.ratio_percent(survivor_payments + debts_minor, income_minor)
+    eligible_mask = debt_ratios <= max_ratios[positions]
+    
+    positions_list = positions.tolist()
+    payments_by_position = dict(zip(positions_list, survivor_payments.tolist()))
+    ratios_by_position = dict(zip(positions_list, debt_ratios.tolist()))
+    eligibles = dict(zip(positions_list, eligible_mask.tolist()))
+    
+    # Statistiques sur toutes les offres : l'arrondi étant monotone, les
+    # mensualités extrêmes viennent des facteurs extrêmes
+    eligible_count = int(eligible_mask.sum())
+    rate_sum = sum(rates_bp)
+    best_rate = min(rates_bp)
+    lowest = finance.round_minor(raw_payments.min())
+    highest = finance.round_minor(raw_payments.max())
+    candidates = [position for position in positions_list if eligibles[position] or not eligible_only]
+    
+    sort_keys = {
+        "monthly_payment": lambda position: (payments_by_position[position], position),
+        "total_cost": lambda position: (payments_by_position[position] * duration, position),
+        "rate": lambda position: (rates_bp[position], payments_by_position[position], position),
+        "processing_time": lambda position: (
+            products[position].processing_time_hours if products[position].processing_time_hours is not None else math.inf,
+            payments_by_position[position],
+            position
+        ),
+    }
+    
+    # Sélection top-k par tas borné (O(n log k)), tri complet sans limite
+    if limit is not None and limit < len(candidates):
+        selected = heapq.nsmallest(limit, candidates, key=sort_keys[sort_by])
+    else:
+        selected = sorted(candidates, key=sort_keys[sort_by])
+    
+    comparisons = []
+    for position in selected:
+        product = products[position]
+        payment = payments_by_position[position]
+        comparison_data = {
+            "bank": {
+                "id": product.bank.id,
+                "name": product.bank.name,
+                "logo": product.bank.logo_url,
+                "short_name": product.bank.name[:15] + "..." if len(product.bank.name) > 15 else product.bank.name
+            },
+            "product": {
+                "id": product.id,
+                "name": product.name,
+                "rate": finance.bp_to_percent(rates_bp[position]),
+                "processing_time": product.processing_time_hours,
+                "features": product.features or []
+            },
+            "monthly_payment": finance.from_minor(payment),
+            "total_cost": finance.from_minor(payment * duration),
+            "total_interest": finance.from_minor(payment * duration - amount_minor),
+            "debt_ratio": round(ratios_by_position[position], 1),
+            "eligible": eligibles[position],
+            "savings_vs_best": finance.from_minor(payment - lowest)
+        }
+        comparisons.append(comparison_data)
+    
+    total_offers = len(products)
+    result = {
+        "comparisons": comparisons,
+        "statistics": {
+            "total_offers": total_offers,
+            "eligible_offers": eligible_count,
+            "returned_offers": len(comparisons),
+            "best_rate": finance.bp_to_percent(best_rate),
+            "average_rate": round(rate_sum / total_offers / finance.BASIS_POINTS, 2),
+            "lowest_monthly": finance.from_minor(lowest),
+            "highest_monthly": finance.from_minor(highest),
+            "max_savings": finance.from_minor(highest - lowest)
+        },
+        "search_params": {
+            "credit_type": credit_type,
+            "amount": amount,
+            "duration": duration,
+            "monthly_income": monthly_income,
+            "current_debts": current_debts,
+            "limit": limit,
+            "sort_by": sort_by,
+            "eligible_only": eligible_only
+        }
+    }
+    
+    return result
+
+@router.get("/compare")
+async def compare_credit_offers(
+    credit_type: str = Query(..., description="Type de crédit (immobilier, consommation, auto)"),
+    amount: float = Query(..., description="Montant souhaité", ge=0),
+    duration: int = Query(..., description="Durée en mois", ge=1, le=480),
+    monthly_income: float = Query(..., description="Revenus mensuels", gt=0),
+    current_debts: float = Query(0, description="Dettes actuelles mensuelles", ge=0),
+    limit: Optional[int] = Query(None, description="Nombre maximum d'offres renvoyées", ge=1, le=100),
+    sort_by: str = Query(
+        "monthly_payment",
+        pattern=f"^({'|'.join(COMPARE_SORT_KEYS)})$",
+        description="Critère de tri croissant"
+    ),
+    eligible_only: bool = Query(False, description="Ne renvoyer que les offres éligibles")
+):
+    """Compare les offres de crédit de différentes banques"""
+    try:
+        return rank_credit_offers(
+            credit_type, amount, duration, monthly_income, current_debts, limit, sort_by, eligible_only
+        )
         
     except Exception as e:
         print(f"Erreur dans compare_credit_offers: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Erreur lors de la comparaison: {str(e)}")
 
+# Combinaison mise en avant par type sur la page d'accueil (montant FCFA, durée en mois)
+FEATURED_OFFER_POINTS = {
+    "consommation": (5_000_000, 36),
+    "auto": (10_000_000, 60),
+    "travaux": (10_000_000, 60),
+    "professionnel": (20_000_000, 60),
+    "immobilier": (50_000_000, 240),
+}
+
+def _best_offer_summary(entry: catalog.BestOffersEntry, limit: int) -> dict:
+    """Meilleures offres d'une tranche précalculée, par mensualité croissante"""
+    return {
+        "amount": entry.amount,
+        "duration": entry.duration,
+        "offers": [
+            {
+                "bank": {"id": entry.products[position].bank.id, "name": entry.products[position].bank.name,
+                         "logo": entry.products[position].bank.logo_url},
+                "product": {"id": entry.products[position].id, "name": entry.products[position].name,
+                            "rate": entry.tables[position].rates["average"]},
+                "monthly_payment": finance.from_minor(entry.payments[position]),
+                "total_cost": finance.from_minor(entry.payments[position] * entry.duration)
+            }
+            for position in entry.ranking[:limit]
+        ]
+    }
+
+@router.get("/best-offers")
+async def get_best_offers(
+    credit_type: Optional[str] = Query(None, description="Type de crédit (tous les types si absent)"),
+    amount: Optional[float] = Query(None, description="Montant indicatif (tranche)", gt=0),
+    duration: Optional[int] = Query(None, description="Durée indicative en mois (tranche)", ge=1, le=480),
+    limit: int = Query(3, description="Nombre d'offres par type", ge=1, le=20)
+):
+    """Meilleures offres par type de crédit, lues dans la table précalculée (page d'accueil)"""
+    try:
+        snapshot = catalog.get_snapshot()
+        best_offers = snapshot.best_offers
+        
+        if credit_type:
+            credit_types = snapshot.credit_index.types_matching(credit_type)
+        else:
+            credit_types = sorted(snapshot.credit_index.by_type)
+        
+        results = []
+        for key in credit_types:
+            members = snapshot.credit_index.by_type[key][0]
+            point = (amount, duration) if amount and duration else FEATURED_OFFER_POINTS.get(key)
+            entry = best_offers.bucket(key, *point) if point else None
+            results.append({
+                "credit_type": key,
+                "products_count": len(members),
+                "best_rate": min(finance.product_table(product).rates["average"] for product in members),
+                "featured": _best_offer_summary(entry, limit) if entry else None
+            })
+        
+        return {"best_offers": results, "catalog_version": snapshot.version}
+        
+    except Exception as e:
+        print(f"Erreur dans get_best_offers: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Erreur lors de la récupération des meilleures offres: {str(e)}")
+
+def _affordable_capacities(budget_minor: int, rate_bp: int, durations, insurance_rate: float):
+    """
+    Capacités d'emprunt (centimes, arrondies au FCFA inférieur) avec leurs mensualités
+    et assurances : une fois arrondies au centime, elles ne dépassent jamais le budget
+    """
+    durations = np.asarray(durations)
+    capacities = np.floor(
+        finance.borrowing_capacities(budget_minor, finance.bp_to_percent(rate_bp), durations, insurance_rate)
+        / finance.MINOR_UNITS
+    ).astype(np.int64) * finance.MINOR_UNITS
+    while True:
+        monthly_payments = finance.payments_minor(capacities, rate_bp, durations)
+        monthly_insurance = finance.round_minor(capacities * insurance_rate / 100 / 12)
+        # Arrondi au centime de la mensualité et de l'assurance : au plus quelques FCFA à retirer
+        over_budget = (monthly_payments + monthly_insurance > budget_minor) & (capacities > 0)
+        if not over_budget.any():
+            return capacities, monthly_payments, monthly_insurance
+        capacities = np.where(over_budget, capacities - finance.MINOR_UNITS, capacities)
+
+def _capacity_curve(budget_minor: int, rate_bp: int, insurance_rate: float, step: int = 1) -> dict:
+    """Capacité d'emprunt pour chaque durée de 6 à 360 mois, en un calcul vectorisé (centimes)"""
+    durations = np.arange(6, 361, step)
+    capacities, monthly_payments, monthly_insurance = _affordable_capacities(
+        budget_minor, rate_bp, durations, insurance_rate
+    )
+    
+    return {
+        "durations": durations.tolist(),
+        "borrowing_capacity": finance.from_minor(capacities).tolist(),
+        "monthly_payment": finance.from_minor(monthly_payments).tolist(),
+        "monthly_insurance": finance.from_minor(monthly_insurance).tolist(),
+        "total_interest": np.round(finance.from_minor(monthly_payments * durations - capacities), 0).tolist()
+    }
+
 @router.get("/borrowing-capacity")
 async def calculate_borrowing_capacity(
     monthly_income: float = Query(..., description="Revenus mensuels nets", gt=0),
@@ -470,15 +804,19 @@ async def calculate_borrowing_capacity(
     down_payment: float = Query(0, description="Apport personnel", ge=0),
     include_insurance: bool = Query(True, description="Inclure assurance emprunteur"),
     insurance_rate: float = Query(0.36, description="Taux d'assurance (% du capital)", ge=0, le=2),
-    db: Session = Depends(get_db)
+    include_curve: bool = Query(False, description="Inclure la courbe capacité / durée (6 à 360 mois)"),
+    curve_step: int = Query(1, description="Pas de la courbe en mois", ge=1, le=60)
 ):
     """Calcule la capacité d'emprunt maximale"""
     try:
-        # Calcul du revenu disponible pour le crédit
-        max_monthly_debt = (monthly_income * max_debt_ratio / 100)
-        available_for_credit = max_monthly_debt - current_debts
-        
-        if available_for_credit <= 0:
+        # Calcul du revenu disponible pour le crédit (centimes entiers)
+        income_minor = finance.to_minor(monthly_income)
+        debts_minor = finance.to_minor(current_debts)
+        rate_bp = finance.to_bp(interest_rate)
+        budget_minor = finance.round_minor(income_minor * max_debt_ratio / 100) - debts_minor
+        available_for_credit = finance.from_minor(budget_minor)
+        
+        if budget_minor <= 0:
             return {
                 "borrowing_capacity": 0,
                 "max_monthly_payment": 0,
@@ -496,66 +834,31 @@ async def calculate_borrowing_capacity(
                 }
             }
         
-        # Calcul de la capacité d'emprunt
-        monthly_payment_budget = available_for_credit
-        
-        # Si assurance incluse, ajuster le budget
-        if include_insurance and insurance_rate > 0:
-            # Estimation itérative pour inclure l'assurance
-            estimated_capital = 0
-            for _ in range(5):  # Convergence rapide
-                monthly_rate = interest_rate / 100 / 12
-                if monthly_rate == 0:
-                    temp_capital = monthly_payment_budget * duration_months
-                else:
-                    temp_capital = monthly_payment_budget * ((1 - (1 + monthly_rate) ** -duration_months) / monthly_rate)
-                
-                monthly_insurance = (temp_capital * insurance_rate / 100) / 12
-                available_for_loan_payment = monthly_payment_budget - monthly_insurance
-                
-                if available_for_loan_payment <= 0:
-                    estimated_capital = 0
-                    break
-                
-                if monthly_rate == 0:
-                    estimated_capital = available_for_loan_payment * duration_months
-                else:
-                    estimated_capital = available_for_loan_payment * ((1 - (1 + monthly_rate) ** -duration_months) / monthly_rate)
-                
-                if abs(estimated_capital - temp_capital) < 1000:
-                    break
-            
-            borrowing_capacity = max(0, estimated_capital)
-            monthly_insurance_cost = (borrowing_capacity * insurance_rate / 100) / 12
-        else:
-            monthly_rate = interest_rate / 100 / 12
-            if monthly_rate == 0:
-                borrowing_capacity = monthly_payment_budget * duration_months
-            else:
-                borrowing_capacity = monthly_payment_budget * ((1 - (1 + monthly_rate) ** -duration_months) / monthly_rate)
-            monthly_insurance_cost = 0
+        # Solveur analytique : mensualité et assurance sont linéaires en capital.
+        # La capacité est arrondie au FCFA inférieur ; le reste est dérivé en centimes.
+        applied_insurance_rate = insurance_rate if include_insurance else 0
+        capacities, payments, insurances = _affordable_capacities(
+            budget_minor, rate_bp, [duration_months], applied_insurance_rate
+        )
+        capacity_minor = int(capacities[0])
+        payment_minor = int(payments[0])
+        insurance_minor = int(insurances[0])
         
         # Calculs des coûts
-        if borrowing_capacity > 0:
-            monthly_rate = interest_rate / 100 / 12
-            if monthly_rate == 0:
-                actual_monthly_payment = borrowing_capacity / duration_months
-            else:
-                actual_monthly_payment = borrowing_capacity * (monthly_rate * (1 + monthly_rate) ** duration_months) / ((1 + monthly_rate) ** duration_months - 1)
-            
-            total_interest = (actual_monthly_payment * duration_months) - borrowing_capacity
-            total_cost = actual_monthly_payment * duration_months
-            total_with_insurance = total_cost + (monthly_insurance_cost * duration_months)
-            actual_debt_ratio = ((actual_monthly_payment + monthly_insurance_cost + current_debts) / monthly_income) * 100
+        if capacity_minor > 0:
+            total_cost_minor = payment_minor * duration_months
+            total_interest_minor = total_cost_minor - capacity_minor
+            total_with_insurance_minor = total_cost_minor + insurance_minor * duration_months
+            actual_debt_ratio = float(finance.ratio_percent(payment_minor + insurance_minor + debts_minor, income_minor))
         else:
-            actual_monthly_payment = 0
-            total_interest = 0
-            total_cost = 0
-            total_with_insurance = 0
+            total_interest_minor = 0
+            total_with_insurance_minor = 0
             actual_debt_ratio = (current_debts / monthly_income) * 100
         
+        borrowing_capacity = finance.from_minor(capacity_minor)
+        
         # Total du projet
-        total_project_capacity = borrowing_capacity + down_payment
+        total_project_capacity = finance.from_minor(capacity_minor + finance.to_minor(down_payment))
         
         # Recommandations personnalisées
         recommendations = []
@@ -574,19 +877,19 @@ async def calculate_borrowing_capacity(
                 recommendations.append("Un apport de 10-20% améliorerait vos conditions de financement.")
         
         result = {
-            "borrowing_capacity": round(borrowing_capacity, 0),
-            "max_monthly_payment": round(actual_monthly_payment + monthly_insurance_cost, 2),
+            "borrowing_capacity": borrowing_capacity,
+            "max_monthly_payment": finance.from_minor(payment_minor + insurance_minor),
             "total_project_capacity": round(total_project_capacity, 0),
             "debt_ratio": round(actual_debt_ratio, 1),
-            "monthly_insurance": round(monthly_insurance_cost, 2),
-            "total_interest": round(total_interest, 0),
-            "total_cost": round(total_with_insurance, 0),
+            "monthly_insurance": finance.from_minor(insurance_minor),
+            "total_interest": round(finance.from_minor(total_interest_minor), 0),
+            "total_cost": round(finance.from_minor(total_with_insurance_minor), 0),
             "effective_rate": round(interest_rate + (insurance_rate if include_insurance else 0), 2),
             "recommendations": recommendations,
             "details": {
                 "monthly_income": monthly_income,
                 "current_debts": current_debts,
-                "available_for_credit": round(available_for_credit, 2),
+                "available_for_credit": available_for_credit,
                 "down_payment": down_payment,
                 "duration_months": duration_months,
                 "duration_years": round(duration_months / 12, 1),
@@ -596,6 +899,11 @@ async def calculate_borrowing_capacity(
             }
         }
         
+        if include_curve:
+            result["capacity_curve"] = _capacity_curve(
+                budget_minor, rate_bp, applied_insurance_rate, curve_step
+            )
+        
         return result
         
     except Exception as e:
@@ -613,6 +921,8 @@ async def test_credits_endpoint():
             "/products - Liste des produits de crédit",
             "/simulate - Simulation d'un crédit spécifique", 
             "/simulate-light - Simulation sans sauvegarde DB",
+            "/simulate-batch - Simulations groupées (vectorisées)",
+            "/sensitivity-grid - Grille mensualités montant × durée × taux",
             "/compare - Comparaison d'offres de crédit",
             "/borrowing-capacity - Calcul de capacité d'emprunt",
             "/test - Test du router"
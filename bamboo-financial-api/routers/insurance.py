@@ -5,8 +5,13 @@ from sqlalchemy import and_, or_
 from typing import List, Optional, Dict, Any
 from database import get_db
 from models import InsuranceProduct, InsuranceCompany, InsuranceQuote
+import catalog
+import quote_cache
+import rating
+import write_behind
 import uuid
 from datetime import datetime, timedelta
+from functools import partial
 import json
 
 router = APIRouter()
@@ -123,7 +128,7 @@ def get_insurance_companies(
         raise HTTPException(status_code=500, detail=f"Erreur lors de la récupération des compagnies: {str(e)}")
 
 @router.post("/quote")
-def create_insurance_quote(quote_request: dict, db: Session = Depends(get_db)):
+def create_insurance_quote(quote_request: dict):
     """
     Créer un devis d'assurance adapté au parcours par étapes
     """
@@ -148,64 +153,93 @@ def create_insurance_quote(quote_request: dict, db: Session = Depends(get_db)):
         if not selected_insurers:
             raise HTTPException(status_code=400, detail="Au moins un assureur doit être sélectionné")
         
-        # Calcul de la prime avec garanties
-        premium = calculate_premium_with_guarantees(insurance_type, age, risk_factors, guarantees)
-        
-        # Génération du devis principal
+        session_id = session_id or str(uuid.uuid4())
         quote_id = str(uuid.uuid4())
+        created_at = datetime.now()
+        
+        # Profil déjà tarifé sur ce catalogue et devis encore valide : pas de recalcul
+        snapshot = catalog.get_snapshot()
+        profile_key = quote_cache.profile_key(
+            insurance_type, age, guarantees, risk_factors, selected_insurers, snapshot.fingerprint
+        )
+        cached = quote_cache.get(profile_key)
+        on_written = None
         
-        # Sauvegarde en base
-        try:
-            quote = InsuranceQuote(
-                id=quote_id,
-                session_id=session_id or str(uuid.uuid4()),
-                insurance_type=insurance_type,
-                age=age,
-                risk_factors=risk_factors,
-                monthly_premium=premium / 12,
-                annual_premium=premium,
-                deductible=calculate_deductible(insurance_type),
-                coverage_details=get_coverage_for_guarantees(insurance_type, guarantees),
-                exclusions=get_default_exclusions(insurance_type),
-                valid_until=datetime.now() + timedelta(days=30),
-                created_at=datetime.now()
+        if cached is not None:
+            rows = quote_cache.referencing_rows(cached, quote_id, {
+                "session_id": session_id,
+                "risk_factors": risk_factors,
+                "created_at": created_at
+            })
+            new_ids = {row["source_quote_id"]: row["id"] for row in rows}
+            response = {
+                **cached.response,
+                "quotes": [{**quote, "quote_id": new_ids[quote["quote_id"]]} for quote in cached.response["quotes"]]
+            }
+        else:
+            # Calcul de la prime avec garanties
+            premium = calculate_premium_with_guarantees(insurance_type, age, risk_factors, guarantees)
+            valid_until = created_at + timedelta(days=30)
+            coverage_details = get_coverage_for_guarantees(insurance_type, guarantees)
+            
+            quote_row = {
+                "id": quote_id,
+                "session_id": session_id,
+                "insurance_product_id": None,
+                "insurance_type": insurance_type,
+                "age": age,
+                "risk_factors": risk_factors,
+                "monthly_premium": premium / 12,
+                "annual_premium": premium,
+                "deductible": calculate_deductible(insurance_type),
+                "coverage_details": coverage_details,
+                "exclusions": get_default_exclusions(insurance_type),
+                "source_quote_id": None,
+                "valid_until": valid_until,
+                "created_at": created_at
+            }
+            
+            # Devis réels : tous les produits des assureurs sélectionnés, tarifés en un lot
+            quotes_alternatives, product_rows = generate_insurer_quotes(
+                snapshot, selected_insurers, insurance_type, age, risk_factors, guarantees, quote_row
             )
+            rows = [quote_row] + (product_rows or [])
+            
+            response = {
+                "product_name": f"Assurance {insurance_type.title()} Personnalisée",
+                "company_name": "Comparateur Bamboo",
+                "insurance_type": insurance_type,
+                "monthly_premium": round(premium / 12, 2),
+                "annual_premium": round(premium, 2),
+                "deductible": calculate_deductible(insurance_type),
+                "coverage_details": coverage_details,
+                "exclusions": quote_row["exclusions"],
+                "valid_until": valid_until.isoformat(),
+                "recommendations": generate_recommendations(insurance_type, age, guarantees, risk_factors),
+                "quotes": quotes_alternatives,
+                "coverage_summary": {
+                    "total_guarantees": len(guarantees),
+                    "mandatory_included": has_mandatory_guarantees(insurance_type, guarantees),
+                    "optional_selected": count_optional_guarantees(insurance_type, guarantees),
+                    "coverage_level": determine_coverage_level(guarantees)
+                }
+            }
             
-            db.add(quote)
-            db.commit()
-            db.refresh(quote)
-        except Exception as e:
-            print(f"Erreur sauvegarde devis: {e}")
-            db.rollback()
+            # Devis de secours (tarification en échec) jamais mis en cache ; les autres ne le
+            # sont qu'une fois leurs lignes validées, seules référençables par source_quote_id
+            if product_rows is not None:
+                entry = quote_cache.CachedQuote(quote_id, valid_until, rows, response)
+                on_written = partial(quote_cache.put, profile_key, entry)
         
-        # Génération des devis alternatifs pour les assureurs sélectionnés
-        quotes_alternatives = generate_alternative_quotes(
-            db, selected_insurers, premium, insurance_type, guarantees
-        )
+        # Écriture différée : devis principal et devis produits en un INSERT multi-lignes
+        write_behind.enqueue_many(InsuranceQuote, rows, on_written)
         
-        # Préparation de la réponse
+        # Champs propres à la requête, et données supplémentaires pour le frontend
         response = {
             "quote_id": quote_id,
-            "product_name": f"Assurance {insurance_type.title()} Personnalisée",
-            "company_name": "Comparateur Bamboo",
-            "insurance_type": insurance_type,
-            "monthly_premium": round(premium / 12, 2),
-            "annual_premium": round(premium, 2),
-            "deductible": calculate_deductible(insurance_type),
-            "coverage_details": get_coverage_for_guarantees(insurance_type, guarantees),
-            "exclusions": get_default_exclusions(insurance_type),
-            "valid_until": (datetime.now() + timedelta(days=30)).isoformat(),
-            "recommendations": generate_recommendations(insurance_type, age, guarantees, risk_factors),
-            "quotes": quotes_alternatives,
-            # Données supplémentaires pour le frontend
+            **response,
             "selected_guarantees": guarantees,
-            "selected_insurers_count": len(selected_insurers),
-            "coverage_summary": {
-                "total_guarantees": len(guarantees),
-                "mandatory_included": has_mandatory_guarantees(insurance_type, guarantees),
-                "optional_selected": count_optional_guarantees(insurance_type, guarantees),
-                "coverage_level": determine_coverage_level(guarantees)
-            }
+            "selected_insurers_count": len(selected_insurers)
         }
         
         return response
@@ -216,6 +250,41 @@ def create_insurance_quote(quote_request: dict, db: Session = Depends(get_db)):
         print(f"Erreur générale dans create_insurance_quote: {str(e)}")
         return create_fallback_quote(quote_request)
 
+@router.get("/quote/{quote_id}")
+def get_insurance_quote(quote_id: str, db: Session = Depends(get_db)):
+    """
+    Relit un devis enregistré (ou encore en file d'écriture) ; la couverture et
+    les exclusions d'un devis servi depuis le cache sont celles du devis source
+    """
+    try:
+        quote = load_quote(db, quote_id)
+        if not quote:
+            raise HTTPException(status_code=404, detail="Devis non trouvé")
+        
+        coverage_details, exclusions = resolve_quote_details(db, quote)
+        return {
+            "quote_id": quote.id,
+            "session_id": quote.session_id,
+            "insurance_product_id": quote.insurance_product_id,
+            "insurance_type": quote.insurance_type,
+            "age": quote.age,
+            "risk_factors": quote.risk_factors,
+            "monthly_premium": round(float(quote.monthly_premium), 2),
+            "annual_premium": round(float(quote.annual_premium), 2),
+            "deductible": float(quote.deductible) if quote.deductible is not None else None,
+            "coverage_details": coverage_details,
+            "exclusions": exclusions,
+            "source_quote_id": quote.source_quote_id,
+            "valid_until": quote.valid_until.isoformat() if quote.valid_until else None,
+            "created_at": quote.created_at.isoformat() if quote.created_at else None
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Erreur dans get_insurance_quote: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Erreur lors de la récupération du devis: {str(e)}")
+
 @router.get("/guarantees/{insurance_type}")
 def get_available_guarantees(insurance_type: str):
     """
@@ -268,6 +337,22 @@ def get_available_guarantees(insurance_type: str):
 
 # ==================== FONCTIONS UTILITAIRES ====================
 
+def load_quote(db: Session, quote_id: str):
+    """Devis en base, ou encore en attente d'écriture différée"""
+    return (
+        db.query(InsuranceQuote).filter(InsuranceQuote.id == quote_id).first()
+        or write_behind.pending_record(InsuranceQuote, quote_id)
+    )
+
+def resolve_quote_details(db: Session, quote):
+    """Couverture et exclusions d'un devis, lues sur le devis source s'il a été servi depuis le cache"""
+    if quote.source_quote_id:
+        source = load_quote(db, quote.source_quote_id)
+        if source is None:
+            return {}, []
+        quote = source
+    return quote.coverage_details or {}, quote.exclusions or []
+
 def format_company_data(company):
     """Formate les données d'une compagnie pour le frontend"""
     if not company:
@@ -293,68 +378,15 @@ def calculate_premium_with_guarantees(insurance_type: str, age: int, risk_factor
     """Calcule la prime en tenant compte des garanties sélectionnées"""
     base_premium = get_base_premium(insurance_type, age, risk_factors)
     
-    # Multiplicateur selon les garanties
-    guarantee_multiplier = 1.0
-    
-    guarantee_costs = {
-        'responsabilite_civile': 0.0,  # Garantie obligatoire incluse
-        'dommages_collision': 0.3,
-        'vol': 0.2,
-        'incendie': 0.15,
-        'bris_glace': 0.1,
-        'assistance': 0.05,
-        'degats_eaux': 0.2,
-        'catastrophes_naturelles': 0.25,
-        'invalidite': 0.25,
-        'maladie_grave': 0.35,
-        'consultations': 0.15,
-        'pharmacie': 0.1,
-        'dentaire': 0.2,
-        'optique': 0.05,
-        'bagages': 0.1,
-        'annulation': 0.15,
-        'retard': 0.05
-    }
-    
-    for guarantee in guarantees:
-        guarantee_multiplier += guarantee_costs.get(guarantee, 0)
-    
-    return base_premium * guarantee_multiplier
+    return base_premium * rating.guarantee_multiplier(guarantees)
 
 def get_base_premium(insurance_type: str, age: int, risk_factors: dict) -> float:
-    """Calcul de la prime de base selon le type d'assurance"""
-    base_premiums = {
-        'auto': risk_factors.get('vehicle_value', 15000000) * 0.003,
-        'habitation': risk_factors.get('property_value', 25000000) * 0.002,
-        'vie': risk_factors.get('coverage_amount', 50000000) * 0.0015,
-        'sante': 45000 * int(risk_factors.get('family_size', 1)),
-        'voyage': 25000 * (1 + int(risk_factors.get('duration', 7)) / 30)
-    }
-    
-    base_premium = base_premiums.get(insurance_type, 50000)
-    
-    # Facteur âge
-    if age < 25:
-        age_factor = 1.3
-    elif age < 40:
-        age_factor = 1.0
-    elif age < 60:
-        age_factor = 1.1
-    else:
-        age_factor = 1.2
-        
-    return base_premium * age_factor
+    """Calcul de la prime de base selon le type d'assurance (barèmes par défaut du moteur)"""
+    return rating.default_base_premium(insurance_type, risk_factors) * rating.age_factor(age)
 
 def calculate_deductible(insurance_type: str) -> float:
     """Calcule la franchise selon le type d'assurance"""
-    deductibles = {
-        'auto': 100000,
-        'habitation': 50000,
-        'vie': 0,
-        'sante': 25000,
-        'voyage': 0
-    }
-    return deductibles.get(insurance_type, 50000)
+    return rating.default_deductible(insurance_type)
 
 def get_coverage_for_guarantees(insurance_type: str, guarantees: list) -> dict:
     """Retourne les détails de couverture selon les garanties sélectionnées"""
@@ -440,39 +472,55 @@ def get_default_exclusions(insurance_type: str) -> list:
     }
     return exclusions_map.get(insurance_type, ["Conditions générales non respectées"])
 
-def generate_alternative_quotes(db, selected_insurers, base_premium, insurance_type, guarantees):
-    """Génère les devis alternatifs pour les assureurs sélectionnés"""
-    quotes = []
-    
+def generate_insurer_quotes(snapshot, selected_insurers, insurance_type, age, risk_factors, guarantees, quote_row):
+    """
+    Tarifie tous les produits actifs du type chez les assureurs sélectionnés (une
+    évaluation vectorisée) ; renvoie les devis triés par prime et leurs lignes à
+    insérer (None pour les devis de secours)
+    """
     try:
-        # Récupérer les compagnies sélectionnées
-        companies = db.query(InsuranceCompany).filter(
-            InsuranceCompany.id.in_(selected_insurers),
-            InsuranceCompany.is_active == True
-        ).all()
-        
-        for i, company in enumerate(companies[:4]):  # Limiter à 4 devis
-            variation = 0.8 + (i * 0.1)  # Variation de prix
-            alt_premium = base_premium * variation
-            
-            quotes.append({
-                "company_name": company.name,
-                "product_name": f"Assurance {insurance_type.title()} {company.name}",
-                "monthly_premium": round(alt_premium / 12, 2),
-                "annual_premium": round(alt_premium, 2),
-                "deductible": calculate_deductible(insurance_type),
-                "rating": company.rating or 4.0,
-                "advantages": get_company_advantages(company.name),
-                "company_id": company.id,
-                "contact_phone": company.contact_phone,
-                "contact_email": company.contact_email
-            })
+        rated = snapshot.insurance_rating.rate(
+            insurance_type, age, risk_factors, guarantees, company_ids=selected_insurers
+        )
     except Exception as e:
-        print(f"Erreur génération devis alternatifs: {e}")
-        # Fallback
-        quotes = generate_fallback_quotes(selected_insurers, base_premium, insurance_type)
+        print(f"Erreur tarification des assureurs sélectionnés: {e}")
+        return generate_fallback_quotes(selected_insurers, quote_row["annual_premium"], insurance_type), None
     
-    return quotes
+    quotes, rows = [], []
+    for position, (product, annual_premium, deductible) in enumerate(zip(
+        rated.products, rated.annual_premiums.tolist(), rated.deductibles.tolist()
+    )):
+        company = product.insurance_company
+        # Identifiant dérivé du devis principal (un seul tirage aléatoire par requête)
+        product_quote_id = f"{quote_row['id']}-{position + 1}"
+        rows.append({
+            **quote_row,
+            "id": product_quote_id,
+            "insurance_product_id": product.id,
+            "monthly_premium": annual_premium / 12,
+            "annual_premium": annual_premium,
+            "deductible": deductible,
+            "exclusions": product.exclusions if isinstance(product.exclusions, list) and product.exclusions
+                          else quote_row["exclusions"]
+        })
+        quotes.append({
+            "quote_id": product_quote_id,
+            "company_name": company.name,
+            "product_name": product.name,
+            "product_id": product.id,
+            "monthly_premium": round(annual_premium / 12, 2),
+            "annual_premium": round(annual_premium, 2),
+            "deductible": deductible,
+            "rating": float(company.rating) if company.rating else 4.0,
+            "advantages": product.advantages if isinstance(product.advantages, list) and product.advantages
+                          else get_company_advantages(company.name),
+            "company_id": company.id,
+            "contact_phone": company.contact_phone,
+            "contact_email": company.contact_email
+        })
+    
+    quotes.sort(key=lambda quote: (quote["annual_premium"], quote["product_id"]))
+    return quotes, rows
 
 def generate_fallback_quotes(selected_insurers, base_premium, insurance_type):
     """Génère des devis de fallback"""
@@ -609,6 +657,7 @@ async def test_insurance_endpoint():
             "GET /companies - Liste des compagnies d'assurance", 
             "GET /guarantees/{type} - Garanties disponibles par type",
             "POST /quote - Créer un devis d'assurance",
+            "GET /quote/{quote_id} - Relire un devis enregistré",
             "GET /test - Test de fonctionnement"
         ],
         "features": [
@@ -6,11 +6,15 @@ from sqlalchemy import and_, or_
 from typing import List, Optional
 import models
 import schemas
+import finance
+import catalog
+import write_behind
 from database import get_db
 import uuid
 from datetime import datetime
 import logging
 import json
+import numpy as np
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -22,33 +26,30 @@ async def get_savings_products(
     type: Optional[str] = Query(None, description="Type d'épargne (livret, terme, plan_epargne)"),
     bank_id: Optional[str] = Query(None, description="ID de la banque"),
     min_rate: Optional[float] = Query(None, description="Taux minimum"),
-    liquidity: Optional[str] = Query(None, description="Type de liquidité (immediate, notice, term)"),
-    db: Session = Depends(get_db)
+    liquidity: Optional[str] = Query(None, description="Type de liquidité (immediate, notice, term)")
 ):
     """Récupère tous les produits d'épargne avec filtres optionnels"""
     try:
-        query = db.query(models.SavingsProduct).join(models.Bank).filter(
-            models.SavingsProduct.is_active == True,
-            models.Bank.is_active == True
-        )
+        # Produits actifs de banques actives, lus dans l'instantané du catalogue
+        products = list(catalog.get_snapshot().active_savings_products)
         
         # Appliquer les filtres
         if type:
-            query = query.filter(models.SavingsProduct.type == type)
+            products = [p for p in products if p.type == type]
         
         if bank_id:
-            query = query.filter(models.SavingsProduct.bank_id == bank_id)
+            products = [p for p in products if p.bank_id == bank_id]
         
         if min_rate is not None:
-            query = query.filter(models.SavingsProduct.interest_rate >= min_rate)
+            products = [p for p in products if p.interest_rate >= min_rate]
         
         if liquidity:
-            query = query.filter(models.SavingsProduct.liquidity == liquidity)
+            products = [p for p in products if p.liquidity == liquidity]
         
         # Trier par taux décroissant par défaut
-        query = query.order_by(models.SavingsProduct.interest_rate.desc())
+        products.sort(key=lambda p: p.interest_rate, reverse=True)
         
-        products = query.offset(skip).limit(limit).all()
+        products = products[skip:skip + limit]
         
         # CORRECTION: Convertir manuellement les objets SQLAlchemy en dictionnaires
         result = []
@@ -115,15 +116,12 @@ async def get_savings_products(
         raise HTTPException(status_code=500, detail=f"Erreur lors de la récupération des produits d'épargne: {str(e)}")
 
 @router.get("/products/{product_id}")
-async def get_savings_product(product_id: str, db: Session = Depends(get_db)):
+async def get_savings_product(product_id: str):
     """Récupère un produit d'épargne par son ID"""
     try:
-        product = db.query(models.SavingsProduct).join(models.Bank).filter(
-            models.SavingsProduct.id == product_id,
-            models.SavingsProduct.is_active == True
-        ).first()
+        product = catalog.get_snapshot().savings_products.get(product_id)
         
-        if not product:
+        if not product or not product.is_active or not product.bank:
             raise HTTPException(status_code=404, detail="Produit d'épargne non trouvé")
         
         # CORRECTION: Convertir manuellement en dictionnaire
@@ -186,18 +184,15 @@ async def get_savings_product(product_id: str, db: Session = Depends(get_db)):
 @router.post("/simulate")
 async def simulate_savings(
     request: schemas.SavingsSimulationRequest,
-    db: Session = Depends(get_db),
+    include_breakdown: bool = Query(False, description="Inclure le détail mois par mois"),
     http_request: Request = None
 ):
     """Simule l'épargne avec un produit donné"""
     try:
-        # Vérifier que le produit existe et est actif
-        product = db.query(models.SavingsProduct).filter(
-            models.SavingsProduct.id == request.savings_product_id,
-            models.SavingsProduct.is_active == True
-        ).first()
+        # Vérifier que le produit existe et est actif (instantané du catalogue)
+        product = catalog.get_snapshot().savings_products.get(request.savings_product_id)
         
-        if not product:
+        if not product or not product.is_active:
             raise HTTPException(status_code=404, detail="Produit d'épargne non trouvé")
         
         # Validation des montants
@@ -220,41 +215,32 @@ async def simulate_savings(
             monthly_contribution=float(request.monthly_contribution),
             annual_rate=float(product.interest_rate),
             duration_months=request.duration_months,
-            compounding_frequency=product.compounding_frequency or "monthly"
+            compounding_frequency=product.compounding_frequency or "monthly",
+            include_breakdown=include_breakdown
         )
         
         # Générer les recommandations
         recommendations = generate_savings_recommendations(simulation_result, product)
         
-        # Générer un ID de simulation
+        # Écriture différée (INSERT groupé en tâche de fond) : l'id est attribué ici
         simulation_id = str(uuid.uuid4())
-        
-        # Essayer de sauvegarder en base (optionnel)
-        try:
-            simulation = models.SavingsSimulation(
-                id=simulation_id,
-                session_id=request.session_id,
-                savings_product_id=request.savings_product_id,
-                initial_amount=float(request.initial_amount),
-                monthly_contribution=float(request.monthly_contribution),
-                duration_months=request.duration_months,
-                final_amount=float(simulation_result['final_amount']),
-                total_contributions=float(simulation_result['total_contributions']),
-                total_interest=float(simulation_result['total_interest']),
-                effective_rate=float(simulation_result.get('effective_rate', 0)),
-                monthly_breakdown=simulation_result['monthly_breakdown'],
-                recommendations=recommendations
-            )
-            
-            db.add(simulation)
-            db.commit()
-            logger.info(f"Simulation saved with ID: {simulation_id}")
-            created_at = datetime.utcnow()
-            
-        except Exception as db_error:
-            logger.warning(f"Could not save simulation to database: {str(db_error)}")
-            db.rollback()
-            created_at = datetime.utcnow()
+        write_behind.enqueue(models.SavingsSimulation, {
+            "id": simulation_id,
+            "session_id": request.session_id,
+            "savings_product_id": request.savings_product_id,
+            "initial_amount": float(request.initial_amount),
+            "monthly_contribution": float(request.monthly_contribution),
+            "duration_months": request.duration_months,
+            "final_amount": float(simulation_result['final_amount']),
+            "total_contributions": float(simulation_result['total_contributions']),
+            "total_interest": float(simulation_result['total_interest']),
+            "effective_rate": float(simulation_result.get('effective_rate', 0)),
+            "interest_rate": product.interest_rate,
+            "compounding_frequency": product.compounding_frequency or "monthly",
+            "schedule_format": finance.SCHEDULE_FORMAT_VERSION,
+            "recommendations": recommendations
+        })
+        created_at = datetime.utcnow()
         
         # CORRECTION: Retourner un dictionnaire au lieu d'un objet Pydantic
         return {
@@ -278,7 +264,6 @@ async def simulate_savings(
         raise
     except Exception as e:
         logger.error(f"Error in savings simulation: {str(e)}")
-        db.rollback()
         raise HTTPException(status_code=500, detail=f"Erreur lors de la simulation: {str(e)}")
 
 def calculate_savings_simulation(
@@ -286,70 +271,32 @@ def calculate_savings_simulation(
     monthly_contribution: float,
     annual_rate: float,
     duration_months: int,
-    compounding_frequency: str = "monthly"
+    compounding_frequency: str = "monthly",
+    include_breakdown: bool = False
 ) -> dict:
     """Calcule la simulation d'épargne avec intérêts composés"""
     
     logger.info(f"Calculating simulation: initial={initial_amount}, monthly={monthly_contribution}, rate={annual_rate}%, duration={duration_months}m")
     
-    # Définir la fréquence de capitalisation
-    frequency_map = {
-        "daily": 365,
-        "monthly": 12,
-        "quarterly": 4,
-        "annually": 1
-    }
-    
-    compounds_per_year = frequency_map.get(compounding_frequency, 12)
-    
-    # Taux périodique
-    if compounding_frequency == "monthly":
-        period_rate = annual_rate / 100 / 12
-    else:
-        period_rate = annual_rate / 100 / compounds_per_year
+    # Projection en forme fermée ; le détail mensuel n'est calculé que si demandé
+    projection = finance.savings_projection(
+        initial_amount,
+        monthly_contribution,
+        annual_rate,
+        duration_months,
+        compounding_frequency,
+        include_breakdown=include_breakdown
+    )
     
-    balance = initial_amount
-    total_contributions = initial_amount
     monthly_breakdown = []
-    
-    for month in range(1, duration_months + 1):
-        # Calcul des intérêts selon la fréquence
-        if compounding_frequency == "monthly":
-            interest = balance * period_rate
-        elif compounding_frequency == "quarterly" and month % 3 == 0:
-            quarterly_rate = annual_rate / 100 / 4
-            interest = balance * quarterly_rate
-        elif compounding_frequency == "annually" and month % 12 == 0:
-            interest = balance * (annual_rate / 100)
-        else:
-            # Approximation mensuelle pour les autres fréquences
-            interest = balance * (annual_rate / 100 / 12)
-        
-        # Ajouter la contribution mensuelle et les intérêts
-        balance += monthly_contribution + interest
-        total_contributions += monthly_contribution
-        
-        monthly_breakdown.append({
-            "month": month,
-            "contribution": float(monthly_contribution),
-            "interest": round(float(interest), 2),
-            "balance": round(float(balance), 2)
-        })
-    
-    total_interest = balance - total_contributions
-    
-    # Taux effectif annuel
-    if duration_months > 0 and total_contributions > 0:
-        years = duration_months / 12
-        effective_rate = ((balance / total_contributions) ** (1 / years) - 1) * 100
-    else:
-        effective_rate = 0
+    if projection["monthly_breakdown"] is not None:
+        monthly_breakdown = finance.breakdown_rows(projection["monthly_breakdown"])
     
     result = {
-        "final_amount": round(float(balance), 2),
-        "total_contributions": round(float(total_contributions), 2),
-        "total_interest": round(float(total_interest), 2),
-        "effective_rate": round(float(effective_rate), 2),
+        "final_amount": round(float(projection["final_amount"]), 2),
+        "total_contributions": round(float(projection["total_contributions"]), 2),
+        "total_interest": round(float(projection["total_interest"]), 2),
+        "effective_rate": round(float(projection["effective_rate"]), 2),
         "monthly_breakdown": monthly_breakdown
     }
     
@@ -392,6 +339,187 @@ def generate_savings_recommendations(simulation_result: dict, product) -> List[s
     
     return recommendations
 
+def rank_savings_offers(
+    initial_amount: float,
+    monthly_contribution: float,
+    duration_months: int,
+    limit: Optional[int] = None,
+    snapshot: Optional[catalog.CatalogSnapshot] = None
+) -> dict:
+    """Projection vectorisée des produits accessibles au dépôt initial, classée par capital final décroissant"""
+    if snapshot is None:
+        snapshot = catalog.get_snapshot()
+    products = [
+        product for product in snapshot.active_savings_products
+        if initial_amount >= float(product.minimum_deposit or 0)
+        and not (product.maximum_deposit and initial_amount > float(product.maximum_deposit))
+    ]
+    
+    # Un seul calcul tableau sur les taux et fréquences de capitalisation de tous les produits
+    rates = np.array([float(product.interest_rate) for product in products], dtype=np.float64)
+    periods = np.array([finance.periods_per_year(product.compounding_frequency) for product in products])
+    a, b = finance.balance_coefficients(duration_months, rates, periods)
+    final_amounts = initial_amount * a + monthly_contribution * b
+    total_contributions = initial_amount + monthly_contribution * duration_months
+    
+    # Rendement annualisé des versements (définition de /simulate) et taux actuariel du produit
+    if total_contributions > 0:
+        effective_rates = np.round(((final_amounts / total_contributions) ** (12 / duration_months) - 1) * 100, 2)
+    else:
+        effective_rates = np.zeros(len(products))
+    annual_effective_rates = np.round(((1 + rates / 100 / periods) ** periods - 1) * 100, 2)
+    
+    final_list = np.round(final_amounts, 2).tolist()
+    interest_list = np.round(final_amounts - total_contributions, 2).tolist()
+    ranking = sorted(range(len(products)), key=lambda position: (-final_list[position], products[position].id))
+    
+    offers = []
+    for position in ranking[:limit]:
+        product = products[position]
+        offers.append({
+            "bank": {"id": product.bank.id, "name": product.bank.name, "logo": product.bank.logo_url},
+            "product": {
+                "id": product.id,
+                "name": product.name,
+                "type": product.type,
+                "rate": float(product.interest_rate),
+                "liquidity": product.liquidity,
+                "compounding_frequency": product.compounding_frequency or "monthly"
+            },
+            "final_amount": final_list[position],
+            "total_contributions": round(total_contributions, 2),
+            "total_interest": interest_list[position],
+            "effective_rate": float(effective_rates[position]),
+            "annual_effective_rate": float(annual_effective_rates[position])
+        })
+    
+    return {
+        "offers": offers,
+        "total_offers": len(products),
+        "best_final_amount": offers[0]["final_amount"] if offers else None
+    }
+
+@router.get("/compare")
+async def compare_savings_products(
+    initial: float = Query(..., description="Dépôt initial", ge=0),
+    monthly: float = Query(0, description="Versement mensuel", ge=0),
+    duration: int = Query(..., description="Durée en mois", gt=0, le=600),
+    limit: Optional[int] = Query(None, description="Nombre d'offres renvoyées", ge=1, le=100)
+):
+    """Compare tous les produits d'épargne pour un profil, sans enregistrer de simulation"""
+    try:
+        result = rank_savings_offers(initial, monthly, duration, limit)
+        result["search_params"] = {
+            "initial": initial,
+            "monthly": monthly,
+            "duration": duration,
+            "limit": limit
+        }
+        result["catalog_version"] = catalog.catalog_version()
+        return result
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in savings compare: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Erreur lors de la comparaison: {str(e)}")
+
+# Horizon maximal de recherche de durée (identique à la durée max de /simulate)
+GOAL_MAX_MONTHS = 600
+
+@router.post("/goal")
+async def solve_savings_goal(request: schemas.SavingsGoalRequest):
+    """
+    Objectif d'épargne résolu pour tous les produits actifs : versement mensuel
+    requis (durée imposée) ou durée requise (budget mensuel imposé), classés par effort
+    """
+    try:
+        snapshot = catalog.get_snapshot()
+        initial = float(request.initial_amount)
+        target = float(request.target_amount)
+        
+        # Dépôt initial hors des bornes du produit : exclu, comme pour /simulate
+        products, unreachable = [], []
+        for product in snapshot.active_savings_products:
+            if initial < float(product.minimum_deposit or 0):
+                unreachable.append((product, f"Dépôt initial minimum: {product.minimum_deposit} FCFA"))
+            elif product.maximum_deposit and initial > float(product.maximum_deposit):
+                unreachable.append((product, f"Dépôt initial maximum: {product.maximum_deposit} FCFA"))
+            else:
+                products.append(product)
+        
+        rates = np.array([float(product.interest_rate) for product in products], dtype=np.float64)
+        periods = np.array([finance.periods_per_year(product.compounding_frequency) for product in products])
+        
+        # Une seule résolution vectorisée sur tous les produits retenus
+        if request.duration_months is not None:
+            mode = "required_contribution"
+            # Arrondi au franc supérieur : l'objectif est atteint avec le versement affiché
+            contributions = np.ceil(np.round(
+                finance.required_monthly_contributions(target, initial, request.duration_months, rates, periods), 6
+            ))
+            durations = np.full(len(products), request.duration_months)
+        else:
+            mode = "required_duration"
+            durations = finance.months_to_target(target, initial, request.monthly_budget, rates, periods, GOAL_MAX_MONTHS)
+            contributions = np.full(len(products), float(request.monthly_budget))
+        
+        reachable = durations >= 0
+        a, b = finance.balance_coefficients(np.maximum(durations, 0), rates, periods)
+        final_amounts = initial * a + contributions * b
+        total_contributions = initial + contributions * np.maximum(durations, 0)
+        
+        offers = []
+        for position, product in enumerate(products):
+            if not reachable[position]:
+                unreachable.append((product, f"Objectif non atteint en {GOAL_MAX_MONTHS} mois avec ce budget"))
+                continue
+            if product.maximum_deposit and total_contributions[position] > float(product.maximum_deposit):
+                unreachable.append((product, f"Versements cumulés au-delà du plafond de {product.maximum_deposit} FCFA"))
+                continue
+            offers.append({
+                "bank": {"id": product.bank.id, "name": product.bank.name, "logo": product.bank.logo_url},
+                "product": {
+                    "id": product.id,
+                    "name": product.name,
+                    "type": product.type,
+                    "rate": float(product.interest_rate),
+                    "liquidity": product.liquidity,
+                    "compounding_frequency": product.compounding_frequency or "monthly"
+                },
+                "monthly_contribution": float(contributions[position]),
+                "duration_months": int(durations[position]),
+                "final_amount": round(float(final_amounts[position]), 2),
+                "total_contributions": round(float(total_contributions[position]), 2),
+                "total_interest": round(float(final_amounts[position] - total_contributions[position]), 2)
+            })
+        
+        # Effort requis croissant, puis capital final décroissant
+        effort_key = "monthly_contribution" if mode == "required_contribution" else "duration_months"
+        offers.sort(key=lambda offer: (offer[effort_key], -offer["final_amount"], offer["product"]["id"]))
+        
+        return {
+            "mode": mode,
+            "goal": {
+                "target_amount": target,
+                "initial_amount": initial,
+                "duration_months": request.duration_months,
+                "monthly_budget": request.monthly_budget
+            },
+            "offers": offers,
+            "unreachable": [
+                {"product": {"id": product.id, "name": product.name, "bank": product.bank.name}, "reason": reason}
+                for product, reason in unreachable
+            ],
+            "catalog_version": snapshot.version
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in savings goal: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Erreur lors du calcul de l'objectif: {str(e)}")
+
 @router.get("/types")
 async def get_savings_types(db: Session = Depends(get_db)):
     """Récupère tous les types d'épargne disponibles"""
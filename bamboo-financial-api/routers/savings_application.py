@@ -8,6 +8,7 @@ from datetime import datetime, date
 import uuid
 import time
 
+import finance
 from database import get_db
 from models import SavingsApplication, SavingsProduct, SavingsSimulation, Bank
 from schemas import ApplicationNotification, PaginatedResponse
@@ -80,19 +81,18 @@ def create_default_simulation(
     if not savings_product:
         raise ValueError(f"Produit d'épargne {savings_product_id} non trouvé")
     
-    # Calculs basiques
-    annual_rate = float(savings_product.interest_rate) / 100
-    monthly_rate = annual_rate / 12
-    
-    # Calcul du montant final avec intérêts composés
-    final_amount = initial_amount
-    total_contributions = initial_amount
-    
-    for month in range(duration_months):
-        final_amount = final_amount * (1 + monthly_rate) + monthly_contribution
-        total_contributions += monthly_contribution
+    # Calcul du montant final avec intérêts composés (sans détail mensuel)
+    projection = finance.savings_projection(
+        initial_amount,
+        monthly_contribution,
+        float(savings_product.interest_rate),
+        duration_months,
+        savings_product.compounding_frequency
+    )
     
-    total_interest = final_amount - total_contributions
+    final_amount = projection["final_amount"]
+    total_contributions = projection["total_contributions"]
+    total_interest = projection["total_interest"]
     
     # Créer la simulation avec les bonnes valeurs
     simulation = SavingsSimulation(
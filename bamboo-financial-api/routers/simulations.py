@@ -1,10 +1,15 @@
 # routers/simulations.py - Router pour les simulations de crédit et épargne
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
 from typing import Optional
+import json
 import uuid
 import models
 import schemas
+import finance
+import write_behind
 from database import get_db
 from datetime import datetime
 import math
@@ -65,7 +70,7 @@ async def simulate_credit(
             eligible=simulation_result.eligible,
             risk_score=simulation_result.risk_score,
             recommendations=simulation_result.recommendations,
-            amortization_schedule=simulation_result.amortization_schedule,
+            schedule_format=finance.SCHEDULE_FORMAT_VERSION,
             client_ip=request.client.host,
             user_agent=request.headers.get("user-agent")
         )
@@ -124,7 +129,9 @@ async def simulate_savings(
             total_contributions=simulation_result.total_contributions,
             total_interest=simulation_result.total_interest,
             effective_rate=simulation_result.effective_rate,
-            monthly_breakdown=simulation_result.monthly_breakdown,
+            interest_rate=product.interest_rate,
+            compounding_frequency=product.compounding_frequency or "monthly",
+            schedule_format=finance.SCHEDULE_FORMAT_VERSION,
             recommendations=simulation_result.recommendations,
             client_ip=request.client.host,
             user_agent=request.headers.get("user-agent")
@@ -154,8 +161,68 @@ async def get_credit_simulation(simulation_id: str, db: Session = Depends(get_db
     if not simulation:
         raise HTTPException(status_code=404, detail="Simulation non trouvée")
     
+    # Tableau recalculé depuis les paramètres, sans marquer la ligne comme modifiée
+    set_committed_value(simulation, "amortization_schedule", finance.credit_schedule(simulation))
     return simulation
 
+# Taille de page par défaut et bloc de génération pour le flux NDJSON
+SCHEDULE_PAGE_SIZE = 120
+SCHEDULE_CHUNK_SIZE = 120
+
+@router.get("/credit/{simulation_id}/schedule")
+async def get_credit_simulation_schedule(
+    simulation_id: str,
+    from_month: int = Query(1, alias="from", ge=1, description="Premier mois (inclus)"),
+    to_month: Optional[int] = Query(None, alias="to", ge=1, description="Dernier mois (inclus)"),
+    format: str = Query("json", pattern="^(json|ndjson)$", description="json (page) ou ndjson (flux)"),
+    db: Session = Depends(get_db)
+):
+    """Tableau d'amortissement par pages ou en flux : stocké (lignes historiques) ou régénéré"""
+    
+    simulation = db.query(models.CreditSimulation).filter(
+        models.CreditSimulation.id == simulation_id
+    ).first() or write_behind.pending_record(models.CreditSimulation, simulation_id)
+    
+    if not simulation:
+        raise HTTPException(status_code=404, detail="Simulation non trouvée")
+    
+    months = simulation.duration_months
+    if from_month > months:
+        raise HTTPException(status_code=400, detail=f"La simulation ne compte que {months} mois")
+    
+    # Plage validée avant le choix du format : json et ndjson rejettent les mêmes requêtes
+    if to_month is not None and to_month < from_month:
+        raise HTTPException(status_code=400, detail="'to' doit être supérieur ou égal à 'from'")
+    
+    if format == "ndjson":
+        # Flux complet par blocs : la mémoire reste constante quelle que soit la durée
+        last_month = min(to_month or months, months)
+        
+        def generate():
+            for rows in finance.iter_credit_schedule_chunks(
+                simulation, from_month, last_month, SCHEDULE_CHUNK_SIZE
+            ):
+                yield "".join(json.dumps(row) + "\n" for row in rows)
+        
+        return StreamingResponse(
+            generate(),
+            media_type="application/x-ndjson",
+            headers={"Content-Disposition": f"attachment; filename=amortissement_{simulation_id}.ndjson"}
+        )
+    
+    last_month = min(to_month or from_month + SCHEDULE_PAGE_SIZE - 1, months)
+    
+    return {
+        "simulation_id": simulation_id,
+        "duration_months": months,
+        "monthly_payment": round(float(simulation.monthly_payment), 2),
+        "from": from_month,
+        "to": last_month,
+        "next_from": last_month + 1 if last_month < months else None,
+        # Tableau stocké des lignes historiques non compactées, sinon recalculé
+        "rows": finance.credit_schedule(simulation, from_month, last_month)
+    }
+
 @router.get("/savings/{simulation_id}", response_model=schemas.SavingsSimulationResponse)
 async def get_savings_simulation(simulation_id: str, db: Session = Depends(get_db)):
     """Récupère une simulation d'épargne"""
@@ -167,6 +234,7 @@ async def get_savings_simulation(simulation_id: str, db: Session = Depends(get_d
     if not simulation:
         raise HTTPException(status_code=404, detail="Simulation non trouvée")
     
+    set_committed_value(simulation, "monthly_breakdown", finance.savings_breakdown(simulation))
     return simulation
 
 def calculate_credit_simulation(request: schemas.CreditSimulationRequest, product: models.CreditProduct) -> schemas.CreditSimulationResponse:
@@ -201,10 +269,10 @@ def calculate_credit_simulation(request: schemas.CreditSimulationRequest, produc
     # Recommandations
     recommendations = generate_credit_recommendations(request, debt_ratio, eligible)
     
-    # Tableau d'amortissement
-    amortization_schedule = generate_amortization_schedule(
-        financed_amount, applied_rate, request.duration_months, monthly_payment
-    )
+    # Tableau d'amortissement (mêmes paramètres que la régénération depuis la ligne stockée)
+    amortization_schedule = generate_amortization_schedule(*finance.credit_schedule_terms(
+        request.requested_amount, request.down_payment, applied_rate, request.duration_months, monthly_payment
+    ))
     
     return schemas.CreditSimulationResponse(
         credit_product_id=request.credit_product_id,
@@ -233,31 +301,20 @@ def calculate_credit_simulation(request: schemas.CreditSimulationRequest, produc
 def calculate_savings_simulation(request: schemas.SavingsSimulationRequest, product: models.SavingsProduct) -> schemas.SavingsSimulationResponse:
     """Calcule les détails d'une simulation d'épargne"""
     
-    # Calcul avec intérêts composés
-    monthly_rate = float(product.interest_rate) / 100 / 12
-    
-    final_amount = request.initial_amount
-    total_contributions = request.initial_amount
-    monthly_breakdown = []
+    # Calcul avec intérêts composés (forme fermée, selon la fréquence du produit)
+    projection = finance.savings_projection(
+        request.initial_amount,
+        request.monthly_contribution,
+        float(product.interest_rate),
+        request.duration_months,
+        product.compounding_frequency,
+        include_breakdown=True
+    )
     
-    # Simulation mois par mois
-    for month in range(1, request.duration_months + 1):
-        # Intérêts sur le capital existant
-        monthly_interest = final_amount * monthly_rate
-        final_amount += monthly_interest
-        
-        # Ajout de la contribution mensuelle
-        final_amount += request.monthly_contribution
-        total_contributions += request.monthly_contribution
-        
-        monthly_breakdown.append({
-            "month": month,
-            "balance": round(final_amount, 2),
-            "interest": round(monthly_interest, 2),
-            "contribution": float(request.monthly_contribution)
-        })
-    
-    total_interest = final_amount - total_contributions
+    final_amount = projection["final_amount"]
+    total_contributions = projection["total_contributions"]
+    total_interest = projection["total_interest"]
+    monthly_breakdown = finance.breakdown_rows(projection["monthly_breakdown"])
     effective_rate = (total_interest / total_contributions) * 100 if total_contributions > 0 else 0
     
     # Recommandations
@@ -307,14 +364,10 @@ def determine_credit_rate(request: schemas.CreditSimulationRequest, product: mod
     return max(min_rate, min(max_rate, base_rate))
 
 def calculate_monthly_payment(principal: float, annual_rate: float, months: int) -> float:
-    """Calcule la mensualité d'un crédit"""
-    if annual_rate == 0:
-        return principal / months
-    
-    monthly_rate = annual_rate / 100 / 12
-    payment = principal * (monthly_rate * (1 + monthly_rate) ** months) / ((1 + monthly_rate) ** months - 1)
-    
-    return round(payment, 2)
+    """Calcule la mensualité d'un crédit (centimes entiers, arrondi unique)"""
+    return finance.from_minor(
+        finance.payment_minor(finance.to_minor(principal), finance.to_bp(annual_rate), months)
+    )
 
 def calculate_risk_score(request: schemas.CreditSimulationRequest, debt_ratio: float) -> int:
     """Calcule un score de risque de 0 à 100"""
@@ -389,23 +442,7 @@ def generate_savings_recommendations(request: schemas.SavingsSimulationRequest,
 
 def generate_amortization_schedule(principal: float, annual_rate: float, months: int, monthly_payment: float) -> list:
     """Génère le tableau d'amortissement"""
-    schedule = []
-    remaining_balance = principal
-    monthly_rate = annual_rate / 100 / 12
-    
-    for month in range(1, min(months + 1, 25)):  # Limiter à 24 premières mensualités pour l'affichage
-        interest = remaining_balance * monthly_rate
-        principal_payment = monthly_payment - interest
-        remaining_balance -= principal_payment
-        
-        schedule.append({
-            "month": month,
-            "principal": round(principal_payment, 2),
-            "interest": round(interest, 2),
-            "remaining_balance": round(max(0, remaining_balance), 2)
-        })
-        
-        if remaining_balance <= 0:
-            break
-    
-    return schedule
\ No newline at end of file
+    # Limiter à 24 premières mensualités pour l'affichage
+    return finance.amortization_schedule(
+        principal, annual_rate, months, monthly_payment, last_month=24
+    )
\ No newline at end of file
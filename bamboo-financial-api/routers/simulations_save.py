@@ -1,10 +1,12 @@
 # routers/simulations.py - Endpoints pour sauvegarder les simulations
 from fastapi import APIRouter, Depends, HTTPException, status, Request
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
 from typing import List, Optional
 from datetime import datetime
 import uuid
 
+import finance
 from database import get_db
 from models import CreditSimulation, SavingsSimulation, CreditProduct, SavingsProduct
 from schemas import (
@@ -62,6 +64,7 @@ async def save_credit_simulation(
             eligible=simulation_data["eligible"],
             risk_score=simulation_data.get("risk_score"),
             recommendations=simulation_data.get("recommendations", []),
+            schedule_format=finance.SCHEDULE_FORMAT_VERSION,
             client_ip=get_client_ip(request),
             user_agent=request.headers.get("User-Agent"),
             created_at=datetime.utcnow()
@@ -106,6 +109,7 @@ async def get_credit_simulation(simulation_id: str, db: Session = Depends(get_db
     if not simulation:
         raise HTTPException(status_code=404, detail="Simulation non trouvée")
     
+    set_committed_value(simulation, "amortization_schedule", finance.credit_schedule(simulation))
     return simulation
 
 # SIMULATIONS D'ÉPARGNE
@@ -141,7 +145,10 @@ async def save_savings_simulation(
             total_contributions=simulation_data["total_contributions"],
             total_interest=simulation_data["total_interest"],
             effective_rate=simulation_data.get("effective_rate"),
-            monthly_breakdown=simulation_data.get("monthly_breakdown"),
+            # Le détail mensuel envoyé par le client n'est pas stocké : il est recalculé à la lecture
+            interest_rate=savings_product.interest_rate,
+            compounding_frequency=savings_product.compounding_frequency or "monthly",
+            schedule_format=finance.SCHEDULE_FORMAT_VERSION,
             recommendations=simulation_data.get("recommendations", []),
             client_ip=get_client_ip(request),
             user_agent=request.headers.get("User-Agent"),
@@ -186,6 +193,7 @@ async def get_savings_simulation(simulation_id: str, db: Session = Depends(get_d
     if not simulation:
         raise HTTPException(status_code=404, detail="Simulation non trouvée")
     
+    set_committed_value(simulation, "monthly_breakdown", finance.savings_breakdown(simulation))
     return simulation
 
 # ENDPOINTS DE STATISTIQUES
@@ -466,6 +466,10 @@ class CreditSimulation(CreditSimulationResponse):
     client_ip: Optional[str] = None
     user_agent: Optional[str] = None
 
+class CreditSimulationBatchRequest(BaseSchema):
+    simulations: List[CreditSimulationRequest] = Field(..., min_length=1, max_length=5000)
+    persist: bool = False
+
 # ==================== SCHÉMAS DE SIMULATION D'ÉPARGNE ====================
 
 class SavingsSimulationRequest(BaseSchema):
@@ -503,6 +507,19 @@ class SavingsSimulation(SavingsSimulationResponse):
     client_ip: Optional[str] = None
     user_agent: Optional[str] = None
 
+class SavingsGoalRequest(BaseSchema):
+    target_amount: float = Field(..., gt=0)
+    initial_amount: float = Field(0, ge=0)
+    # Exactement l'un des deux : durée imposée ou budget mensuel imposé
+    duration_months: Optional[int] = Field(None, gt=0, le=600)
+    monthly_budget: Optional[float] = Field(None, ge=0)
+
+    @validator('monthly_budget', always=True)
+    def validate_goal_mode(cls, v, values):
+        if (v is None) == (values.get('duration_months') is None):
+            raise ValueError('provide exactly one of duration_months or monthly_budget')
+        return v
+
 # ==================== SCHÉMAS DEVIS D'ASSURANCE ====================
 
 class InsuranceQuoteRequest(BaseSchema):
@@ -959,9 +976,11 @@ __all__ = [
     
     # Simulations de crédit
     "CreditSimulationRequest", "CreditSimulationResponse", "CreditSimulation", "AmortizationEntry",
+    "CreditSimulationBatchRequest",
     
     # Simulations d'épargne
     "SavingsSimulationRequest", "SavingsSimulationResponse", "SavingsSimulation", "MonthlyBreakdownEntry",
+    "SavingsGoalRequest",
     
     # Devis d'assurance
     "InsuranceQuoteRequest", "InsuranceQuoteResponse", "InsuranceQuote",
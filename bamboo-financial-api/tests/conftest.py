@@ -0,0 +1,170 @@
+# tests/conftest.py - Configuration commune des tests de l'API
+import logging
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Les modules de l'API sont à plat à la racine du projet (import main, finance, catalog...)
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if API_DIR not in sys.path:
+    sys.path.insert(0, API_DIR)
+
+# Base SQLite jetable, fixée avant tout import de database (jamais la base de .env)
+TEST_DB_DIR = tempfile.mkdtemp(prefix="bamboo-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(TEST_DB_DIR, 'bamboo_test.db')}"
+
+
+def seed_catalog(db):
+    """Catalogue minimal : deux banques, deux assureurs, quelques produits de chaque type"""
+    import models
+
+    db.add_all([
+        models.Bank(id="bgfi", name="BGFI Bank", is_active=True),
+        models.Bank(id="ugb", name="UGB", is_active=True),
+        models.CreditProduct(
+            id="c1", bank_id="bgfi", name="Immo BGFI", type="immobilier",
+            min_amount=1_000_000, max_amount=200_000_000, min_duration_months=12, max_duration_months=300,
+            average_rate=7.5, min_rate=6.5, max_rate=9, processing_time_hours=72,
+            eligibility_criteria={"max_debt_ratio": 35}, features=[], is_active=True
+        ),
+        models.CreditProduct(
+            id="c2", bank_id="ugb", name="Immo UGB", type="immobilier",
+            min_amount=500_000, max_amount=100_000_000, min_duration_months=6, max_duration_months=240,
+            average_rate=8.2, min_rate=7, max_rate=10, processing_time_hours=48, features=[], is_active=True
+        ),
+        models.CreditProduct(
+            id="c3", bank_id="ugb", name="Conso UGB", type="consommation",
+            min_amount=100_000, max_amount=10_000_000, min_duration_months=6, max_duration_months=60,
+            average_rate=12, processing_time_hours=24, features=[], is_active=True
+        ),
+        models.SavingsProduct(
+            id="s1", bank_id="bgfi", name="Livret", type="livret", interest_rate=3.5, minimum_deposit=10000,
+            liquidity="immediate", compounding_frequency="monthly", is_active=True
+        ),
+        models.SavingsProduct(
+            id="s2", bank_id="ugb", name="DAT", type="terme", interest_rate=5, minimum_deposit=500000,
+            maximum_deposit=50_000_000, liquidity="term", compounding_frequency="quarterly", is_active=True
+        ),
+        models.SavingsProduct(
+            id="s3", bank_id="ugb", name="Plan", type="plan_epargne", interest_rate=4, minimum_deposit=0,
+            liquidity="notice", compounding_frequency="daily", is_active=True
+        ),
+        models.InsuranceCompany(id="ogar", name="OGAR", is_active=True),
+        models.InsuranceCompany(id="nsia", name="NSIA", is_active=True),
+        models.InsuranceProduct(
+            id="i1", insurance_company_id="ogar", name="Auto Tiers", type="auto", base_premium=25000,
+            coverage_details={"rc": True}, exclusions=["course"], is_active=True
+        ),
+        models.InsuranceProduct(
+            id="i2", insurance_company_id="nsia", name="Auto Tous Risques", type="auto", base_premium=45000,
+            premium_calculation={"age_factors": {"18-25": 1.6, "26-65": 1.0, "66-100": 1.25}},
+            deductible_options={"standard": 75000}, age_limits={"min_age": 18, "max_age": 80}, is_active=True
+        ),
+        models.InsuranceProduct(
+            id="i3", insurance_company_id="nsia", name="Vie", type="vie", base_premium=15000, is_active=True
+        ),
+    ])
+    db.commit()
+
+
+@pytest.fixture(scope="session")
+def app():
+    """Application FastAPI sur la base SQLite de test, catalogue chargé"""
+    import database
+    import models
+
+    database.engine.echo = False
+    models.Base.metadata.create_all(bind=database.engine)
+    db = database.SessionLocal()
+    try:
+        seed_catalog(db)
+    finally:
+        db.close()
+
+    logging.getLogger("sqlalchemy").setLevel(logging.WARNING)
+    import main
+    return main.app
+
+
+@pytest.fixture(scope="session")
+def client(app):
+    """Client HTTP ; démarrage et arrêt de l'application (écriture différée comprise)"""
+    from fastapi.testclient import TestClient
+
+    with TestClient(app, raise_server_exceptions=False) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def wait_for_writes(client):
+    """Attend que l'écriture différée ait validé toutes les lignes en file"""
+    import time
+    import write_behind
+
+    def wait(timeout: float = 5) -> None:
+        deadline = time.monotonic() + timeout
+        while write_behind.writer_info()["pending_rows"]:
+            assert time.monotonic() < deadline, "écriture différée non vidée"
+            time.sleep(0.02)
+
+    return wait
+
+
+@pytest.fixture(scope="session")
+def credit_market():
+    """Instantané synthétique de quelques dizaines de produits de crédit (hors base)"""
+    import random
+    import time
+    from decimal import Decimal
+
+    import catalog
+    import finance
+
+    generator = random.Random(33)
+    bank_fields = dict.fromkeys(catalog.BankRecord._fields)
+    product_fields = dict.fromkeys(catalog.CreditProductRecord._fields)
+    banks = {
+        f"bank{number}": catalog.BankRecord(**{**bank_fields, "id": f"bank{number}", "name": f"Banque {number}",
+                                               "is_active": True})
+        for number in range(8)
+    }
+
+    products = {}
+    for number in range(60):
+        product_id = f"market{number}"
+        average_rate = Decimal(generator.randint(550, 1600)) / 100
+        min_amount = generator.choice([100_000, 500_000, 1_000_000, 2_000_000])
+        min_duration = generator.choice([6, 12, 24])
+        products[product_id] = catalog.CreditProductRecord(**{
+            **product_fields,
+            "id": product_id,
+            "bank_id": f"bank{number % 8}",
+            "name": f"Produit {number}",
+            "type": generator.choice(["immobilier", "consommation"]),
+            "min_amount": Decimal(min_amount),
+            "max_amount": Decimal(min_amount * generator.choice([10, 50, 200])),
+            "min_duration_months": min_duration,
+            "max_duration_months": min_duration + generator.choice([48, 120, 276]),
+            "average_rate": average_rate,
+            "min_rate": average_rate - 1,
+            "max_rate": average_rate + 1,
+            "processing_time_hours": generator.choice([None, 24, 48, 72, 96]),
+            "eligibility_criteria": {"max_debt_ratio": generator.choice([30, 33, 35, 40])},
+            "features": [],
+            "is_active": True,
+            "bank": banks[f"bank{number % 8}"],
+        })
+
+    active = tuple(products.values())
+    credit_index = catalog.CreditProductIndex(active)
+    snapshot = catalog.CatalogSnapshot(
+        version=0, loaded_at=time.monotonic(), fingerprint="synthetic", banks=banks,
+        credit_products=products, savings_products={}, insurance_companies={}, insurance_products={},
+        active_credit_products=active, active_savings_products=(), active_insurance_products=(),
+        credit_index=credit_index, best_offers=catalog.BestOffersTable(credit_index)
+    )
+    yield snapshot
+    for product_id in products:
+        finance.drop_product_table(product_id)
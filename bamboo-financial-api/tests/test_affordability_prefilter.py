@@ -0,0 +1,47 @@
+# tests/test_affordability_prefilter.py - Pré-filtre d'accessibilité comparé au filtrage après calcul
+import random
+
+import finance
+from routers import credits
+
+
+def test_prefilter_keeps_exactly_the_eligible_offers(credit_market):
+    generator = random.Random(20)
+    checked = 0
+    for _ in range(300):
+        credit_type = generator.choice(["immobilier", "consommation"])
+        # Points de la table précalculée et montants quelconques (calcul à la demande)
+        amount = generator.choice([2_000_000, 5_000_000, 20_000_000, generator.randint(200_000, 80_000_000)])
+        duration = generator.choice([24, 60, 120, 240, generator.randint(12, 300)])
+        income = generator.randint(150_000, 3_000_000)
+        debts = generator.choice([0, 25_000, 150_000])
+
+        everything = credits.rank_credit_offers(credit_type, amount, duration, income, debts, snapshot=credit_market)
+        if not everything["comparisons"]:
+            continue
+        eligible = credits.rank_credit_offers(credit_type, amount, duration, income, debts, eligible_only=True,
+                                              snapshot=credit_market)
+        assert eligible["comparisons"] == [offer for offer in everything["comparisons"] if offer["eligible"]]
+        assert eligible["statistics"] == {**everything["statistics"],
+                                          "returned_offers": len(eligible["comparisons"])}
+        checked += 1
+    assert checked > 100
+
+
+def test_offer_at_the_exact_ratio_limit_is_kept(credit_market):
+    # Revenu tel que la mensualité arrondie atteint exactement le taux d'endettement maximal
+    offers = credits.rank_credit_offers("consommation", 2_000_000, 36, 1_000_000, snapshot=credit_market)["comparisons"]
+    offer = offers[0]
+    product = credit_market.credit_products[offer["product"]["id"]]
+    max_ratio = product.eligibility_criteria["max_debt_ratio"]
+    payment_minor = finance.to_minor(offer["monthly_payment"])
+    income = finance.from_minor(-(-payment_minor * 100 // max_ratio))
+    assert payment_minor * 100 / finance.to_minor(income) <= max_ratio
+
+    eligible = credits.rank_credit_offers("consommation", 2_000_000, 36, income, eligible_only=True,
+                                          snapshot=credit_market)["comparisons"]
+    assert offer["product"]["id"] in [candidate["product"]["id"] for candidate in eligible]
+
+    below = credits.rank_credit_offers("consommation", 2_000_000, 36, income - 1, eligible_only=True,
+                                       snapshot=credit_market)["comparisons"]
+    assert offer["product"]["id"] not in [candidate["product"]["id"] for candidate in below]
@@ -0,0 +1,57 @@
+# tests/test_amortization.py - Noyau d'amortissement vectorisé comparé à la boucle historique
+import numpy as np
+import pytest
+
+import finance
+
+
+def reference_schedule(principal, annual_rate, months, payment):
+    """Boucle mois par mois de l'ancien simulateur (valeurs non arrondies)"""
+    monthly_rate = annual_rate / 100 / 12
+    balance = principal
+    rows = []
+    for month in range(1, months + 1):
+        interest = balance * monthly_rate
+        principal_part = payment - interest
+        balance -= principal_part
+        rows.append((month, payment, principal_part, interest, balance))
+    return rows
+
+
+CASES = [
+    (10_000_000, 7.5, 480),
+    (2_500_000, 12.0, 37),
+    (777_777.77, 0.0, 12),
+    (150_000_000, 5.25, 300),
+    (100_000, 18.0, 6),
+]
+
+
+@pytest.mark.parametrize("principal, annual_rate, months", CASES)
+def test_columns_match_reference_loop(principal, annual_rate, months):
+    payment = finance.monthly_payment(principal, annual_rate, months)
+    columns = finance.amortization_columns(principal, annual_rate, months, payment)
+    expected = np.array(reference_schedule(principal, annual_rate, months, payment))
+
+    tolerance = principal * 1e-9
+    assert columns["month"].tolist() == list(range(1, months + 1))
+    np.testing.assert_allclose(columns["payment"], expected[:, 1], atol=tolerance)
+    np.testing.assert_allclose(columns["principal"], expected[:, 2], atol=tolerance)
+    np.testing.assert_allclose(columns["interest"], expected[:, 3], atol=tolerance)
+    np.testing.assert_allclose(columns["remaining_balance"], expected[:, 4], atol=tolerance)
+
+
+@pytest.mark.parametrize("principal, annual_rate, months", CASES)
+def test_final_row_balance_is_zero_with_exact_payment(principal, annual_rate, months):
+    payment = finance.monthly_payment(principal, annual_rate, months)
+    rows = finance.amortization_schedule(principal, annual_rate, months, payment)
+    assert len(rows) == months
+    assert rows[-1]["remaining_balance"] == 0.0
+    assert abs(reference_schedule(principal, annual_rate, months, payment)[-1][4]) < 0.005
+
+
+def test_month_window_matches_full_schedule():
+    full = finance.amortization_schedule(10_000_000, 7.5, 480)
+    assert finance.amortization_schedule(10_000_000, 7.5, 480, first_month=100, last_month=219) == full[99:219]
+    chunks = list(finance.iter_schedule_chunks(10_000_000, 7.5, 480, chunk_size=50))
+    assert [row for chunk in chunks for row in chunk] == full
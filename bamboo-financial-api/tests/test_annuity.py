@@ -0,0 +1,72 @@
+# tests/test_annuity.py - Facteurs d'annuité mémorisés comparés à la formule d'origine
+from decimal import Decimal
+
+import numpy as np
+import pytest
+
+import finance
+
+
+def reference_payment(principal, annual_rate, months):
+    """Formule de l'ancien calculate_monthly_payment (recalculée à chaque appel)"""
+    if annual_rate == 0:
+        return principal / months
+    monthly_rate = annual_rate / 100 / 12
+    return principal * (monthly_rate * (1 + monthly_rate) ** months) / ((1 + monthly_rate) ** months - 1)
+
+
+CASES = [
+    (10_000_000, 7.5, 240),
+    (2_500_000, 12.0, 36),
+    (777_777.77, 0.0, 12),
+    (150_000_000, 5.25, 300),
+    (100_000, 18.0, 1),
+]
+
+
+@pytest.mark.parametrize("principal, annual_rate, months", CASES)
+def test_monthly_payment_matches_reference_formula(principal, annual_rate, months):
+    assert finance.monthly_payment(principal, annual_rate, months) == pytest.approx(
+        reference_payment(principal, annual_rate, months), rel=1e-12
+    )
+
+
+def test_known_payment_values():
+    # 10 000 000 FCFA à 7,5 % sur 20 ans ; 1 200 000 FCFA à 0 % sur 12 mois
+    assert round(finance.monthly_payment(10_000_000, 7.5, 240), 2) == 80559.32
+    assert finance.monthly_payment(1_200_000, 0, 12) == 100_000
+    assert finance.monthly_payment(1_000_000, 7.5, 0) == 0.0
+
+
+@pytest.mark.parametrize("principal, annual_rate, months", CASES)
+def test_present_value_and_capacity_invert_the_payment(principal, annual_rate, months):
+    payment = finance.monthly_payment(principal, annual_rate, months)
+    assert finance.present_value(payment, annual_rate, months) == pytest.approx(principal, rel=1e-12)
+    assert finance.borrowing_capacity(payment, annual_rate, months) == pytest.approx(principal, rel=1e-12)
+
+
+def test_capacity_includes_insurance():
+    capacity = finance.borrowing_capacity(300_000, 7.5, 180, insurance_rate=0.36)
+    payment = finance.monthly_payment(capacity, 7.5, 180) + capacity * 0.36 / 100 / 12
+    assert payment == pytest.approx(300_000, rel=1e-12)
+    assert finance.borrowing_capacity(0, 7.5, 180) == 0.0
+
+
+def test_vectorized_factors_match_scalar():
+    rates = np.array([[0.0], [7.5], [12.0]])
+    months = np.arange(1, 361)
+    factors = finance.annuity_factors(rates, months)
+    expected = [[finance.annuity_factor(rate, month) for month in months] for rate in (0.0, 7.5, 12.0)]
+    np.testing.assert_allclose(factors, expected, rtol=1e-12)
+
+    capacities = finance.borrowing_capacities(250_000, 7.5, months, 0.3)
+    np.testing.assert_allclose(
+        capacities, [finance.borrowing_capacity(250_000, 7.5, month, 0.3) for month in months], rtol=1e-12
+    )
+
+
+def test_decimal_and_float_rates_share_cache_entry():
+    finance.annuity_factor(9.35, 84)
+    hits = finance.annuity_cache_info().hits
+    assert finance.annuity_factor(Decimal("9.35"), 84) == finance.annuity_factor(9.35, 84)
+    assert finance.annuity_cache_info().hits == hits + 2
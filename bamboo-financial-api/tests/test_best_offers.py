@@ -0,0 +1,61 @@
+# tests/test_best_offers.py - Table des meilleures offres comparée au calcul à la demande
+from types import SimpleNamespace
+
+import pytest
+
+import catalog
+from routers import credits
+
+NO_BEST_OFFERS = SimpleNamespace(lookup=lambda credit_type, amount, duration: None)
+
+
+@pytest.mark.parametrize("sort_by", credits.COMPARE_SORT_KEYS)
+@pytest.mark.parametrize("eligible_only", [False, True])
+def test_lookup_fast_path_matches_slow_path(credit_market, sort_by, eligible_only):
+    slow_market = credit_market._replace(best_offers=NO_BEST_OFFERS)
+    checked = 0
+    for credit_type in ("immobilier", "consommation"):
+        for amount in catalog.BEST_OFFER_AMOUNTS[::3]:
+            for duration in catalog.BEST_OFFER_DURATIONS[::2]:
+                if credit_market.best_offers.lookup(credit_type, amount, duration) is None:
+                    continue
+                arguments = (credit_type, amount, duration, 900_000, 50_000, 5, sort_by, eligible_only)
+                assert credits.rank_credit_offers(*arguments, snapshot=credit_market) == (
+                    credits.rank_credit_offers(*arguments, snapshot=slow_market)
+                )
+                checked += 1
+    assert checked > 10
+
+
+def test_entries_rank_products_by_payment(credit_market):
+    entry = credit_market.best_offers.lookup("immobilier", 5_000_000, 120)
+    matches = credit_market.credit_index.match("immobilier", 5_000_000, 120)
+    assert entry.products == tuple(matches)
+    payments = [entry.payments[position] for position in entry.ranking]
+    assert payments == sorted(payments)
+
+
+def test_lookup_only_serves_representative_points(credit_market):
+    assert credit_market.best_offers.lookup("immobilier", 5_000_001, 120) is None
+    assert credit_market.best_offers.bucket("immobilier", 5_000_001, 130) is (
+        credit_market.best_offers.lookup("immobilier", 5_000_000, 120)
+    )
+    assert credit_market.best_offers.bucket("immobilier", 100_000, 120) is None
+
+
+def test_rebuild_reuses_unchanged_types(credit_market):
+    products = list(credit_market.active_credit_products)
+    position = next(i for i, product in enumerate(products) if product.type == "consommation")
+    products[position] = products[position]._replace(average_rate=products[position].average_rate + 1)
+
+    rebuilt = catalog.BestOffersTable(catalog.CreditProductIndex(products), credit_market.best_offers)
+    assert rebuilt.rebuilt_types == ["consommation"]
+    key = next(key for key in rebuilt.entries if key[0] == "immobilier")
+    assert rebuilt.entries[key] is credit_market.best_offers.entries[key]
+
+
+def test_best_offers_endpoint(client):
+    data = client.get("/api/credits/best-offers", params={"credit_type": "immobilier", "limit": 1}).json()
+    featured = data["best_offers"][0]["featured"]
+    assert (featured["amount"], featured["duration"]) == (50_000_000, 240)
+    assert [offer["product"]["id"] for offer in featured["offers"]] == ["c1"]
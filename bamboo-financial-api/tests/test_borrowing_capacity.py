@@ -0,0 +1,62 @@
+# tests/test_borrowing_capacity.py - Capacité d'emprunt analytique comparée à l'ancienne itération
+import random
+
+import pytest
+
+import finance
+from routers import credits
+
+
+def reference_capacity(budget, annual_rate, months, insurance_rate):
+    """Ancienne estimation itérative (assurance recalculée sur le capital), menée jusqu'à convergence"""
+    monthly_rate = annual_rate / 100 / 12
+    present_value_factor = (1 - (1 + monthly_rate) ** -months) / monthly_rate
+    capital = 0.0
+    for _ in range(500):
+        available_for_loan_payment = budget - capital * insurance_rate / 100 / 12
+        if available_for_loan_payment <= 0:
+            return 0.0
+        capital = available_for_loan_payment * present_value_factor
+    return capital
+
+
+@pytest.mark.parametrize("budget, annual_rate, months, insurance_rate", [
+    (264_000, 6.5, 24, 0.36),
+    (500_000, 7.5, 240, 0.0),
+    (1_234_567.89, 12.0, 360, 1.2),
+    (80_000, 1.0, 6, 2.0),
+])
+def test_closed_form_matches_converged_iteration(budget, annual_rate, months, insurance_rate):
+    assert finance.borrowing_capacity(budget, annual_rate, months, insurance_rate) == pytest.approx(
+        reference_capacity(budget, annual_rate, months, insurance_rate), rel=1e-9
+    )
+
+
+def test_floored_capacity_never_exceeds_budget():
+    generator = random.Random(20261017)
+    for _ in range(300):
+        budget_minor = generator.randint(10_000, 500_000_000)
+        rate_bp = generator.randint(100, 2000)
+        months = generator.randint(6, 360)
+        insurance_rate = generator.choice([0, 0.2, 0.36, 1.5])
+
+        capacities, payments, insurances = credits._affordable_capacities(budget_minor, rate_bp, [months], insurance_rate)
+        capacity = int(capacities[0])
+        assert capacity % finance.MINOR_UNITS == 0
+        assert int(payments[0]) + int(insurances[0]) <= budget_minor
+        # Au plus un FCFA sous la forme fermée (arrondi au FCFA inférieur et arrondis au centime)
+        exact = finance.borrowing_capacity(budget_minor, finance.bp_to_percent(rate_bp), months, insurance_rate)
+        assert exact - 2 * finance.MINOR_UNITS < capacity <= exact
+
+
+def test_endpoint_respects_budget_and_matches_curve(client):
+    params = {"monthly_income": 800_000, "duration_months": 24, "interest_rate": 6.5, "max_debt_ratio": 33}
+    single = client.get("/api/credits/borrowing-capacity", params=params).json()
+    exact = finance.borrowing_capacity(264_000, 6.5, 24, 0.36)
+    assert exact - 2 < single["borrowing_capacity"] <= exact
+    assert single["borrowing_capacity"] == int(single["borrowing_capacity"])
+    assert single["max_monthly_payment"] <= 264_000
+
+    curve = client.get("/api/credits/borrowing-capacity", params={**params, "include_curve": True}).json()
+    position = curve["capacity_curve"]["durations"].index(24)
+    assert curve["capacity_curve"]["borrowing_capacity"][position] == single["borrowing_capacity"]
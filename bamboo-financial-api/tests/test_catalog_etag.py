@@ -0,0 +1,50 @@
+# tests/test_catalog_etag.py - ETag et GET conditionnel des endpoints du catalogue
+import catalog
+import database
+import models
+
+
+def test_conditional_get_returns_304_until_the_catalog_changes(client):
+    first = client.get("/api/credits/products")
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    assert "must-revalidate" in first.headers["cache-control"]
+
+    revalidated = client.get("/api/credits/products", headers={"If-None-Match": etag})
+    assert revalidated.status_code == 304
+    assert revalidated.headers["etag"] == etag
+    assert revalidated.content == b""
+
+    db = database.SessionLocal()
+    try:
+        bank = db.query(models.Bank).filter(models.Bank.id == "ugb").one()
+        bank.full_name = "Union Gabonaise de Banque"
+        db.commit()
+    finally:
+        db.close()
+
+    changed = client.get("/api/credits/products", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert changed.json() != first.json()
+
+
+def test_etag_depends_on_the_query(client):
+    all_products = client.get("/api/credits/products").headers["etag"]
+    filtered = client.get("/api/credits/products", params={"credit_type": "immobilier"}).headers["etag"]
+    assert all_products != filtered
+    assert client.get("/api/credits/products", params={"credit_type": "immobilier"},
+                      headers={"If-None-Match": all_products}).status_code == 200
+
+
+def test_if_none_match_parsing():
+    etag = '"abc-123"'
+    assert catalog.etag_matches('"x", W/"abc-123"', etag)
+    assert catalog.etag_matches("*", etag)
+    assert not catalog.etag_matches('"abc"', etag)
+    assert not catalog.etag_matches(None, etag)
+
+
+def test_non_catalog_paths_have_no_etag(client):
+    response = client.get("/api/credits/borrowing-capacity", params={"monthly_income": 500_000})
+    assert "etag" not in response.headers
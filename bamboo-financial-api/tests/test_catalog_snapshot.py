@@ -0,0 +1,64 @@
+# tests/test_catalog_snapshot.py - Instantané du catalogue et invalidation par les écritures
+import catalog
+import database
+import models
+
+
+def test_snapshot_matches_database(app):
+    snapshot = catalog.get_snapshot()
+    db = database.SessionLocal()
+    try:
+        products = db.query(models.CreditProduct).filter(models.CreditProduct.is_active == True).all()
+        assert sorted(product.id for product in snapshot.active_credit_products) == sorted(p.id for p in products)
+        for product in products:
+            record = snapshot.credit_products[product.id]
+            assert (record.min_amount, record.average_rate, record.bank.name) == (
+                product.min_amount, product.average_rate, product.bank.name
+            )
+    finally:
+        db.close()
+    assert catalog.get_snapshot() is snapshot
+
+
+def test_commit_invalidates_and_rollback_does_not(app):
+    snapshot = catalog.get_snapshot()
+    db = database.SessionLocal()
+    try:
+        product = db.query(models.CreditProduct).filter(models.CreditProduct.id == "c3").one()
+        product.average_rate = 13
+        db.flush()
+        db.rollback()
+        assert catalog.get_snapshot() is snapshot
+
+        product = db.query(models.CreditProduct).filter(models.CreditProduct.id == "c3").one()
+        product.average_rate = 13
+        db.commit()
+        updated = catalog.get_snapshot()
+        assert updated.version > snapshot.version
+        assert float(updated.credit_products["c3"].average_rate) == 13
+        assert updated.fingerprint != snapshot.fingerprint
+
+        product.average_rate = 12
+        db.commit()
+    finally:
+        db.close()
+
+
+def test_fingerprint_depends_on_content_only(app):
+    # Même contenu rechargé : même empreinte, quelle que soit la version
+    snapshot = catalog.get_snapshot()
+    catalog.invalidate()
+    reloaded = catalog.get_snapshot()
+    assert reloaded is not snapshot and reloaded.version > snapshot.version
+    assert reloaded.fingerprint == snapshot.fingerprint
+
+
+def test_unrelated_writes_keep_snapshot(app):
+    snapshot = catalog.get_snapshot()
+    db = database.SessionLocal()
+    try:
+        db.query(models.CreditSimulation).filter(models.CreditSimulation.id == "absent").delete()
+        db.commit()
+    finally:
+        db.close()
+    assert catalog.get_snapshot() is snapshot
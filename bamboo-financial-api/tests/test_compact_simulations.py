@@ -0,0 +1,128 @@
+# tests/test_compact_simulations.py - Compactage par lots des tableaux stockés (migration)
+import pytest
+
+import database
+import finance
+import models
+from migrations import compact_simulations
+
+# (montant, apport, taux, durée, mensualité, tableau stocké altéré)
+CREDITS = [
+    (3_000_000, 0, 8.0, 30, 110_000.0, False),
+    (12_345_678.9, 1_000_000, 7.5, 277, 90_000.0, False),
+    (800_000, 0, 12.0, 12, 71_000.0, True),
+    (5_000_000, 500_000, 9.25, 61, 93_500.0, False),
+    (2_000_000, 0, 6.5, 24, 89_000.0, True),
+]
+# (versement initial, mensualité, taux, durée, capitalisation, tableau stocké altéré)
+SAVINGS = [
+    (600_000, 50_000, 5.0, 48, "quarterly", False),
+    (1_000_000, 0, 3.5, 7, None, False),
+    (200_000, 10_000, 4.0, 36, "daily", True),
+]
+
+
+def credit_rows():
+    rows = {}
+    for position, (amount, down_payment, rate, months, payment, altered) in enumerate(CREDITS):
+        schedule = finance.amortization_schedule(*finance.credit_schedule_terms(amount, down_payment, rate, months, payment))
+        if altered:
+            schedule[-1]["interest"] += 50
+        rows[f"compact-credit-{position}"] = models.CreditSimulation(
+            id=f"compact-credit-{position}", credit_product_id="c1", requested_amount=amount,
+            duration_months=months, monthly_income=2_000_000, current_debts=0, down_payment=down_payment,
+            applied_rate=rate, monthly_payment=payment, total_cost=payment * months,
+            total_interest=payment * months - amount, debt_ratio=10, eligible=True,
+            amortization_schedule=schedule, schedule_format=finance.SCHEDULE_FORMAT_INLINE
+        )
+    return rows
+
+
+def savings_rows():
+    rows = {}
+    for position, (initial, monthly, rate, months, frequency, altered) in enumerate(SAVINGS):
+        projection = finance.savings_projection(initial, monthly, rate, months, frequency or "monthly", include_breakdown=True)
+        breakdown = finance.breakdown_rows(projection["monthly_breakdown"])
+        if altered:
+            breakdown[3]["balance"] += 50
+        # Lignes les plus anciennes : ni taux ni capitalisation, ceux du produit s'appliquent
+        rows[f"compact-savings-{position}"] = models.SavingsSimulation(
+            id=f"compact-savings-{position}", savings_product_id="s1", initial_amount=initial,
+            monthly_contribution=monthly, duration_months=months, final_amount=projection["final_amount"],
+            total_contributions=projection["total_contributions"], total_interest=projection["total_interest"],
+            interest_rate=rate if frequency else None, compounding_frequency=frequency,
+            monthly_breakdown=breakdown, schedule_format=finance.SCHEDULE_FORMAT_INLINE
+        )
+    return rows
+
+
+def stored_state(db):
+    credits = db.query(
+        models.CreditSimulation.id, models.CreditSimulation.schedule_format, models.CreditSimulation.amortization_schedule
+    ).filter(models.CreditSimulation.id.like("compact-credit-%")).all()
+    savings = db.query(
+        models.SavingsSimulation.id, models.SavingsSimulation.schedule_format, models.SavingsSimulation.monthly_breakdown
+    ).filter(models.SavingsSimulation.id.like("compact-savings-%")).all()
+    return {row.id: (row[1], row[2]) for row in credits + savings}
+
+
+@pytest.fixture
+def legacy_rows(app):
+    credits, savings = credit_rows(), savings_rows()
+    db = database.SessionLocal()
+    try:
+        db.add_all(list(credits.values()) + list(savings.values()))
+        db.commit()
+        expected = {
+            **{key: finance.credit_schedule(row) for key, row in credits.items()},
+            **{key: finance.savings_breakdown(row) for key, row in savings.items()},
+        }
+        yield expected
+    finally:
+        db.rollback()
+        db.query(models.CreditSimulation).filter(models.CreditSimulation.id.like("compact-credit-%")).delete(synchronize_session=False)
+        db.query(models.SavingsSimulation).filter(models.SavingsSimulation.id.like("compact-savings-%")).delete(synchronize_session=False)
+        db.commit()
+        db.close()
+
+
+def test_dry_run_writes_nothing(legacy_rows):
+    db = database.SessionLocal()
+    try:
+        before = stored_state(db)
+        stats = compact_simulations.compact_simulations(batch_size=2, dry_run=True)
+        db.expire_all()
+        assert stored_state(db) == before
+    finally:
+        db.close()
+
+    assert stats["credit"] == {"scanned": 5, "compacted": 3, "kept": 2}
+    assert stats["savings"] == {"scanned": 3, "compacted": 2, "kept": 1}
+
+
+def test_compaction_keeps_regenerated_rows_identical(legacy_rows):
+    stats = compact_simulations.compact_simulations(batch_size=2)
+    assert stats["credit"] == {"scanned": 5, "compacted": 3, "kept": 2}
+    assert stats["savings"] == {"scanned": 3, "compacted": 2, "kept": 1}
+
+    db = database.SessionLocal()
+    try:
+        state = stored_state(db)
+        for key, (schedule_format, stored) in state.items():
+            altered = (CREDITS if key.startswith("compact-credit") else SAVINGS)[int(key.rsplit("-", 1)[1])][-1]
+            if altered:
+                assert (schedule_format, stored) == (finance.SCHEDULE_FORMAT_INLINE, legacy_rows[key])
+            else:
+                assert (schedule_format, stored) == (finance.SCHEDULE_FORMAT_PARAMETERS, None)
+
+        # Tableaux régénérés depuis les seuls paramètres : identiques aux tableaux supprimés
+        for simulation in db.query(models.CreditSimulation).filter(models.CreditSimulation.id.like("compact-credit-%")):
+            assert finance.credit_schedule(simulation) == legacy_rows[simulation.id]
+        for simulation in db.query(models.SavingsSimulation).filter(models.SavingsSimulation.id.like("compact-savings-%")):
+            assert finance.savings_breakdown(simulation) == legacy_rows[simulation.id]
+            assert simulation.compounding_frequency is not None and simulation.interest_rate is not None
+    finally:
+        db.close()
+
+    # Seconde passe : plus rien à compacter
+    assert compact_simulations.compact_simulations(batch_size=2)["credit"] == {"scanned": 2, "compacted": 0, "kept": 2}
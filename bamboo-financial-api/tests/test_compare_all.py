@@ -0,0 +1,78 @@
+# tests/test_compare_all.py - Comparaison multi-catégories identique aux classements par catégorie
+import pytest
+
+import catalog
+from routers import compare
+from routers.credits import rank_credit_offers
+from routers.savings import rank_savings_offers
+
+PARAMS = {
+    "monthly_income": 1_000_000, "current_debts": 50_000,
+    "credit_type": "immobilier", "amount": 10_000_000, "duration": 120,
+    "savings_initial": 600_000, "savings_monthly": 50_000, "savings_duration": 48,
+    "insurance_type": "auto", "age": 30, "guarantees": "vol,bris_glace", "vehicle_value": 9_000_000,
+    "limit": 5,
+}
+
+
+def without_timing(section):
+    return {key: value for key, value in section.items() if key != "computation_time_ms"}
+
+
+def test_sections_match_the_category_rankers(client):
+    response = client.get("/api/compare/all", params=PARAMS)
+    assert response.status_code == 200
+    data = response.json()
+    snapshot = catalog.get_snapshot()
+    assert data["catalog_version"] == snapshot.version
+
+    credit = rank_credit_offers("immobilier", 10_000_000, 120, 1_000_000, 50_000, 5, snapshot=snapshot)
+    savings = rank_savings_offers(600_000, 50_000, 48, 5, snapshot=snapshot)
+    insurance = compare.rank_insurance_offers("auto", 30, {"vehicle_value": 9_000_000}, ["vol", "bris_glace"], 5,
+                                              snapshot=snapshot)
+    assert data["credit"] == credit
+    assert without_timing(data["savings"]) == without_timing(savings)
+    assert data["insurance"] == insurance
+    assert data["profile"]["insured_values"] == {"vehicle_value": 9_000_000}
+    assert data["highlights"]["credit"] == credit["comparisons"][0]
+
+
+def test_insured_values_reach_the_rating_engine(client):
+    def premiums(vehicle_value):
+        params = {"monthly_income": 1_000_000, "insurance_type": "auto", "age": 30}
+        if vehicle_value:
+            params["vehicle_value"] = vehicle_value
+        offers = client.get("/api/compare/all", params=params).json()["insurance"]["offers"]
+        return {offer["product"]["id"]: offer["annual_premium"] for offer in offers}
+
+    # Les produits seedés ont une prime de base fixe : la valeur déclarée ne joue que sur les produits au taux
+    assert premiums(None) == premiums(30_000_000)
+    rates = compare.rank_insurance_offers("auto", 30, {"vehicle_value": 30_000_000}, [], 5)
+    assert {offer["product"]["id"]: offer["annual_premium"] for offer in rates["offers"]} == premiums(30_000_000)
+
+
+def test_merged_ranking_scores_offers_against_their_category_best():
+    sections = {
+        "credit": {"comparisons": [
+            {"monthly_payment": 100.0, "bank": {"name": "A"}, "product": {"id": "c1", "name": "C1"}},
+            {"monthly_payment": 125.0, "bank": {"name": "B"}, "product": {"id": "c2", "name": "C2"}},
+        ]},
+        "savings": {"offers": [
+            {"final_amount": 2000.0, "bank": {"name": "A"}, "product": {"id": "s1", "name": "S1"}},
+            {"final_amount": 1900.0, "bank": {"name": "B"}, "product": {"id": "s2", "name": "S2"}},
+        ]},
+        "insurance": {"offers": [
+            {"annual_premium": 50.0, "company": None, "product": {"id": "i1", "name": "I1"}},
+            {"annual_premium": 100.0, "company": {"name": "N"}, "product": {"id": "i2", "name": "I2"}},
+        ]},
+    }
+    ranking = compare.merged_ranking(sections)
+    assert [(entry["product"]["id"], entry["score"]) for entry in ranking] == [
+        ("c1", 1.0), ("s1", 1.0), ("i1", 1.0), ("s2", 0.95), ("c2", 0.8), ("i2", 0.5)
+    ]
+    assert ranking[2]["institution"] is None
+    assert compare.merged_ranking({"credit": {"error": "boom"}}) == []
+
+
+def test_compare_all_needs_a_category(client):
+    assert client.get("/api/compare/all", params={"monthly_income": 500_000}).status_code == 400
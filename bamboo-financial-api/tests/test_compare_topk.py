@@ -0,0 +1,57 @@
+# tests/test_compare_topk.py - Sélection top-k et tris de /compare comparés au tri complet
+import pytest
+
+from routers import credits
+
+PROFILES = [
+    ("immobilier", 3_000_000, 60, 400_000, 50_000),
+    ("consommation", 1_500_000, 36, 250_000, 0),
+    ("immobilier", 20_000_000, 240, 1_200_000, 100_000),
+]
+
+
+@pytest.mark.parametrize("credit_type, amount, duration, income, debts", PROFILES)
+@pytest.mark.parametrize("sort_by", credits.COMPARE_SORT_KEYS)
+def test_top_k_is_the_head_of_the_full_sort(credit_market, credit_type, amount, duration, income, debts, sort_by):
+    full = credits.rank_credit_offers(credit_type, amount, duration, income, debts, sort_by=sort_by,
+                                      snapshot=credit_market)
+    offers = full["comparisons"]
+    assert len(offers) > 5
+
+    for limit in (1, 3, 5, len(offers) + 10):
+        top = credits.rank_credit_offers(credit_type, amount, duration, income, debts, limit=limit, sort_by=sort_by,
+                                         snapshot=credit_market)
+        assert top["comparisons"] == offers[:limit]
+        assert top["statistics"]["total_offers"] == full["statistics"]["total_offers"]
+        assert top["statistics"]["returned_offers"] == min(limit, len(offers))
+
+
+@pytest.mark.parametrize("credit_type, amount, duration, income, debts", PROFILES)
+def test_sort_orders(credit_market, credit_type, amount, duration, income, debts):
+    def ranked(sort_by):
+        return credits.rank_credit_offers(credit_type, amount, duration, income, debts, sort_by=sort_by,
+                                          snapshot=credit_market)["comparisons"]
+
+    payments = [offer["monthly_payment"] for offer in ranked("monthly_payment")]
+    assert payments == sorted(payments)
+    rates = [offer["product"]["rate"] for offer in ranked("rate")]
+    assert rates == sorted(rates)
+    times = [offer["product"]["processing_time"] for offer in ranked("processing_time")]
+    known = [time for time in times if time is not None]
+    assert known == sorted(known) and times == known + [None] * (len(times) - len(known))
+
+    # Statistiques identiques aux valeurs recalculées sur toutes les offres
+    statistics = credits.rank_credit_offers(credit_type, amount, duration, income, debts,
+                                            snapshot=credit_market)["statistics"]
+    assert statistics["lowest_monthly"] == payments[0]
+    assert statistics["highest_monthly"] == payments[-1]
+
+
+def test_eligible_only_keeps_eligible_offers_in_order(credit_market):
+    everything = credits.rank_credit_offers("immobilier", 20_000_000, 240, 900_000, 100_000, snapshot=credit_market)
+    eligible = credits.rank_credit_offers("immobilier", 20_000_000, 240, 900_000, 100_000, limit=3,
+                                          eligible_only=True, snapshot=credit_market)
+    expected = [offer for offer in everything["comparisons"] if offer["eligible"]][:3]
+    assert 0 < len(expected) < len(everything["comparisons"])
+    assert eligible["comparisons"] == expected
+    assert eligible["statistics"]["eligible_offers"] == everything["statistics"]["eligible_offers"]
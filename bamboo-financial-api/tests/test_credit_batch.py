@@ -0,0 +1,83 @@
+# tests/test_credit_batch.py - Simulation groupée comparée aux simulations unitaires
+from sqlalchemy.sql.dml import Insert
+
+import database
+import models
+
+SCENARIOS = [
+    {"credit_product_id": "c1", "requested_amount": 25_000_000, "duration_months": 240,
+     "monthly_income": 1_500_000, "current_debts": 100_000, "down_payment": 2_500_000},
+    {"credit_product_id": "c2", "requested_amount": 777_777.77, "duration_months": 37,
+     "monthly_income": 400_000},
+    {"credit_product_id": "c3", "requested_amount": 5_000_000, "duration_months": 60,
+     "monthly_income": 300_000, "current_debts": 50_000},
+    {"credit_product_id": "c1", "requested_amount": 150_000_000, "duration_months": 300,
+     "monthly_income": 5_000_000},
+]
+COMPARED_FIELDS = ("applied_rate", "monthly_payment", "total_interest", "total_cost", "debt_ratio", "eligible",
+                   "recommendations")
+
+
+def test_batch_matches_single_simulations(client):
+    response = client.post("/api/credits/simulate-batch", json={"simulations": SCENARIOS, "persist": False})
+    assert response.status_code == 200
+    batch = response.json()
+    assert batch["statistics"]["succeeded"] == len(SCENARIOS)
+
+    for scenario, result in zip(SCENARIOS, batch["results"]):
+        single = client.post("/api/credits/simulate", json=scenario).json()
+        assert {field: result[field] for field in COMPARED_FIELDS} == {field: single[field] for field in COMPARED_FIELDS}
+
+
+def test_batch_reports_invalid_items_without_failing(client):
+    scenarios = [
+        SCENARIOS[0],
+        {**SCENARIOS[0], "credit_product_id": "inconnu"},
+        {**SCENARIOS[2], "duration_months": 120},
+    ]
+    batch = client.post("/api/credits/simulate-batch", json={"simulations": scenarios, "persist": False}).json()
+
+    assert [result["success"] for result in batch["results"]] == [True, False, False]
+    assert batch["results"][1]["error"] == "Produit de crédit non trouvé"
+    assert batch["results"][2]["error"] == "Durée maximum: 60 mois"
+    assert (batch["statistics"]["succeeded"], batch["statistics"]["failed"]) == (1, 2)
+
+
+def test_batch_persisted_in_one_insert(app, client):
+    executed = []
+    session = database.SessionLocal()
+    execute = session.execute
+
+    def recording_execute(statement, params=None, *args, **kwargs):
+        if isinstance(statement, Insert):
+            executed.append((statement.table.name, params))
+        return execute(statement, params, *args, **kwargs)
+
+    session.execute = recording_execute
+    app.dependency_overrides[database.get_db] = lambda: session
+    try:
+        scenarios = SCENARIOS + [{**SCENARIOS[0], "credit_product_id": "inconnu"}]
+        batch = client.post("/api/credits/simulate-batch", json={"simulations": scenarios, "persist": True}).json()
+    finally:
+        app.dependency_overrides.clear()
+        session.close()
+
+    assert batch["persisted"] is True
+    ids = [result["simulation_id"] for result in batch["results"] if result["success"]]
+    assert len(ids) == len(SCENARIOS) == len(set(ids))
+    assert [(table, [row["id"] for row in rows]) for table, rows in executed] == [("credit_simulations", ids)]
+
+    db = database.SessionLocal()
+    try:
+        stored = {
+            simulation.id: simulation for simulation in
+            db.query(models.CreditSimulation).filter(models.CreditSimulation.id.in_(ids)).all()
+        }
+    finally:
+        db.close()
+    assert set(stored) == set(ids)
+    for result in batch["results"][:len(SCENARIOS)]:
+        simulation = stored[result["simulation_id"]]
+        assert simulation.credit_product_id == result["credit_product_id"]
+        assert float(simulation.monthly_payment) == result["monthly_payment"]
+        assert simulation.eligible == result["eligible"]
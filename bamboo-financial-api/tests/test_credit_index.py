@@ -0,0 +1,87 @@
+# tests/test_credit_index.py - Index d'intervalles comparé au filtre linéaire d'origine
+import random
+from decimal import Decimal
+from types import SimpleNamespace
+
+import catalog
+from routers import credits
+
+
+def linear_filter(products, credit_type, amount, duration):
+    """Ancien filtre de /compare : type ILIKE, bornes de montant et de durée incluses"""
+    key = credit_type.strip().lower()
+    return [
+        product for product in products
+        if key in product.type.lower()
+        and product.min_amount <= amount <= product.max_amount
+        and product.min_duration_months <= duration <= product.max_duration_months
+    ]
+
+
+def test_interval_index_matches_brute_force():
+    generator = random.Random(12)
+    intervals = []
+    for _ in range(40):
+        low = generator.randint(0, 100)
+        intervals.append((low, low + generator.randint(0, 40)))
+    index = catalog.IntervalIndex(intervals)
+
+    for value in range(-5, 150):
+        expected = {position for position, (low, high) in enumerate(intervals) if low <= value <= high}
+        mask = index.stab(value)
+        assert {position for position in range(len(intervals)) if mask >> position & 1} == expected
+
+
+def test_product_index_matches_linear_filter():
+    generator = random.Random(2026)
+    types = ["immobilier", "consommation", "auto", "travaux"]
+    products = []
+    for number in range(60):
+        min_amount = generator.choice([100_000, 500_000, 1_000_000, 5_000_000])
+        min_duration = generator.choice([6, 12, 24])
+        products.append(SimpleNamespace(
+            id=f"p{number}", type=generator.choice(types),
+            min_amount=Decimal(min_amount), max_amount=Decimal(min_amount * generator.choice([2, 10, 100])),
+            min_duration_months=min_duration, max_duration_months=min_duration + generator.choice([0, 36, 240])
+        ))
+    index = catalog.CreditProductIndex(products)
+
+    for _ in range(500):
+        credit_type = generator.choice(types + ["immo", " Auto ", "inconnu"])
+        amount = generator.choice([100_000, 499_999.99, 500_000, 2_000_000, 5_000_000, 100_000_000, 500_000_001])
+        duration = generator.choice([6, 12, 36, 60, 264, 300])
+        expected = linear_filter(products, credit_type, amount, duration)
+        assert sorted(p.id for p in index.match(credit_type, amount, duration)) == sorted(p.id for p in expected)
+
+
+def test_compare_returns_the_linear_matches(client):
+    snapshot = catalog.get_snapshot()
+    for credit_type, amount, duration in [("immobilier", 600_000, 12), ("immo", 150_000_000, 300), ("conso", 50_000, 12)]:
+        data = client.get("/api/credits/compare", params={
+            "credit_type": credit_type, "amount": amount, "duration": duration, "monthly_income": 1_000_000
+        }).json()
+        expected = linear_filter(snapshot.active_credit_products, credit_type, amount, duration)
+        assert sorted(c["product"]["id"] for c in data["comparisons"]) == sorted(p.id for p in expected)
+
+
+def test_exact_type_still_returns_types_containing_it(credit_market):
+    # "immobilier" désigne aussi "immobilier locatif", comme ILIKE '%immobilier%'
+    products = {
+        product_id: product._replace(type="Immobilier Locatif") if number % 3 == 0 and product.type == "immobilier" else product
+        for number, (product_id, product) in enumerate(credit_market.credit_products.items())
+    }
+    active = tuple(products.values())
+    credit_index = catalog.CreditProductIndex(active)
+    market = credit_market._replace(
+        credit_products=products, active_credit_products=active,
+        credit_index=credit_index, best_offers=catalog.BestOffersTable(credit_index)
+    )
+    assert sorted(credit_index.types_matching("immobilier")) == ["immobilier", "immobilier locatif"]
+    assert credit_index.types_matching("Immobilier Locatif") == ["immobilier locatif"]
+
+    for credit_type in ["immobilier", "immobilier locatif", "locatif", "consommation"]:
+        for amount, duration in [(5_000_000, 120), (1_000_000, 60), (3_333_333, 97)]:
+            expected = linear_filter(active, credit_type, amount, duration)
+            assert sorted(p.id for p in credit_index.match(credit_type, amount, duration)) == sorted(p.id for p in expected)
+            ranked = credits.rank_credit_offers(credit_type, amount, duration, 2_000_000, snapshot=market)
+            assert sorted(c["product"]["id"] for c in ranked.get("comparisons", [])) == sorted(p.id for p in expected)
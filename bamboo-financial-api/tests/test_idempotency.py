@@ -0,0 +1,101 @@
+# tests/test_idempotency.py - Rejeu des POST portant un en-tête Idempotency-Key
+import asyncio
+import uuid
+
+import httpx
+from fastapi import FastAPI, Request
+
+import idempotency
+
+HEADER = idempotency.IDEMPOTENCY_HEADER
+
+
+def make_app(delay=0.0):
+    """Application minimale : une route lente comptant ses exécutions derrière le middleware"""
+    app = FastAPI()
+    app.state.calls = 0
+
+    @app.middleware("http")
+    async def idempotent_posts(request: Request, call_next):
+        if HEADER.lower() not in request.headers:
+            return await call_next(request)
+        return await idempotency.handle_idempotent_request(request, call_next)
+
+    @app.post("/simulate")
+    async def simulate(payload: dict):
+        app.state.calls += 1
+        execution = app.state.calls
+        await asyncio.sleep(delay)
+        return {"execution": execution, **payload}
+
+    return app
+
+
+def run(app, requests):
+    """Envoie les requêtes (json, en-têtes) simultanément"""
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(*(
+                client.post("/simulate", json=payload, headers=headers) for payload, headers in requests
+            ))
+
+    return asyncio.run(scenario())
+
+
+def test_same_key_and_body_replays_the_first_response():
+    app, key = make_app(), {HEADER: str(uuid.uuid4())}
+    first, = run(app, [({"amount": 1}, key)])
+    second, = run(app, [({"amount": 1}, key)])
+
+    assert second.json() == first.json() == {"execution": 1, "amount": 1}
+    assert second.headers["idempotent-replayed"] == "true"
+    assert app.state.calls == 1
+
+
+def test_same_key_with_another_body_is_rejected():
+    app, key = make_app(), {HEADER: str(uuid.uuid4())}
+    run(app, [({"amount": 1}, key)])
+    rejected, = run(app, [({"amount": 2}, key)])
+    assert rejected.status_code == 422
+    assert app.state.calls == 1
+
+
+def test_in_flight_duplicates_wait_or_conflict():
+    app, key = make_app(delay=0.1), {HEADER: str(uuid.uuid4())}
+    first, duplicate, conflicting = run(app, [({"amount": 1}, key), ({"amount": 1}, key), ({"amount": 2}, key)])
+
+    assert first.status_code == duplicate.status_code == 200
+    assert duplicate.json() == first.json()
+    assert conflicting.status_code == 409
+    assert app.state.calls == 1
+
+
+def test_keys_are_scoped_per_client():
+    app, key = make_app(), str(uuid.uuid4())
+    alice, bob, alice_token = run(app, [
+        ({"amount": 1}, {HEADER: key, "User-Agent": "navigateur-a"}),
+        ({"amount": 1}, {HEADER: key, "User-Agent": "navigateur-b"}),
+        ({"amount": 1}, {HEADER: key, "Authorization": "Bearer jeton-a"}),
+    ])
+    assert app.state.calls == 3
+    assert len({response.json()["execution"] for response in (alice, bob, alice_token)}) == 3
+
+
+def test_invalid_key_is_rejected():
+    app = make_app()
+    response, = run(app, [({"amount": 1}, {HEADER: "x" * (idempotency.MAX_KEY_LENGTH + 1)})])
+    assert response.status_code == 400
+    assert app.state.calls == 0
+
+
+def test_simulation_endpoint_replays_the_same_simulation(client):
+    request = {"credit_product_id": "c1", "requested_amount": 8_000_000, "duration_months": 120,
+               "monthly_income": 900_000}
+    headers = {HEADER: str(uuid.uuid4())}
+    first = client.post("/api/credits/simulate", json=request, headers=headers)
+    replay = client.post("/api/credits/simulate", json=request, headers=headers)
+
+    assert replay.json()["simulation_id"] == first.json()["simulation_id"]
+    assert replay.headers["idempotent-replayed"] == "true"
+    assert client.post("/api/credits/simulate", json=request).json()["simulation_id"] != first.json()["simulation_id"]
@@ -0,0 +1,92 @@
+# tests/test_insurance_batch_quotes.py - Devis de tous les produits des assureurs sélectionnés
+import pytest
+
+import catalog
+import database
+import models
+import quote_cache
+import rating
+import write_behind
+
+REQUEST = {
+    "insurance_type": "auto", "age": 30, "guarantees": ["responsabilite_civile", "vol"],
+    "risk_factors": {"vehicle_value": 8_000_000}, "selected_insurers": ["ogar", "nsia"]
+}
+
+
+@pytest.fixture(autouse=True)
+def empty_quote_cache():
+    quote_cache.clear_quote_cache()
+    yield
+    quote_cache.clear_quote_cache()
+
+
+def stored_quotes(quote_id):
+    db = database.SessionLocal()
+    try:
+        return {
+            quote.id: quote for quote in
+            db.query(models.InsuranceQuote).filter(models.InsuranceQuote.id.like(f"{quote_id}%")).all()
+        }
+    finally:
+        db.close()
+
+
+@pytest.mark.parametrize("insurers", [["ogar", "nsia"], ["nsia"], ["ogar", "inconnu"]])
+def test_every_product_priced_like_single_product(client, insurers):
+    data = client.post("/api/insurance/quote", json={**REQUEST, "selected_insurers": insurers}).json()
+    snapshot = catalog.get_snapshot()
+
+    expected = {
+        product.id: product for product in snapshot.active_insurance_products
+        if product.type == "auto" and product.insurance_company_id in insurers
+        and rating.accepts_age(product, REQUEST["age"])
+    }
+    assert sorted(quote["product_id"] for quote in data["quotes"]) == sorted(expected)
+
+    for quote in data["quotes"]:
+        premium = rating.product_premium(
+            expected[quote["product_id"]], REQUEST["age"], REQUEST["risk_factors"], REQUEST["guarantees"]
+        )
+        assert quote["annual_premium"] == pytest.approx(round(premium, 2), abs=0.01)
+        assert quote["monthly_premium"] == pytest.approx(round(premium / 12, 2), abs=0.01)
+        assert quote["company_id"] == expected[quote["product_id"]].insurance_company_id
+
+    premiums = [quote["annual_premium"] for quote in data["quotes"]]
+    assert premiums == sorted(premiums)
+
+
+@pytest.mark.parametrize("age", [19, 45, 70])
+def test_age_bands_priced_like_single_product(client, age):
+    data = client.post("/api/insurance/quote", json={**REQUEST, "age": age}).json()
+    products = catalog.get_snapshot().insurance_products
+    for quote in data["quotes"]:
+        premium = rating.product_premium(products[quote["product_id"]], age, REQUEST["risk_factors"], REQUEST["guarantees"])
+        assert quote["annual_premium"] == pytest.approx(round(premium, 2), abs=0.01)
+    assert len(data["quotes"]) == 2
+
+
+def test_quotes_persisted_in_one_batch(client, wait_for_writes, monkeypatch):
+    calls = []
+    enqueue_many = write_behind.enqueue_many
+    monkeypatch.setattr(write_behind, "enqueue_many", lambda model, rows, on_written=None: (
+        calls.append(len(rows)), enqueue_many(model, rows, on_written)
+    ))
+
+    data = client.post("/api/insurance/quote", json=REQUEST).json()
+    assert calls == [1 + len(data["quotes"])]
+
+    wait_for_writes()
+    stored = stored_quotes(data["quote_id"])
+    assert set(stored) == {data["quote_id"]} | {quote["quote_id"] for quote in data["quotes"]}
+    assert stored[data["quote_id"]].insurance_product_id is None
+    for quote in data["quotes"]:
+        row = stored[quote["quote_id"]]
+        assert row.insurance_product_id == quote["product_id"]
+        assert float(row.annual_premium) == pytest.approx(quote["annual_premium"], abs=0.01)
+        assert row.source_quote_id is None
+
+
+@pytest.mark.parametrize("changes", [{"age": 17}, {"age": 81}, {"guarantees": []}, {"selected_insurers": []}])
+def test_invalid_requests_rejected(client, changes):
+    assert client.post("/api/insurance/quote", json={**REQUEST, **changes}).status_code == 400
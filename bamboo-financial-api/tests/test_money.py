@@ -0,0 +1,60 @@
+# tests/test_money.py - Couche monétaire en virgule fixe (centimes et points de base)
+from decimal import Decimal, ROUND_HALF_EVEN
+
+import numpy as np
+import pytest
+
+import finance
+
+
+def reference_payment_minor(principal_minor, rate_bp, months):
+    """Mensualité en centimes calculée en Decimal (précision 28 chiffres)"""
+    monthly_rate = Decimal(rate_bp) / 10000 / 12
+    if monthly_rate == 0:
+        payment = Decimal(principal_minor) / months
+    else:
+        growth = (1 + monthly_rate) ** months
+        payment = Decimal(principal_minor) * monthly_rate * growth / (growth - 1)
+    return int(payment.to_integral_value(rounding=ROUND_HALF_EVEN))
+
+
+def test_conversions_are_exact():
+    assert finance.to_minor(0.1 + 0.2) == finance.to_minor(Decimal("0.30")) == 30
+    assert finance.to_minor(Decimal("1234567.89")) == finance.to_minor(1234567.89) == 123456789
+    assert finance.to_minor("2500000") == finance.to_minor(2_500_000) == 250_000_000
+    assert finance.to_minor(None) == 0
+    assert finance.to_bp(7.5) == finance.to_bp(Decimal("7.50")) == 750
+    assert finance.bp_to_percent(825) == 8.25
+    assert finance.from_minor(123456789) == 1234567.89
+    assert finance.to_minor_array([0.1 + 0.2, 1234567.89]).tolist() == [30, 123456789]
+
+
+@pytest.mark.parametrize("principal, rate, months", [
+    (10_000_000, 7.5, 480),
+    (2_500_000, 12.0, 37),
+    (777_777.77, 0.0, 12),
+    (150_000_000, 5.25, 300),
+])
+def test_payment_minor_matches_decimal_reference(principal, rate, months):
+    principal_minor, rate_bp = finance.to_minor(principal), finance.to_bp(rate)
+    expected = reference_payment_minor(principal_minor, rate_bp, months)
+    assert finance.payment_minor(principal_minor, rate_bp, months) == expected
+    assert finance.payments_minor([principal_minor], rate_bp, months).tolist() == [expected]
+
+
+def test_rounded_payment_schedule_closes_at_zero():
+    # Mensualité arrondie au centime : la dernière échéance absorbe le résidu
+    principal, rate, months = 10_000_000, 7.5, 480
+    payment = finance.from_minor(finance.payment_minor(finance.to_minor(principal), finance.to_bp(rate), months))
+    columns = finance.amortization_columns(principal, rate, months, payment)
+
+    assert columns["remaining_balance"][-1] == 0.0
+    assert columns["principal"].sum() == pytest.approx(principal, abs=1e-4)
+    assert np.all(columns["payment"][:-1] == payment)
+
+    # Résidu de la dernière échéance : celui de la boucle mois par mois
+    balance = principal
+    for _ in range(months - 1):
+        balance -= payment - balance * rate / 100 / 12
+    last_payment = balance * (1 + rate / 100 / 12)
+    assert columns["payment"][-1] == pytest.approx(last_payment, abs=1e-4)
@@ -0,0 +1,92 @@
+# tests/test_product_tables.py - Tables de facteurs par produit comparées au calcul direct
+from decimal import Decimal
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import catalog
+import finance
+
+
+def make_product(**overrides):
+    product = dict(
+        id="test-product", min_amount=Decimal("1000000.00"), max_amount=Decimal("200000000.00"),
+        min_duration_months=12, max_duration_months=300,
+        average_rate=Decimal("7.50"), min_rate=Decimal("6.50"), max_rate=None
+    )
+    product.update(overrides)
+    return SimpleNamespace(**product)
+
+
+@pytest.fixture
+def product():
+    product = make_product()
+    yield product
+    finance.drop_product_table(product.id)
+
+
+def test_table_factors_match_annuity_factor(product):
+    table = finance.product_table(product)
+    months = np.arange(12, 301)
+    rates = {"average": 7.5, "min": 6.5, "max": 7.5}
+
+    for kind, rate in rates.items():
+        expected = [finance.annuity_factor(rate, month) for month in months]
+        np.testing.assert_allclose(table.factor_column(months, kind), expected, rtol=1e-12)
+        assert table.factor(120, kind) == pytest.approx(finance.annuity_factor(rate, 120), rel=1e-12)
+
+    # Hors bornes : repli sur le facteur mémorisé
+    assert table.factor(6) == finance.annuity_factor(7.5, 6)
+
+
+def test_product_payment_matches_direct_computation(product):
+    for principal, months in [(5_000_000, 60), (150_000_000, 300), (1_000_000, 12)]:
+        assert finance.product_monthly_payment(product, principal, months) == pytest.approx(
+            finance.monthly_payment(principal, 7.5, months), rel=1e-12
+        )
+        assert finance.product_table(product).payment_minor(finance.to_minor(principal), months) == (
+            finance.payment_minor(finance.to_minor(principal), 750, months)
+        )
+    assert finance.product_monthly_payment(product, 1_000_000, 0) == 0.0
+
+
+def test_table_rebuilt_when_product_changes(product):
+    table = finance.product_table(product)
+    assert finance.product_table(product) is table
+
+    product.average_rate = Decimal("8.25")
+    rebuilt = finance.product_table(product)
+    assert rebuilt is not table
+    assert rebuilt.factor(120) == pytest.approx(finance.annuity_factor(8.25, 120), rel=1e-12)
+
+
+def test_catalog_sync_rebuilds_only_changed_products():
+    products = [make_product(id=f"sync-{index}", average_rate=Decimal(7 + index)) for index in range(3)]
+    try:
+        assert finance.build_product_tables(products) == 3
+        tables = {product.id: finance.product_table(product) for product in products}
+
+        # Rechargement sans modification : aucune reconstruction
+        assert finance.build_product_tables(products) == 0
+        assert all(finance.product_table(product) is tables[product.id] for product in products)
+
+        # Un produit modifié, un produit retiré
+        products[0].max_duration_months = 360
+        assert finance.build_product_tables(products[:2]) == 1
+        assert finance.product_table(products[0]) is not tables["sync-0"]
+        assert finance.product_table(products[0]).factor(360) == pytest.approx(finance.annuity_factor(7, 360), rel=1e-12)
+        assert finance.product_table(products[1]) is tables["sync-1"]
+        # Table du produit retiré supprimée : reconstruite s'il est de nouveau lu
+        assert finance.product_table(products[2]) is not tables["sync-2"]
+    finally:
+        for product in products:
+            finance.drop_product_table(product.id)
+
+
+def test_catalog_reload_keeps_unchanged_tables(app):
+    products = catalog.get_snapshot().credit_products
+    tables = {product_id: finance.product_table(product) for product_id, product in products.items()}
+    catalog.invalidate()
+    reloaded = catalog.get_snapshot().credit_products
+    assert all(finance.product_table(reloaded[product_id]) is table for product_id, table in tables.items())
@@ -0,0 +1,147 @@
+# tests/test_quote_cache.py - Cache des devis par profil de risque normalisé
+from datetime import datetime, timedelta
+
+import pytest
+
+import database
+import models
+import quote_cache
+import write_behind
+
+REQUEST = {
+    "insurance_type": "auto", "age": 42, "guarantees": ["vol", "responsabilite_civile"],
+    "risk_factors": {"vehicle_value": 6_000_000.0, "usage": "personnel"}, "selected_insurers": ["ogar", "nsia"]
+}
+
+
+@pytest.fixture(autouse=True)
+def empty_quote_cache():
+    quote_cache.clear_quote_cache()
+    yield
+    quote_cache.clear_quote_cache()
+
+
+def entry(quote_id="q", valid_for=timedelta(days=1), rows=None):
+    return quote_cache.CachedQuote(quote_id, datetime.now() + valid_for, rows or [], {"quotes": []})
+
+
+def test_profile_key_normalization():
+    key = quote_cache.profile_key("auto", 42, ["vol", "rc"], {"a": 1.0, "b": {"y": 2, "x": [3.0]}}, ["ogar", "nsia"], "f")
+    assert key == quote_cache.profile_key("auto", 42, ["rc", "vol"], {"b": {"x": [3], "y": 2.0}, "a": 1}, ["nsia", "ogar", "nsia"], "f")
+
+    for other in [
+        quote_cache.profile_key("auto", 42, ["vol", "rc"], {"a": 1.5, "b": {"y": 2, "x": [3.0]}}, ["ogar", "nsia"], "f"),
+        quote_cache.profile_key("auto", 43, ["vol", "rc"], {"a": 1.0, "b": {"y": 2, "x": [3.0]}}, ["ogar", "nsia"], "f"),
+        quote_cache.profile_key("auto", 42, ["vol"], {"a": 1.0, "b": {"y": 2, "x": [3.0]}}, ["ogar", "nsia"], "f"),
+        quote_cache.profile_key("auto", 42, ["vol", "rc"], {"a": 1.0, "b": {"y": 2, "x": [3.0]}}, ["ogar"], "f"),
+        quote_cache.profile_key("auto", 42, ["vol", "rc"], {"a": 1.0, "b": {"y": 2, "x": [3.0]}}, ["ogar", "nsia"], "g"),
+    ]:
+        assert other != key
+
+
+def test_entries_expire_at_valid_until():
+    cache = quote_cache.QuoteCache(10)
+    cache.put("valid", entry(valid_for=timedelta(minutes=5)))
+    cache.put("expired", entry(valid_for=timedelta(seconds=-1)))
+
+    assert cache.get("valid") is not None
+    assert cache.get("expired") is None
+    assert cache.info() == {"entries": 1, "max_entries": 10, "hits": 1, "misses": 1}
+
+
+def test_least_recently_used_evicted():
+    cache = quote_cache.QuoteCache(2)
+    cache.put("a", entry("a"))
+    cache.put("b", entry("b"))
+    assert cache.get("a").quote_id == "a"
+    cache.put("c", entry("c"))
+
+    assert cache.get("b") is None
+    assert [cache.get(key).quote_id for key in ("a", "c")] == ["a", "c"]
+
+
+def test_referencing_rows_point_to_source():
+    rows = [
+        {"id": "q", "coverage_details": {"rc": True}, "exclusions": ["course"], "source_quote_id": None, "age": 42},
+        {"id": "q-1", "coverage_details": {"rc": True}, "exclusions": ["guerre"], "source_quote_id": None, "age": 42},
+    ]
+    references = quote_cache.referencing_rows(entry("q", rows=rows), "n", {"session_id": "s"})
+
+    assert [row["id"] for row in references] == ["n", "n-1"]
+    assert [row["source_quote_id"] for row in references] == ["q", "q-1"]
+    for row in references:
+        assert row["coverage_details"] is None and row["exclusions"] is None
+        assert row["session_id"] == "s" and row["age"] == 42
+    # Les lignes d'origine restent intactes
+    assert rows[1]["exclusions"] == ["guerre"]
+
+
+def test_identical_profile_served_from_cache(client, wait_for_writes):
+    first = client.post("/api/insurance/quote", json=REQUEST).json()
+    # Mis en cache une fois les lignes source validées
+    wait_for_writes()
+    info = quote_cache.quote_cache_info()
+    assert info["entries"] == 1
+
+    # Même profil sous une autre forme : même clé, aucun recalcul
+    second = client.post("/api/insurance/quote", json={
+        **REQUEST, "guarantees": ["responsabilite_civile", "vol"],
+        "risk_factors": {"usage": "personnel", "vehicle_value": 6_000_000}, "selected_insurers": ["nsia", "ogar"]
+    }).json()
+    assert quote_cache.quote_cache_info()["hits"] == info["hits"] + 1
+
+    assert second["quote_id"] != first["quote_id"]
+    assert [quote["quote_id"].startswith(second["quote_id"]) for quote in second["quotes"]] == [True] * len(first["quotes"])
+    strip = lambda quotes: [{key: value for key, value in quote.items() if key != "quote_id"} for quote in quotes]
+    assert strip(second["quotes"]) == strip(first["quotes"])
+    assert second["annual_premium"] == first["annual_premium"]
+
+    # Devis encore en file : objet transitoire sans couverture propre
+    pending = write_behind.pending_record(models.InsuranceQuote, second["quote_id"])
+    if pending is not None:
+        assert pending.coverage_details is None and pending.exclusions is None
+        assert pending.source_quote_id == first["quote_id"]
+
+    # Couverture et exclusions lues sur le devis source, en file puis en base
+    for _ in range(2):
+        for original, served in [(first["quote_id"], second["quote_id"])] + [
+            (a["quote_id"], b["quote_id"]) for a, b in zip(first["quotes"], second["quotes"])
+        ]:
+            source = client.get(f"/api/insurance/quote/{original}").json()
+            copy = client.get(f"/api/insurance/quote/{served}").json()
+            assert copy["source_quote_id"] == original
+            assert copy["coverage_details"] == source["coverage_details"]
+            assert copy["exclusions"] == source["exclusions"]
+            assert copy["annual_premium"] == source["annual_premium"]
+        wait_for_writes()
+
+    # Pas de copie du JSON : NULL SQL sur les lignes servies depuis le cache
+    db = database.SessionLocal()
+    try:
+        stored = db.query(
+            models.InsuranceQuote.coverage_details.is_(None), models.InsuranceQuote.exclusions.is_(None)
+        ).filter(models.InsuranceQuote.id.like(f"{second['quote_id']}%")).all()
+    finally:
+        db.close()
+    assert len(stored) == 1 + len(second["quotes"])
+    assert all(coverage_is_null and exclusions_is_null for coverage_is_null, exclusions_is_null in stored)
+
+
+def test_different_profile_not_served_from_cache(client, wait_for_writes):
+    client.post("/api/insurance/quote", json=REQUEST)
+    wait_for_writes()
+    hits = quote_cache.quote_cache_info()["hits"]
+    client.post("/api/insurance/quote", json={**REQUEST, "age": 43})
+    assert quote_cache.quote_cache_info()["hits"] == hits
+
+
+def test_unwritten_quote_is_never_cached(client, monkeypatch):
+    # Lignes source perdues (insertion en échec) : aucune référence possible
+    monkeypatch.setattr(write_behind, "enqueue_many", lambda model, rows, on_written=None: None)
+    first = client.post("/api/insurance/quote", json=REQUEST).json()
+    second = client.post("/api/insurance/quote", json=REQUEST).json()
+
+    assert quote_cache.quote_cache_info()["entries"] == 0
+    assert second["quotes"] and all(
+        not quote["quote_id"].startswith(first["quote_id"]) for quote in second["quotes"]
+    )
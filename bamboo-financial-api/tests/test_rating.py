@@ -0,0 +1,135 @@
+# tests/test_rating.py - Moteur de tarification compilé comparé aux barèmes d'origine
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import rating
+from routers import insurance
+
+GUARANTEE_SETS = [[], ["responsabilite_civile"], ["dommages_collision", "vol", "bris_glace"], ["inconnue"]]
+AGES = [18, 24, 25, 39, 40, 59, 60, 85]
+
+
+def reference_age_factor(age):
+    """Ancien get_age_factor"""
+    if age < 25:
+        return 1.3
+    elif age < 40:
+        return 1.0
+    elif age < 60:
+        return 1.1
+    return 1.2
+
+
+def reference_base_premium(insurance_type, age, risk_factors):
+    """Ancien get_base_premium"""
+    base_premiums = {
+        'auto': risk_factors.get('vehicle_value', 15000000) * 0.003,
+        'habitation': risk_factors.get('property_value', 25000000) * 0.002,
+        'vie': risk_factors.get('coverage_amount', 50000000) * 0.0015,
+        'sante': 45000 * int(risk_factors.get('family_size', 1)),
+        'voyage': 25000 * (1 + int(risk_factors.get('duration', 7)) / 30)
+    }
+    return base_premiums.get(insurance_type, 50000) * reference_age_factor(age)
+
+
+def reference_multiplier(guarantees):
+    return 1.0 + sum(rating.GUARANTEE_COSTS.get(guarantee, 0) for guarantee in guarantees)
+
+
+def reference_product_premium(product, age, risk_factors, guarantees):
+    """Ancien calculate_product_premium (produit sans règles de tarification)"""
+    if product.base_premium:
+        base_premium = float(product.base_premium) * reference_age_factor(age)
+    else:
+        base_premium = reference_base_premium(product.type, age, risk_factors)
+    return base_premium * reference_multiplier(guarantees)
+
+
+def make_product(product_id, insurance_type, base_premium=None, **rules):
+    return SimpleNamespace(
+        id=product_id, insurance_company_id=rules.pop("company", "ogar"), type=insurance_type,
+        base_premium=base_premium, premium_calculation=rules.pop("premium_calculation", None),
+        age_limits=rules.pop("age_limits", None), deductible_options=rules.pop("deductible_options", None)
+    )
+
+
+@pytest.mark.parametrize("insurance_type, risk_factors", [
+    ("auto", {"vehicle_value": 8_000_000}),
+    ("habitation", {}),
+    ("vie", {"coverage_amount": 20_000_000}),
+    ("sante", {"family_size": 4}),
+    ("voyage", {"duration": 21}),
+    ("autre", {}),
+])
+def test_generic_premium_matches_former_chain(insurance_type, risk_factors):
+    for age in AGES:
+        for guarantees in GUARANTEE_SETS:
+            expected = reference_base_premium(insurance_type, age, risk_factors) * reference_multiplier(guarantees)
+            assert insurance.calculate_premium_with_guarantees(
+                insurance_type, age, risk_factors, guarantees
+            ) == pytest.approx(expected, rel=1e-12)
+
+
+def test_generic_premium_ignores_risk_flags():
+    # Le devis générique n'a jamais appliqué les majorations d'indicateurs de risque
+    plain = insurance.calculate_premium_with_guarantees("auto", 30, {}, ["vol"])
+    assert insurance.calculate_premium_with_guarantees("auto", 30, {"accidents": 2}, ["vol"]) == plain
+
+
+def test_products_without_rules_price_as_before():
+    products = [
+        make_product("a1", "auto", 25000),
+        make_product("a2", "auto", None, company="nsia"),
+        make_product("a3", "auto", 45000, company="nsia"),
+    ]
+    engine = rating.RatingEngine(products)
+    risk_factors = {"vehicle_value": 12_000_000}
+
+    for age in AGES:
+        for guarantees in GUARANTEE_SETS:
+            rated = engine.rate("auto", age, risk_factors, guarantees)
+            expected = [reference_product_premium(product, age, risk_factors, guarantees) for product in products]
+            np.testing.assert_allclose(rated.annual_premiums, expected, rtol=1e-12)
+            assert [product.id for product in rated.products] == ["a1", "a2", "a3"]
+            for product, premium in zip(products, expected):
+                assert rating.product_premium(product, age, risk_factors, guarantees) == pytest.approx(premium, rel=1e-12)
+
+
+def test_product_rules_apply():
+    product = make_product(
+        "a1", "auto", 45000,
+        premium_calculation={
+            "age_factors": {"18-25": 1.6, "26-65": 1.0, "66+": 1.25},
+            "location_multiplier": {"libreville": 1.2, "autres": 0.9},
+        },
+        age_limits={"min_age": 18, "max_age": 80},
+        deductible_options={"standard": 75000, "reduite": 150000},
+    )
+    engine = rating.RatingEngine([product])
+
+    rated = engine.rate("auto", 22, {"city": "Libreville"}, ["vol"])
+    assert rated.annual_premiums.tolist() == pytest.approx([45000 * 1.6 * 1.2 * 1.2])
+    assert rated.deductibles.tolist() == [75000]
+    assert engine.rate("auto", 70, {"location": "Oyem"}, [])[1].tolist() == pytest.approx([45000 * 1.25 * 0.9])
+    assert engine.rate("auto", 17, {}, []).products == ()
+    assert engine.rate("auto", 81, {}, []).products == ()
+    assert engine.rate("vie", 30, {}, []).products == ()
+
+
+def test_risk_flags_loaded_for_products():
+    product = make_product("s1", "sante", 60000)
+    rated = rating.RatingEngine([product]).rate("sante", 30, {"smoking": True, "chronic_conditions": 0}, [])
+    assert rated.annual_premiums.tolist() == pytest.approx([60000 * 1.4])
+
+
+def test_engine_recompiles_only_changed_products():
+    products = [make_product("a1", "auto", 25000), make_product("h1", "habitation", 30000)]
+    engine = rating.RatingEngine(products)
+    changed = [products[0], make_product("h1", "habitation", 32000)]
+    updated = rating.RatingEngine(changed, previous=engine)
+
+    assert updated.recompiled == ["h1"]
+    assert updated.tables["auto"] is engine.tables["auto"]
+    assert updated.tables["habitation"] is not engine.tables["habitation"]
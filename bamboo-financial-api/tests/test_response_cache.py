@@ -0,0 +1,145 @@
+# tests/test_response_cache.py - Cache TTL/LRU et calcul unique par clé
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import response_cache
+from response_cache import ResponseCache, uncached
+
+
+class Counter:
+    """Calcul lent comptant ses exécutions"""
+
+    def __init__(self, value="ok", delay=0.01):
+        self.calls = 0
+        self.value = value
+        self.delay = delay
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return self.value
+
+
+def test_ttl_expiry_and_lru_eviction(monkeypatch):
+    now = [1000.0]
+    # Horloge du seul module (celle de la boucle asyncio reste réelle)
+    monkeypatch.setattr(response_cache, "time", SimpleNamespace(monotonic=lambda: now[0]))
+    cache = ResponseCache("test", ttl=30, max_entries=2)
+    compute = Counter()
+
+    async def scenario():
+        await cache.get_or_compute("a", compute)
+        await cache.get_or_compute("a", compute)
+        assert compute.calls == 1
+        now[0] += 31
+        await cache.get_or_compute("a", compute)
+        assert compute.calls == 2
+
+        await cache.get_or_compute("b", compute)
+        await cache.get_or_compute("a", compute)  # "a" redevient la plus récente
+        await cache.get_or_compute("c", compute)  # évince "b"
+        assert list(cache.entries) == ["a", "c"]
+
+    asyncio.run(scenario())
+    assert cache.info()["hits"] == 2
+
+
+def test_concurrent_misses_share_one_computation():
+    cache = ResponseCache("test", ttl=30, max_entries=8)
+    compute = Counter(delay=0.05)
+
+    async def scenario():
+        return await asyncio.gather(*(cache.get_or_compute("k", compute) for _ in range(10)))
+
+    assert asyncio.run(scenario()) == ["ok"] * 10
+    assert compute.calls == 1
+    assert (cache.misses, cache.coalesced, cache.info()["in_flight"]) == (1, 9, 0)
+
+
+def test_uncached_and_failed_results_are_not_stored():
+    cache = ResponseCache("test", ttl=30, max_entries=8)
+    fallback = Counter(value=uncached({"fallback": True}))
+
+    async def failing():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("base indisponible")
+
+    async def scenario():
+        assert await cache.get_or_compute("k", fallback) == {"fallback": True}
+        assert await cache.get_or_compute("k", fallback) == {"fallback": True}
+        assert fallback.calls == 2
+
+        results = await asyncio.gather(*(cache.get_or_compute("e", failing) for _ in range(3)), return_exceptions=True)
+        assert all(isinstance(result, RuntimeError) for result in results)
+
+    asyncio.run(scenario())
+    assert cache.entries == {}
+
+
+def test_followers_survive_leader_cancellation():
+    cache = ResponseCache("test", ttl=30, max_entries=8)
+    compute = Counter(delay=0.05)
+
+    async def scenario():
+        leader = asyncio.create_task(cache.get_or_compute("k", compute))
+        await asyncio.sleep(0.01)
+        followers = [asyncio.create_task(cache.get_or_compute("k", compute)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await asyncio.gather(*followers)
+
+    assert asyncio.run(scenario()) == ["ok"] * 3
+    # Un seul nouveau calcul, repris par l'un des suiveurs
+    assert compute.calls == 2
+    assert list(cache.entries) == ["k"]
+
+
+def test_cancelled_follower_does_not_cancel_the_computation():
+    cache = ResponseCache("test", ttl=30, max_entries=8)
+    compute = Counter(delay=0.05)
+
+    async def scenario():
+        leader = asyncio.create_task(cache.get_or_compute("k", compute))
+        await asyncio.sleep(0.01)
+        follower = asyncio.create_task(cache.get_or_compute("k", compute))
+        await asyncio.sleep(0.01)
+        follower.cancel()
+        return await leader
+
+    assert asyncio.run(scenario()) == "ok"
+    assert compute.calls == 1
+
+
+def test_decorator_keys_on_scalar_parameters():
+    calls = []
+
+    @response_cache.cached_response(ttl=30, max_entries=8)
+    async def route(period: str = "30d", db=None):
+        calls.append(period)
+        return {"period": period}
+
+    async def scenario():
+        await route(period="30d", db=object())
+        await route(period="30d", db=object())
+        await route(period="7d", db=object())
+
+    try:
+        asyncio.run(scenario())
+        assert calls == ["30d", "7d"]
+        assert response_cache.response_cache_info()[route.cache.name]["entries"] == 2
+    finally:
+        response_cache._caches.pop(route.cache.name, None)
+
+
+def test_analytics_routes_are_mounted_and_cached(client):
+    response_cache.clear_response_caches()
+    first = client.get("/api/analytics/market-statistics")
+    assert first.status_code == 200
+    assert client.get("/api/analytics/market-statistics").json() == first.json()
+
+    info = next(stats for name, stats in response_cache.response_cache_info().items() if "market_statistics" in name)
+    assert info["hits"] >= 1
@@ -0,0 +1,45 @@
+# tests/test_savings_compare.py - Comparaison vectorisée des produits d'épargne
+import pytest
+
+import catalog
+import finance
+
+
+@pytest.mark.parametrize("initial, monthly, duration", [(600_000, 50_000, 48), (1_000_000, 0, 7), (20_000, 10_000, 121)])
+def test_compare_matches_per_product_projection(client, initial, monthly, duration):
+    data = client.get("/api/savings/compare", params={"initial": initial, "monthly": monthly, "duration": duration}).json()
+    products = catalog.get_snapshot().savings_products
+
+    eligible = [product for product in products.values()
+                if initial >= float(product.minimum_deposit or 0)
+                and not (product.maximum_deposit and initial > float(product.maximum_deposit))]
+    assert sorted(offer["product"]["id"] for offer in data["offers"]) == sorted(product.id for product in eligible)
+
+    for offer in data["offers"]:
+        product = products[offer["product"]["id"]]
+        projection = finance.savings_projection(
+            initial, monthly, float(product.interest_rate), duration, product.compounding_frequency
+        )
+        assert offer["final_amount"] == pytest.approx(round(projection["final_amount"], 2), abs=0.01)
+        assert offer["total_interest"] == pytest.approx(round(projection["total_interest"], 2), abs=0.01)
+
+    final_amounts = [offer["final_amount"] for offer in data["offers"]]
+    assert final_amounts == sorted(final_amounts, reverse=True)
+    assert data["best_final_amount"] == final_amounts[0]
+
+
+def test_compare_matches_single_simulation(client):
+    data = client.get("/api/savings/compare", params={"initial": 600_000, "monthly": 50_000, "duration": 48}).json()
+    for offer in data["offers"]:
+        simulation = client.post("/api/savings/simulate", params={"include_breakdown": False}, json={
+            "savings_product_id": offer["product"]["id"], "initial_amount": 600_000,
+            "monthly_contribution": 50_000, "duration_months": 48
+        }).json()
+        assert simulation["final_amount"] == pytest.approx(offer["final_amount"], abs=0.01)
+
+
+def test_compare_limit(client):
+    full = client.get("/api/savings/compare", params={"initial": 600_000, "duration": 24}).json()
+    top = client.get("/api/savings/compare", params={"initial": 600_000, "duration": 24, "limit": 2}).json()
+    assert top["offers"] == full["offers"][:2]
+    assert top["total_offers"] == full["total_offers"]
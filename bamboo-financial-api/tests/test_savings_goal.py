@@ -0,0 +1,86 @@
+# tests/test_savings_goal.py - Solveur d'objectif d'épargne comparé à une recherche exhaustive
+import numpy as np
+import pytest
+
+import finance
+from tests.test_savings_projection import reference_balances
+
+PRODUCTS = [(3.5, "monthly"), (5.0, "quarterly"), (4.0, "daily"), (6.0, "annually"), (0.0, "monthly")]
+
+
+def final_balance(initial, monthly, rate, months, frequency):
+    return reference_balances(initial, monthly, rate, months, frequency)[-1] if months else initial
+
+
+@pytest.mark.parametrize("target, initial, budget", [(5_000_000, 500_000, 100_000), (2_000_000, 0, 37_500),
+                                                     (1_000_000, 1_200_000, 0), (3_000_000, 100_000, 0)])
+def test_months_to_target_matches_month_by_month_search(target, initial, budget):
+    rates = np.array([rate for rate, _ in PRODUCTS])
+    periods = np.array([finance.periods_per_year(frequency) for _, frequency in PRODUCTS])
+    solved = finance.months_to_target(target, initial, budget, rates, periods, 240)
+
+    for (rate, frequency), months in zip(PRODUCTS, solved.tolist()):
+        balances = [initial] + reference_balances(initial, budget, rate, 240, frequency)
+        expected = next((month for month, balance in enumerate(balances) if balance >= target - 1e-6), -1)
+        assert months == expected
+
+
+@pytest.mark.parametrize("target, initial, months", [(5_000_000, 500_000, 36), (10_000_000, 0, 121),
+                                                     (800_000, 1_000_000, 12)])
+def test_required_contribution_is_the_smallest_whole_franc(target, initial, months):
+    rates = np.array([rate for rate, _ in PRODUCTS])
+    periods = np.array([finance.periods_per_year(frequency) for _, frequency in PRODUCTS])
+    contributions = np.ceil(np.round(
+        finance.required_monthly_contributions(target, initial, months, rates, periods), 6
+    )).tolist()
+
+    for (rate, frequency), contribution in zip(PRODUCTS, contributions):
+        assert final_balance(initial, contribution, rate, months, frequency) >= target - 1e-6
+        if contribution > 0:
+            assert final_balance(initial, contribution - 1, rate, months, frequency) < target
+
+
+def test_goal_endpoint_required_contribution(client):
+    data = client.post("/api/savings/goal", json={
+        "target_amount": 3_000_000, "initial_amount": 600_000, "duration_months": 36
+    }).json()
+    assert data["mode"] == "required_contribution"
+    assert sorted(offer["product"]["id"] for offer in data["offers"]) == ["s1", "s2", "s3"]
+    for offer in data["offers"]:
+        assert offer["final_amount"] >= 3_000_000
+    contributions = [offer["monthly_contribution"] for offer in data["offers"]]
+    assert contributions == sorted(contributions)
+
+
+def test_goal_endpoint_required_duration(client):
+    data = client.post("/api/savings/goal", json={
+        "target_amount": 2_000_000, "initial_amount": 100_000, "monthly_budget": 50_000
+    }).json()
+    assert data["mode"] == "required_duration"
+    # Dépôt initial inférieur au minimum du compte à terme
+    assert [entry["product"]["id"] for entry in data["unreachable"]] == ["s2"]
+    for offer in data["offers"]:
+        months = offer["duration_months"]
+        frequency = offer["product"]["compounding_frequency"]
+        assert final_balance(100_000, 50_000, offer["product"]["rate"], months, frequency) >= 2_000_000
+        assert final_balance(100_000, 50_000, offer["product"]["rate"], months - 1, frequency) < 2_000_000
+
+
+def test_goal_requires_exactly_one_mode(client):
+    assert client.post("/api/savings/goal", json={"target_amount": 1_000_000}).status_code == 422
+
+
+def test_bisection_matches_grid_search():
+    generator = np.random.default_rng(21)
+    frequencies = list(finance.COMPOUNDING_PERIODS)
+    rates = np.round(generator.uniform(0, 12, 200), 2)
+    rates[::17] = 0
+    periods = np.array([finance.periods_per_year(generator.choice(frequencies)) for _ in rates])
+
+    for target, initial, budget in [(5_000_000, 500_000, 60_000), (20_000_000, 0, 25_000), (900_000, 1_000_000, 0),
+                                    (3_000_000, 2_999_999, 0), (7_777_777, 123_456, 45_678.9)]:
+        # Ancienne recherche sur toute la grille des mois
+        a, b = finance.balance_coefficients(np.arange(601), rates[:, None], periods[:, None])
+        grid = initial * a + budget * b >= target
+        expected = np.where(grid.any(axis=1), grid.argmax(axis=1), -1)
+        assert finance.months_to_target(target, initial, budget, rates, periods, 600).tolist() == expected.tolist()
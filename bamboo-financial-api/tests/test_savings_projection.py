@@ -0,0 +1,90 @@
+# tests/test_savings_projection.py - Projection d'épargne en forme fermée comparée à une boucle mensuelle
+import pytest
+
+import finance
+
+
+def reference_balances(initial, monthly, annual_rate, months, frequency):
+    """
+    Simulation mois par mois des conventions du moteur : versement en fin de mois ;
+    capitalisation au moins mensuelle par le facteur mensuel équivalent ; sinon
+    intérêts crédités en fin de période, au prorata pour les versements de la période.
+    """
+    rate = annual_rate / 100
+    n = finance.periods_per_year(frequency)
+    balances = []
+    balance = initial
+
+    if n >= 12:
+        growth = (1 + rate / n) ** (n / 12)
+        for _ in range(months):
+            balance = balance * growth + monthly
+            balances.append(balance)
+        return balances
+
+    months_per_period = 12 // n
+    period_start = balance
+    accrued = 0.0
+    for month in range(1, months + 1):
+        balance += monthly
+        position = (month - 1) % months_per_period + 1
+        accrued += monthly * rate / 12 * (months_per_period - position)
+        if position == months_per_period:
+            balance += period_start * rate / n + accrued
+            period_start = balance
+            accrued = 0.0
+        balances.append(balance)
+    return balances
+
+
+def baseline_monthly_loop(initial, monthly, annual_rate, months):
+    """Boucle de l'ancien calculate_savings_simulation (capitalisation mensuelle)"""
+    balance = initial
+    for _ in range(months):
+        balance += monthly + balance * annual_rate / 100 / 12
+    return balance
+
+
+CASES = [
+    (500_000, 50_000, 3.5, 24, "monthly"),
+    (0, 25_000, 5.0, 120, "monthly"),
+    (1_000_000, 0, 4.0, 61, "daily"),
+    (200_000, 10_000, 6.0, 38, "quarterly"),
+    (200_000, 10_000, 6.0, 36, "annually"),
+    (100_000, 5_000, 2.5, 17, "semi_annually"),
+    (300_000, 20_000, 0.0, 48, "quarterly"),
+]
+
+
+@pytest.mark.parametrize("initial, monthly, annual_rate, months, frequency", CASES)
+def test_projection_matches_monthly_simulation(initial, monthly, annual_rate, months, frequency):
+    expected = reference_balances(initial, monthly, annual_rate, months, frequency)
+    projection = finance.savings_projection(initial, monthly, annual_rate, months, frequency, include_breakdown=True)
+
+    assert projection["final_amount"] == pytest.approx(expected[-1], rel=1e-10, abs=1e-6)
+    assert projection["total_contributions"] == initial + monthly * months
+    assert projection["monthly_breakdown"]["balance"].tolist() == pytest.approx(expected, rel=1e-10, abs=1e-6)
+
+
+def test_monthly_compounding_matches_former_simulator():
+    for initial, monthly, annual_rate, months in [(500_000, 50_000, 3.5, 24), (10_000, 1_000, 12.0, 360)]:
+        final = finance.savings_projection(initial, monthly, annual_rate, months)["final_amount"]
+        assert final == pytest.approx(baseline_monthly_loop(initial, monthly, annual_rate, months), rel=1e-10)
+
+
+def test_breakdown_rows_interest_sums_to_total():
+    projection = finance.savings_projection(200_000, 10_000, 6.0, 38, "quarterly", include_breakdown=True)
+    rows = finance.breakdown_rows(projection["monthly_breakdown"])
+    assert [row["month"] for row in rows] == list(range(1, 39))
+    assert sum(row["interest"] for row in rows) == pytest.approx(projection["total_interest"], abs=0.01 * len(rows))
+
+
+def test_simulate_breakdown_only_on_request(client):
+    body = {"savings_product_id": "s1", "initial_amount": 200_000, "monthly_contribution": 10_000, "duration_months": 38}
+    summary = client.post("/api/savings/simulate", json=body).json()
+    detailed = client.post("/api/savings/simulate", params={"include_breakdown": True}, json=body).json()
+
+    assert summary["monthly_breakdown"] == []
+    assert [row["month"] for row in detailed["monthly_breakdown"]] == list(range(1, 39))
+    assert detailed["monthly_breakdown"][-1]["cumulative_amount"] == pytest.approx(detailed["final_amount"], abs=0.01)
+    assert summary["final_amount"] == detailed["final_amount"]
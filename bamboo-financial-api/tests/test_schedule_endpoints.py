@@ -0,0 +1,98 @@
+# tests/test_schedule_endpoints.py - Tableau paginé / en flux identique au tableau complet
+import json
+
+import pytest
+
+import database
+import finance
+import models
+
+REQUEST = {"credit_product_id": "c1", "requested_amount": 12_345_678.9, "duration_months": 277,
+           "monthly_income": 2_000_000, "down_payment": 1_000_000}
+
+
+@pytest.fixture(scope="module")
+def simulation(client):
+    response = client.post("/api/credits/simulate", params={"include_schedule": True}, json=REQUEST)
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_preview_is_the_head_of_the_full_schedule(client, simulation):
+    preview = client.post("/api/credits/simulate", json=REQUEST).json()["amortization_schedule"]
+    assert len(simulation["amortization_schedule"]) == 277
+    assert preview == simulation["amortization_schedule"][:12]
+
+
+def test_pages_rebuild_the_full_schedule(client, simulation):
+    rows, from_month = [], 1
+    while from_month is not None:
+        page = client.get(f"/api/simulations/credit/{simulation['simulation_id']}/schedule",
+                          params={"from": from_month}).json()
+        rows.extend(page["rows"])
+        from_month = page["next_from"]
+    assert json.dumps(rows) == json.dumps(simulation["amortization_schedule"])
+    assert rows[-1]["remaining_balance"] == 0
+
+
+def test_ndjson_stream_matches_full_schedule(client, simulation):
+    response = client.get(f"/api/simulations/credit/{simulation['simulation_id']}/schedule",
+                          params={"format": "ndjson", "from": 100, "to": 250})
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert rows == simulation["amortization_schedule"][99:250]
+
+
+def test_chunks_match_window():
+    chunks = list(finance.iter_schedule_chunks(1_000_000, 9.0, 50, 22_000.0, 3, 47, 10))
+    assert [len(chunk) for chunk in chunks] == [10, 10, 10, 10, 5]
+    assert [row for chunk in chunks for row in chunk] == finance.amortization_schedule(1_000_000, 9.0, 50, 22_000.0, 3, 47)
+
+
+def test_out_of_range_page_is_rejected(client, simulation):
+    response = client.get(f"/api/simulations/credit/{simulation['simulation_id']}/schedule", params={"from": 278})
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("params", [{"from": 10, "to": 5}, {"from": 10, "to": 5, "format": "ndjson"}])
+def test_inverted_range_is_rejected_in_every_format(client, simulation, params):
+    response = client.get(f"/api/simulations/credit/{simulation['simulation_id']}/schedule", params=params)
+    assert response.status_code == 400
+
+
+@pytest.fixture
+def legacy_simulation(app):
+    # Ligne historique non compactée : tableau stocké qui n'est pas celui du noyau
+    stored = finance.amortization_schedule(3_000_000, 8.0, 30, 110_000.0)
+    for row in stored:
+        row["interest"] = round(row["interest"] + 5, 2)
+    simulation = models.CreditSimulation(
+        id="legacy-inline", credit_product_id="c1", requested_amount=3_000_000, duration_months=30,
+        monthly_income=900_000, current_debts=0, down_payment=0, applied_rate=8.0, monthly_payment=110_000,
+        total_cost=3_300_000, total_interest=300_000, debt_ratio=12.2, eligible=True,
+        amortization_schedule=stored, schedule_format=finance.SCHEDULE_FORMAT_INLINE
+    )
+    db = database.SessionLocal()
+    try:
+        db.add(simulation)
+        db.commit()
+        assert not finance.credit_schedule_reproducible(simulation)
+    finally:
+        db.close()
+    yield stored
+    db = database.SessionLocal()
+    try:
+        db.query(models.CreditSimulation).filter(models.CreditSimulation.id == "legacy-inline").delete()
+        db.commit()
+    finally:
+        db.close()
+
+
+def test_legacy_inline_schedule_served_by_every_endpoint(client, legacy_simulation):
+    full = client.get("/api/simulations/credit/legacy-inline").json()["amortization_schedule"]
+    page = client.get("/api/simulations/credit/legacy-inline/schedule", params={"from": 4, "to": 17}).json()
+    stream = client.get("/api/simulations/credit/legacy-inline/schedule", params={"format": "ndjson", "from": 2})
+
+    assert full == legacy_simulation
+    assert page["rows"] == legacy_simulation[3:17]
+    assert [json.loads(line) for line in stream.text.splitlines()] == legacy_simulation[1:]
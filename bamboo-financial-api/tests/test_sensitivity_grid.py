@@ -0,0 +1,43 @@
+# tests/test_sensitivity_grid.py - Grille de sensibilité comparée au calcul cellule par cellule
+import pytest
+
+import finance
+
+
+def test_grid_matches_cell_by_cell_payments(client):
+    response = client.get("/api/credits/sensitivity-grid", params={
+        "amount_min": 1_000_000, "amount_max": 50_000_000, "amount_steps": 7,
+        "duration_min": 12, "duration_max": 240, "duration_steps": 5,
+        "rate_min": 0, "rate_max": 12, "rate_steps": 4,
+        "monthly_income": 2_000_000, "current_debts": 150_000
+    })
+    assert response.status_code == 200
+    data = response.json()
+    axes, grid = data["axes"], data["grid"]
+    assert data["shape"] == [len(axes["amounts"]), len(axes["durations"]), len(axes["rates"])] == [7, 5, 4]
+
+    for i, amount in enumerate(axes["amounts"]):
+        for j, months in enumerate(axes["durations"]):
+            for k, rate in enumerate(axes["rates"]):
+                payment = finance.monthly_payment(amount, rate, months)
+                assert grid["monthly_payment"][i][j][k] == pytest.approx(round(payment, 2), abs=0.01)
+                assert grid["total_cost"][i][j][k] == pytest.approx(round(payment * months, 2), abs=0.01)
+                assert grid["debt_ratio"][i][j][k] == pytest.approx(
+                    round((payment + 150_000) / 2_000_000 * 100, 1), abs=0.1
+                )
+
+
+def test_grid_defaults_to_product_bounds(client):
+    data = client.get("/api/credits/sensitivity-grid", params={
+        "credit_product_id": "c3", "amount_steps": 3, "duration_steps": 3, "rate_steps": 1
+    }).json()
+    assert data["axes"] == {"amounts": [100000.0, 5050000.0, 10000000.0], "durations": [6, 33, 60], "rates": [12.0]}
+    assert data["grid"]["debt_ratio"] is None
+
+
+def test_grid_rejects_inverted_bounds(client):
+    response = client.get("/api/credits/sensitivity-grid", params={
+        "amount_min": 5_000_000, "amount_max": 1_000_000, "duration_min": 12, "duration_max": 24,
+        "rate_min": 5, "rate_max": 6
+    })
+    assert response.status_code == 400
@@ -0,0 +1,43 @@
+# tests/test_simulation_storage.py - Tableaux régénérés depuis les paramètres stockés
+import json
+
+import database
+import finance
+import models
+
+REQUESTS = [
+    {"credit_product_id": "c1", "requested_amount": 12_345_678.9, "duration_months": 277,
+     "monthly_income": 2_000_000, "down_payment": 1_000_000},
+    {"credit_product_id": "c2", "requested_amount": 999_999.99, "duration_months": 37,
+     "monthly_income": 450_000, "current_debts": 20_000},
+]
+
+
+def stored_schedule_columns(simulation_id):
+    db = database.SessionLocal()
+    try:
+        return db.query(
+            models.CreditSimulation.schedule_format, models.CreditSimulation.amortization_schedule
+        ).filter(models.CreditSimulation.id == simulation_id).one()
+    finally:
+        db.close()
+
+
+def test_regenerated_schedule_is_byte_identical(client, wait_for_writes):
+    for request in REQUESTS:
+        response = client.post("/api/credits/simulate", params={"include_schedule": True}, json=request).json()
+        simulation_id = response["simulation_id"]
+        expected = json.dumps(response["amortization_schedule"])
+
+        # Ligne encore en file puis ligne validée
+        pending = client.get(f"/api/simulations/credit/{simulation_id}/schedule", params={"to": 400}).json()
+        wait_for_writes()
+        stored = client.get(f"/api/simulations/credit/{simulation_id}/schedule", params={"to": 400}).json()
+        assert json.dumps(pending["rows"]) == json.dumps(stored["rows"]) == expected
+
+        # Seuls les paramètres sont enregistrés
+        schedule_format, inline_schedule = stored_schedule_columns(simulation_id)
+        assert schedule_format == finance.SCHEDULE_FORMAT_PARAMETERS
+        assert not inline_schedule
+        assert json.dumps(client.get(f"/api/simulations/credit/{simulation_id}").json()["amortization_schedule"]) == expected
+
@@ -0,0 +1,192 @@
+# tests/test_write_behind.py - File d'écriture différée : vidage, repli synchrone, arrêt
+import threading
+import time
+import uuid
+
+import pytest
+
+import database
+import models
+import write_behind
+
+
+def simulation_row(**overrides):
+    row = {
+        "id": str(uuid.uuid4()), "credit_product_id": "c1", "requested_amount": 5_000_000, "duration_months": 60,
+        "monthly_income": 800_000, "applied_rate": 7.5, "monthly_payment": 100_190.9, "total_cost": 6_011_454,
+        "total_interest": 1_011_454, "debt_ratio": 12.5, "eligible": True, "schedule_format": 1,
+    }
+    row.update(overrides)
+    return row
+
+
+def stored_ids(rows):
+    db = database.SessionLocal()
+    try:
+        ids = [row["id"] for row in rows]
+        return {found for found, in db.query(models.CreditSimulation.id).filter(models.CreditSimulation.id.in_(ids))}
+    finally:
+        db.close()
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def writer(app):
+    writer = write_behind.SimulationWriter(flush_rows=10, flush_interval_ms=50, max_rows=20)
+    yield writer
+    writer.stop(timeout=5)
+
+
+def test_rows_are_flushed_in_batches_and_readable_while_pending(writer):
+    writer.start()
+    rows = [simulation_row() for _ in range(18)]
+    for row in rows[:5]:
+        writer.enqueue(models.CreditSimulation, row)
+    writer.enqueue_many(models.CreditSimulation, rows[5:])
+
+    pending = writer.pending_record(models.CreditSimulation, rows[0]["id"])
+    assert pending is None or pending.id == rows[0]["id"]
+
+    wait_until(lambda: writer.info()["pending_rows"] == 0)
+    assert stored_ids(rows) == {row["id"] for row in rows}
+    info = writer.info()
+    assert info["written"] == 18 and info["synchronous"] == 0
+    assert info["batches"] >= 2  # au plus flush_rows lignes par INSERT
+
+
+def test_stopped_writer_writes_synchronously(writer):
+    row = simulation_row()
+    writer.enqueue(models.CreditSimulation, row)
+    assert stored_ids([row]) == {row["id"]}
+    assert writer.info()["synchronous"] == 1
+
+
+def test_full_queue_falls_back_to_synchronous_insert(writer):
+    release = threading.Event()
+    insert = writer._insert
+
+    def slow_insert(batch):
+        # Seul le thread d'écriture est ralenti ; l'écriture synchrone reste immédiate
+        if threading.current_thread() is writer.thread:
+            release.wait(5)
+        insert(batch)
+
+    writer._insert = slow_insert
+    writer.start()
+    rows = [simulation_row() for _ in range(40)]
+    writer.enqueue(models.CreditSimulation, rows[0])
+    time.sleep(0.1)  # le thread tient le premier lot
+    writer.enqueue_many(models.CreditSimulation, rows[1:])
+
+    # La file (20 lignes) déborde : le reliquat est écrit immédiatement, sans perte
+    assert writer.info()["synchronous"] == 19
+    release.set()
+    wait_until(lambda: writer.info()["pending_rows"] == 0)
+    assert stored_ids(rows) == {row["id"] for row in rows}
+
+
+def test_invalid_row_does_not_lose_the_batch(writer):
+    duplicate = simulation_row()
+    writer.enqueue(models.CreditSimulation, duplicate)
+    rows = [simulation_row(), simulation_row(id=duplicate["id"]), simulation_row()]
+    writer.start()
+    writer.enqueue_many(models.CreditSimulation, rows)
+
+    wait_until(lambda: writer.info()["pending_rows"] == 0)
+    assert stored_ids(rows) == {row["id"] for row in rows}
+    assert writer.info()["failed"] == 1
+
+
+def test_stop_drains_the_queue(writer):
+    writer.start()
+    rows = [simulation_row() for _ in range(7)]
+    writer.enqueue_many(models.CreditSimulation, rows)
+    writer.stop()
+    assert writer.thread is None
+    assert stored_ids(rows) == {row["id"] for row in rows}
+
+
+def test_stop_leaves_the_queue_to_a_busy_thread(writer):
+    release = threading.Event()
+    insert = writer._insert
+
+    def slow_insert(batch):
+        # Seul le thread d'écriture est ralenti ; l'écriture synchrone reste immédiate
+        if threading.current_thread() is writer.thread:
+            release.wait(5)
+        insert(batch)
+
+    writer._insert = slow_insert
+    writer.start()
+    rows = [simulation_row() for _ in range(3)]
+    writer.enqueue(models.CreditSimulation, rows[0])
+    time.sleep(0.1)
+    writer.enqueue_many(models.CreditSimulation, rows[1:])
+
+    writer.stop(timeout=0.1)
+    # Thread encore actif : rien n'est vidé depuis l'appelant (pas de double écriture)
+    assert writer.thread is not None and writer.queue.qsize() == 2
+    release.set()
+    writer.thread.join(5)
+    assert stored_ids(rows) == {row["id"] for row in rows}
+    assert writer.info()["written"] == 3
+
+
+def test_counters_balance_under_concurrent_producers(app):
+    # File assez grande pour que seul le thread d'écriture accède à la base
+    # (SQLite de test : une seule connexion partagée entre threads)
+    writer = write_behind.SimulationWriter(flush_rows=10, flush_interval_ms=20, max_rows=1000)
+    writer.start()
+    batches = [[simulation_row() for _ in range(30)] for _ in range(8)]
+
+    def produce(rows):
+        for row in rows[:5]:
+            writer.enqueue(models.CreditSimulation, row)
+        writer.enqueue_many(models.CreditSimulation, rows[5:])
+
+    producers = [threading.Thread(target=produce, args=(rows,)) for rows in batches]
+    try:
+        for producer in producers:
+            producer.start()
+        for producer in producers:
+            producer.join()
+        wait_until(lambda: writer.info()["pending_rows"] == 0)
+    finally:
+        writer.stop(timeout=5)
+
+    rows = [row for rows in batches for row in rows]
+    assert stored_ids(rows) == {row["id"] for row in rows}
+    # Chaque ligne comptée une fois à la mise en file et une fois à l'écriture
+    info = writer.info()
+    assert (info["enqueued"], info["synchronous"], info["written"], info["failed"]) == (len(rows), 0, len(rows), 0)
+
+
+@pytest.mark.parametrize("running", [True, False])
+def test_callback_once_the_whole_batch_is_committed(writer, running):
+    if running:
+        writer.start()
+    rows = [simulation_row() for _ in range(15)]
+    committed = []
+    writer.enqueue_many(models.CreditSimulation, rows, lambda: committed.append(stored_ids(rows)))
+
+    wait_until(lambda: writer.info()["pending_rows"] == 0)
+    assert committed == [{row["id"] for row in rows}]
+
+
+def test_no_callback_when_a_row_fails(writer):
+    duplicate = simulation_row()
+    writer.enqueue(models.CreditSimulation, duplicate)
+    writer.start()
+    rows = [simulation_row() for _ in range(4)] + [simulation_row(id=duplicate["id"])]
+    called = []
+    writer.enqueue_many(models.CreditSimulation, rows, lambda: called.append(True))
+
+    wait_until(lambda: writer.info()["pending_rows"] == 0)
+    assert writer.info()["failed"] == 1
+    assert called == [] and not writer.completions
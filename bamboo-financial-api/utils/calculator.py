@@ -1,15 +1,12 @@
 # utils/calculators.py
 import math
 from typing import List, Dict, Any
+from finance import amortization_schedule, monthly_payment
+import rating
 
 def calculate_monthly_payment(principal: float, annual_rate: float, months: int) -> float:
     """Calcule la mensualité d'un crédit"""
-    if annual_rate == 0:
-        return principal / months
-    
-    monthly_rate = annual_rate / 100 / 12
-    factor = (1 + monthly_rate) ** months
-    return principal * (monthly_rate * factor) / (factor - 1)
+    return monthly_payment(principal, annual_rate, months)
 
 def calculate_effective_rate(principal: float, monthly_payment: float, months: int, fees: float = 0) -> float:
     """Calcule le taux effectif global (TEG)"""
@@ -27,24 +24,9 @@ def generate_amortization_schedule(
     if monthly_payment is None:
         monthly_payment = calculate_monthly_payment(principal, annual_rate, months)
     
-    monthly_rate = annual_rate / 100 / 12
-    balance = principal
-    schedule = []
-    
-    for month in range(1, months + 1):
-        interest_payment = balance * monthly_rate
-        principal_payment = monthly_payment - interest_payment
-        balance -= principal_payment
-        
-        schedule.append({
-            "month": month,
-            "principal": round(principal_payment, 2),
-            "interest": round(interest_payment, 2),
-            "remaining_balance": round(max(0, balance), 2),
-            "monthly_payment": round(monthly_payment, 2)
-        })
-    
-    return schedule
+    return amortization_schedule(
+        principal, annual_rate, months, monthly_payment, payment_key="monthly_payment"
+    )
 
 def calculate_savings_projection(
     initial_amount: float,
@@ -85,6 +67,20 @@ def calculate_savings_projection(
         "annual_yield": round((balance / total_contributions - 1) * (12 / months) * 100, 2)
     }
 
+# Facteurs d'âge du calcul simplifié : (âge minimal, âge maximal, facteur) par type
+SIMPLE_AGE_FACTORS = {
+    "auto": ((0, 24, 1.5), (66, rating.MAX_AGE, 1.3)),
+}
+# Progression linéaire par année au-delà d'un âge pivot : (âge pivot, pente)
+LINEAR_AGE_FACTORS = {
+    "vie": (30, 0.02),
+}
+# Prime mensuelle minimale en proportion du capital couvert
+COVERAGE_FLOOR_RATES = {
+    "auto": 0.03 / 12,
+    "habitation": 0.002 / 12,
+}
+
 def calculate_insurance_premium(
     base_premium: float,
     coverage_amount: float,
@@ -92,36 +88,21 @@ def calculate_insurance_premium(
     risk_factors: Dict[str, Any],
     insurance_type: str
 ) -> float:
-    """Calcule la prime d'assurance basée sur les facteurs de risque"""
+    """Calcule la prime d'assurance basée sur les facteurs de risque (barèmes en tables)"""
     premium = base_premium
     
     # Facteur âge
-    if insurance_type == "auto":
-        if age < 25:
-            premium *= 1.5
-        elif age > 65:
-            premium *= 1.3
-    elif insurance_type == "vie":
-        age_factor = 1.0 + max(0, (age - 30) * 0.02)
-        premium *= age_factor
-    
-    # Facteurs de risque spécifiques
-    if insurance_type == "auto":
-        if risk_factors.get("accidents", 0) > 0:
-            premium *= 1.2
-        if risk_factors.get("violations", 0) > 0:
-            premium *= 1.1
-        if coverage_amount:
-            premium = max(premium, coverage_amount * 0.03 / 12)
+    for min_age, max_age, factor in SIMPLE_AGE_FACTORS.get(insurance_type, ()):
+        if min_age <= age <= max_age:
+            premium *= factor
+    if insurance_type in LINEAR_AGE_FACTORS:
+        pivot, slope = LINEAR_AGE_FACTORS[insurance_type]
+        premium *= 1.0 + max(0, (age - pivot) * slope)
     
-    elif insurance_type == "habitation":
-        if coverage_amount:
-            premium = max(premium, coverage_amount * 0.002 / 12)
+    # Indicateurs de risque déclarés (barème partagé avec le moteur de tarification)
+    premium *= rating.risk_flag_multiplier(insurance_type, risk_factors)
     
-    elif insurance_type == "sante":
-        if risk_factors.get("chronic_conditions"):
-            premium *= 1.3
-        if risk_factors.get("smoking"):
-            premium *= 1.4
+    if coverage_amount and insurance_type in COVERAGE_FLOOR_RATES:
+        premium = max(premium, coverage_amount * COVERAGE_FLOOR_RATES[insurance_type])
     
     return round(premium, 2)
\ No newline at end of file
@@ -0,0 +1,297 @@
+# write_behind.py - Écriture différée des simulations et devis (INSERT multi-lignes en tâche de fond)
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import insert
+
+from database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Vidage dès FLUSH_ROWS lignes en attente, ou au plus tard après FLUSH_INTERVAL_MS
+FLUSH_ROWS = int(os.getenv("SIMULATION_FLUSH_ROWS", "100"))
+FLUSH_INTERVAL_MS = int(os.getenv("SIMULATION_FLUSH_INTERVAL_MS", "500"))
+# Au-delà, l'écriture redevient synchrone (contre-pression plutôt que perte)
+QUEUE_MAX_ROWS = int(os.getenv("SIMULATION_QUEUE_MAX_ROWS", "10000"))
+
+
+class _Completion:
+    """Lignes d'un lot restant à valider ; le rappel n'est appelé que si toutes l'ont été"""
+
+    __slots__ = ("remaining", "failed", "callback")
+
+    def __init__(self, rows: int, callback: Callable[[], None]):
+        self.remaining = rows
+        self.failed = False
+        self.callback = callback
+
+
+class SimulationWriter:
+    """
+    File d'insertions regroupées par modèle. Un thread dédié vide la file par
+    INSERT multi-lignes ; les identifiants sont attribués par l'appelant, qui
+    répond sans attendre la validation en base.
+    """
+
+    def __init__(self, flush_rows: int, flush_interval_ms: int, max_rows: int):
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval_ms / 1000
+        self.queue: "queue.Queue[Tuple[Any, Dict[str, Any]]]" = queue.Queue(maxsize=max_rows)
+        # Lignes acceptées mais pas encore validées, consultables par identifiant
+        self.pending: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        # Rappels à déclencher une fois les lignes d'un lot validées (même verrou que pending)
+        self.completions: Dict[Tuple[str, str], _Completion] = {}
+        self.pending_lock = threading.Lock()
+        self.thread: Optional[threading.Thread] = None
+        self.stopping = threading.Event()
+        # Compteurs modifiés par les threads de requêtes et le thread d'écriture
+        self.stats_lock = threading.Lock()
+        self.stats = {
+            "enqueued": 0,
+            "written": 0,
+            "failed": 0,
+            "batches": 0,
+            "synchronous": 0,
+            "max_depth": 0,
+            "last_flush_ms": 0.0,
+        }
+
+    # ---------- côté requêtes ----------
+
+    def enqueue(self, model, row: Dict[str, Any]) -> None:
+        """Ajoute une ligne (avec son id) ; écrit immédiatement si la file est pleine ou arrêtée"""
+        if self.thread is None or not self.thread.is_alive():
+            self._write_now(model, row)
+            return
+
+        key = (model.__tablename__, row["id"])
+        with self.pending_lock:
+            self.pending[key] = row
+        try:
+            self.queue.put_nowait((model, row))
+        except queue.Full:
+            with self.pending_lock:
+                self.pending.pop(key, None)
+            self._write_now(model, row)
+            return
+
+        self._count("enqueued", 1)
+        self._record_depth()
+
+    def enqueue_many(
+        self,
+        model,
+        rows: List[Dict[str, Any]],
+        on_written: Optional[Callable[[], None]] = None
+    ) -> None:
+        """
+        Ajoute un lot de lignes ; la part non mise en file est écrite en un seul
+        INSERT. on_written est appelé une fois toutes les lignes validées en base
+        (jamais si l'une d'elles échoue).
+        """
+        if on_written is not None and rows:
+            completion = _Completion(len(rows), on_written)
+            with self.pending_lock:
+                for row in rows:
+                    self.completions[(model.__tablename__, row["id"])] = completion
+
+        if self.thread is None or not self.thread.is_alive():
+            self._write_many_now(model, rows)
+            return
+
+        for position, row in enumerate(rows):
+            key = (model.__tablename__, row["id"])
+            with self.pending_lock:
+                self.pending[key] = row
+            try:
+                self.queue.put_nowait((model, row))
+            except queue.Full:
+                with self.pending_lock:
+                    self.pending.pop(key, None)
+                self._write_many_now(model, rows[position:])
+                break
+            self._count("enqueued", 1)
+        self._record_depth()
+
+    def pending_record(self, model, record_id: str):
+        """Objet transitoire d'une ligne encore en file (lecture juste après la réponse)"""
+        with self.pending_lock:
+            row = self.pending.get((model.__tablename__, record_id))
+        return model(**row) if row is not None else None
+
+    def _write_now(self, model, row: Dict[str, Any]) -> None:
+        self._write_many_now(model, [row])
+
+    def _write_many_now(self, model, rows: List[Dict[str, Any]]) -> None:
+        self._count("synchronous", len(rows))
+        self._insert([(model, row) for row in rows])
+
+    # ---------- thread d'écriture ----------
+
+    def start(self) -> None:
+        if self.thread is not None and self.thread.is_alive():
+            return
+        self.stopping.clear()
+        self.thread = threading.Thread(target=self._run, name="simulation-writer", daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout: float = 10) -> None:
+        """Vide la file puis arrête le thread (arrêt de l'application)"""
+        if self.thread is None:
+            return
+        self.stopping.set()
+        self.thread.join(timeout)
+        if self.thread.is_alive():
+            # Thread encore en train d'écrire : le vider ici risquerait des doublons,
+            # la file reste au thread (démon) jusqu'à la fin du processus
+            logger.warning(
+                f"Écriture différée non terminée après {timeout}s, "
+                f"{self.queue.qsize()} ligne(s) encore en file"
+            )
+            return
+        self.thread = None
+        # Reliquat éventuel (lignes ajoutées pendant l'arrêt)
+        self._insert(self._drain(block=False))
+
+    def _drain(self, block: bool) -> List[Tuple[Any, Dict[str, Any]]]:
+        """Lignes disponibles, jusqu'à flush_rows ; attend au plus flush_interval la première"""
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.flush_rows:
+            remaining = deadline - time.monotonic()
+            try:
+                if block and remaining > 0:
+                    batch.append(self.queue.get(timeout=remaining))
+                else:
+                    batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while not self.stopping.is_set() or not self.queue.empty():
+            batch = self._drain(block=not self.stopping.is_set())
+            if batch:
+                self._insert(batch)
+
+    def _insert(self, batch: List[Tuple[Any, Dict[str, Any]]]) -> None:
+        if not batch:
+            return
+        started = time.perf_counter()
+
+        # Un INSERT multi-lignes par modèle et par jeu de colonnes
+        groups: Dict[Tuple[Any, frozenset], List[Dict[str, Any]]] = {}
+        for model, row in batch:
+            groups.setdefault((model, frozenset(row)), []).append(row)
+
+        written = set()
+        db = SessionLocal()
+        try:
+            for (model, _), rows in groups.items():
+                try:
+                    db.execute(insert(model), rows)
+                    db.commit()
+                    self._count("written", len(rows))
+                    written.update((model.__tablename__, row["id"]) for row in rows)
+                except Exception as e:
+                    db.rollback()
+                    logger.warning(f"Insertion groupée {model.__tablename__} échouée, reprise ligne à ligne: {e}")
+                    written.update(self._insert_rows_one_by_one(db, model, rows))
+        finally:
+            db.close()
+            callbacks = []
+            with self.pending_lock:
+                for model, row in batch:
+                    key = (model.__tablename__, row["id"])
+                    self.pending.pop(key, None)
+                    completion = self.completions.pop(key, None)
+                    if completion is None:
+                        continue
+                    completion.remaining -= 1
+                    completion.failed = completion.failed or key not in written
+                    if completion.remaining == 0 and not completion.failed:
+                        callbacks.append(completion.callback)
+            for callback in callbacks:
+                try:
+                    callback()
+                except Exception as e:
+                    logger.error(f"Rappel après écriture en échec: {e}")
+
+        with self.stats_lock:
+            self.stats["batches"] += 1
+            self.stats["last_flush_ms"] = round((time.perf_counter() - started) * 1000, 2)
+
+    def _insert_rows_one_by_one(self, db, model, rows: List[Dict[str, Any]]) -> List[Tuple[str, str]]:
+        # Une ligne invalide (clé étrangère...) ne doit pas faire perdre tout le lot
+        written = []
+        for row in rows:
+            try:
+                db.execute(insert(model), [row])
+                db.commit()
+                self._count("written", 1)
+                written.append((model.__tablename__, row["id"]))
+            except Exception as e:
+                db.rollback()
+                self._count("failed", 1)
+                logger.error(f"Ligne {model.__tablename__} {row.get('id')} non enregistrée: {e}")
+        return written
+
+    def _count(self, name: str, amount: int) -> None:
+        with self.stats_lock:
+            self.stats[name] += amount
+
+    def _record_depth(self) -> None:
+        depth = self.queue.qsize()
+        with self.stats_lock:
+            self.stats["max_depth"] = max(self.stats["max_depth"], depth)
+
+    def info(self) -> Dict[str, Any]:
+        with self.pending_lock:
+            pending_rows = len(self.pending)
+        with self.stats_lock:
+            stats = dict(self.stats)
+        return {
+            "running": self.thread is not None and self.thread.is_alive(),
+            "queue_depth": self.queue.qsize(),
+            # En file ou dans le lot en cours d'écriture
+            "pending_rows": pending_rows,
+            "queue_capacity": self.queue.maxsize,
+            "flush_rows": self.flush_rows,
+            "flush_interval_ms": int(self.flush_interval * 1000),
+            **stats
+        }
+
+
+writer = SimulationWriter(FLUSH_ROWS, FLUSH_INTERVAL_MS, QUEUE_MAX_ROWS)
+
+
+def enqueue(model, row: Dict[str, Any]) -> None:
+    """Insertion différée d'une ligne de simulation ou de devis"""
+    writer.enqueue(model, row)
+
+
+def enqueue_many(model, rows: List[Dict[str, Any]], on_written: Optional[Callable[[], None]] = None) -> None:
+    """Insertion différée d'un lot de lignes (INSERT multi-lignes), rappel une fois validées"""
+    writer.enqueue_many(model, rows, on_written)
+
+
+def pending_record(model, record_id: str):
+    """Ligne encore en attente d'écriture, sous forme d'objet transitoire"""
+    return writer.pending_record(model, record_id)
+
+
+def start() -> None:
+    writer.start()
+
+
+def stop(timeout: float = 10) -> None:
+    writer.stop(timeout)
+
+
+def writer_info() -> Dict[str, Any]:
+    """Profondeur de file et compteurs d'écriture (supervision)"""
+    return writer.info()